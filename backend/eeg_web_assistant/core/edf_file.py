@@ -1,64 +1,186 @@
+import io
 import json
-from copy import deepcopy
+from dataclasses import dataclass
 from datetime import datetime
-from math import ceil
+from fractions import Fraction
+from math import ceil, floor
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import mne
 import numpy as np
+from scipy.signal import resample_poly
 
 from eeg_web_assistant import settings
 from eeg_web_assistant.core.classification_types import ClassificationType
+from eeg_web_assistant.core.edf_reader import EdfHeader, EdfReader
+from eeg_web_assistant.core.signal_blocks import SignalBlockReader
 from eeg_web_assistant.services.logging import Logging
 
 logger = Logging.get(__name__)
 
 
+@dataclass(frozen=True)
+class EdfMetadata:
+    ch_names: List[str]
+    sampling_frequency: float
+    n_times: int
+    highpass: float
+    lowpass: float
+    measure_date: Optional[datetime]
+    subject_info: Optional[Dict]
+
+    @property
+    def duration(self) -> int:
+        return ceil(self.n_times // self.sampling_frequency)
+
+
+def probe_edf(buffer: Union[bytes, BinaryIO], config=settings.EdfFileConfig,
+              size: Optional[int] = None) -> EdfMetadata:
+    # only the fixed and signal headers are parsed, no data record is read, so an upload is
+    # validated in the same time whatever its duration
+    if isinstance(buffer, (bytes, bytearray, memoryview)):
+        buffer = io.BytesIO(buffer)
+
+    reader = EdfReader(buffer, size=size)
+    exclude_channels = set(_read_exclude_channels(config) or [])
+
+    return EdfMetadata(ch_names=[name for name in reader.ch_names if name not in exclude_channels],
+                       sampling_frequency=reader.sampling_frequency,
+                       n_times=reader.n_times,
+                       highpass=reader.highpass,
+                       lowpass=reader.lowpass,
+                       measure_date=reader.header.measure_date,
+                       subject_info=_convert_subject_info(reader.header.subject_info))
+
+
+class EdfUploadProbe:
+    # collects the headers from the first chunks of a streamed upload, the data records are only
+    # counted, so the memory used does not depend on the file size
+    def __init__(self, config=settings.EdfFileConfig):
+        self.config = config
+        self.size = 0
+        self.header: Optional[EdfHeader] = None
+        self._header_buffer = bytearray()
+
+    def update(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.header is not None:
+            return
+
+        self._header_buffer += chunk
+        if len(self._header_buffer) < EdfHeader.FIXED_HEADER_BYTES:
+            return
+
+        header_size = EdfHeader.get_size(self._header_buffer[:EdfHeader.FIXED_HEADER_BYTES])
+        if len(self._header_buffer) >= header_size:
+            del self._header_buffer[header_size:]
+            self.header = EdfHeader.read(io.BytesIO(self._header_buffer))
+
+    def get_metadata(self) -> EdfMetadata:
+        if self.header is None:
+            raise ValueError("File is too short to contain EDF headers")
+
+        return probe_edf(bytes(self._header_buffer), config=self.config, size=self.size)
+
+
 class EdfFile:
-    def __init__(self, path: Path, config=settings.EdfFileConfig):
+    RESAMPLE_MAX_DENOMINATOR = 1000
+    # half length of the scipy resample_poly default filter, in input samples per ratio term
+    RESAMPLE_FILTER_HALF_LENGTH = 10
+
+    def __init__(self, path: Optional[Path] = None, config=settings.EdfFileConfig,
+                 streaming: bool = False, buffer: Optional[Union[bytes, BinaryIO]] = None,
+                 blocks: Optional[SignalBlockReader] = None, dtype=np.float64):
+        if path is None and buffer is None and blocks is None:
+            raise ValueError("Either EDF file path, buffer or signal blocks must be given")
+
         self.path = path
+        self.buffer = buffer
+        self.blocks = blocks
         self.config = config
+        # in streaming mode the int16 samples stay in the buffer or blocks and only the windows
+        # read are scaled, float32 halves every window compared to mne float64 data
+        self.dtype = np.dtype(dtype)
+        # mne reads only from a path, an in memory or memory mapped buffer and stored signal
+        # blocks are always streamed
+        self.streaming = streaming or buffer is not None or blocks is not None
         self.raw = None
+        self.reader = None
         self.exclude_channels = None
+
+        # streaming mode selection over the reader signals, data is read on demand
+        self._file = None
+        self._channel_indices = None
+        self._reader_n_times = None
+        self._resample_sfreq = None
+
         self._load()
 
     @property
     def duration(self) -> int:
-        return ceil(self.raw.n_times // self.raw.info['sfreq'])
+        return ceil(self.n_times // self.sampling_frequency)
 
     @property
     def channel_names(self) -> List[str]:
+        if self.streaming:
+            return [self.reader.ch_names[idx] for idx in self._channel_indices]
+
         return self.raw.ch_names
 
+    @property
+    def channel_indices(self) -> List[int]:
+        # reader signals of the channels kept after exclusion, streaming mode only
+        return self._channel_indices
+
+    @property
+    def signal_source(self) -> str:
+        # upsampled lower rate signals are rounded to int16 in signal blocks, so their samples
+        # differ slightly from the ones read from the EDF file
+        return 'signal_blocks' if self.blocks is not None else 'edf'
+
     @property
     def lowpass(self) -> Optional[float]:
+        if self.streaming:
+            return self.reader.lowpass
+
         return self.raw.info.get('lowpass')
 
     @property
     def highpass(self) -> Optional[float]:
+        if self.streaming:
+            return self.reader.highpass
+
         return self.raw.info.get('highpass')
 
     @property
     def sampling_frequency(self) -> float:
+        if self.streaming:
+            return self._resample_sfreq or self.reader.sampling_frequency
+
         return self.raw.info['sfreq']
 
     @property
     def measure_date(self) -> Optional[datetime]:
+        if self.streaming:
+            return self.reader.header.measure_date
+
         return self.raw.info.get('meas_date')
 
     @property
     def subject_info(self) -> Optional[Dict]:
-        subject_info = self.raw.info.get('subject_info')
-        if subject_info:
-            birthday: Tuple[int, int, int] = subject_info.get('birthday')
-            if birthday:
-                subject_info['birthday'] = datetime(*birthday)
+        if self.streaming:
+            subject_info = self.reader.header.subject_info
+        else:
+            subject_info = self.raw.info.get('subject_info')
 
-        return subject_info
+        return _convert_subject_info(subject_info)
 
     @property
     def n_times(self) -> int:
+        if self.streaming:
+            return int(round(self._reader_n_times * self._resample_ratio))
+
         return self.raw.n_times
 
     @property
@@ -66,59 +188,152 @@ class EdfFile:
         array = self.to_numpy()
         return np.amin(array), np.amax(array)
 
+    @property
+    def _resample_ratio(self) -> float:
+        if self._resample_sfreq is None:
+            return 1.
+
+        return self._resample_sfreq / self.reader.sampling_frequency
+
     def drop_channels(self, drop_names: Iterable[str]):
         logger.debug("Dropping channels: %s", ",".join(drop_names))
 
-        self.raw.drop_channels(ch_names=drop_names)
+        if self.streaming:
+            self._channel_indices = [idx for idx in self._channel_indices
+                                     if self.reader.ch_names[idx] not in drop_names]
+        else:
+            self.raw.drop_channels(ch_names=drop_names)
 
     def change_duration(self, new_duration: int):
         if new_duration <= 0:
             raise ValueError("New duration value must be greater than 0 seconds")
+        if new_duration > self.duration:
+            raise ValueError(f"New duration value must not exceed the recording duration of "
+                             f"{self.duration} seconds")
 
         logger.debug("Changing edf duration from %d to %d", self.duration, new_duration)
-        self.raw.crop(tmin=0, tmax=new_duration, include_tmax=False)
 
-        assert self.raw.n_times / self.raw.info['sfreq'] == new_duration
+        if self.streaming:
+            # cropped in the file sampling rate, a resampling set before still applies
+            self._reader_n_times = int(new_duration * self.reader.sampling_frequency)
+        else:
+            self.raw.crop(tmin=0, tmax=new_duration, include_tmax=False)
+
+        assert self.n_times / self.sampling_frequency == new_duration
 
     def resample(self, new_sfreq: float):
         logger.debug("Resampling data from sfreq %.1f to %.1f", self.sampling_frequency, new_sfreq)
 
-        self.raw = self.raw.resample(sfreq=new_sfreq)
-
-    def to_numpy(self) -> np.ndarray:
-        return self.raw.get_data()
+        if self.streaming:
+            # applied to every window read from the file
+            self._resample_sfreq = new_sfreq
+        else:
+            self.raw = self.raw.resample(sfreq=new_sfreq)
+
+    def to_numpy(self, picks: Optional[List[int]] = None, start: int = 0,
+                 stop: Optional[int] = None) -> np.ndarray:
+        if self.streaming:
+            return self._read_window(picks=picks, start=start, stop=stop)
+
+        return self.raw.get_data(picks=picks, start=start, stop=stop).astype(self.dtype,
+                                                                             copy=False)
+
+    def iter_windows(self, window_seconds: float, picks: Optional[List[int]] = None,
+                     stop: Optional[int] = None) -> Iterator[np.ndarray]:
+        # in streaming mode only one window of the recording is held in memory at once
+        window_n_times = int(window_seconds * self.sampling_frequency)
+        stop = self.n_times if stop is None else min(stop, self.n_times)
+
+        for window_start in range(0, stop, window_n_times):
+            yield self.to_numpy(picks=picks, start=window_start,
+                                stop=min(window_start + window_n_times, stop))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read_window(self, picks: Optional[List[int]], start: int,
+                     stop: Optional[int]) -> np.ndarray:
+        stop = self.n_times if stop is None else min(stop, self.n_times)
+        start = min(start, stop)
+        picks = range(len(self._channel_indices)) if picks is None else picks
+        reader_picks = [self._channel_indices[idx] for idx in picks]
+
+        if self._resample_sfreq is None:
+            return self.reader.read(picks=reader_picks, start=start, stop=stop, dtype=self.dtype)
+
+        # read the covering window with the context of the polyphase FIR filter in the file
+        # sampling rate, its start aligned so that it falls on a sample of the resampled signal,
+        # the filter is local so a resampled window equals the slice of a resampled whole signal
+        ratio = Fraction(self._resample_ratio).limit_denominator(self.RESAMPLE_MAX_DENOMINATOR)
+        pad = ceil(self.RESAMPLE_FILTER_HALF_LENGTH * max(ratio.numerator, ratio.denominator)
+                   / ratio.numerator) + 1
+
+        reader_start = max(floor(start / ratio) - pad, 0)
+        reader_start -= reader_start % ratio.denominator
+        reader_stop = min(ceil(stop / ratio) + pad, self._reader_n_times)
+        window = self.reader.read(picks=reader_picks, start=reader_start, stop=reader_stop)
+
+        window = resample_poly(window, up=ratio.numerator, down=ratio.denominator, axis=-1)
+
+        offset = start - int(reader_start * ratio)
+        return window[:, offset:offset + stop - start].astype(self.dtype, copy=False)
 
     def _load(self):
         self._load_config()
 
-        self.raw = mne.io.read_raw_edf(str(self.path))
-        self.raw.close()
-        logger.info("Edf file read")
+        if self.streaming:
+            # from stored signal blocks only the blocks of the windows read are fetched
+            self.reader = self.blocks if self.blocks is not None else \
+                EdfReader(self._open_source())
+            self._channel_indices = list(range(len(self.reader.ch_names)))
+            self._reader_n_times = self.reader.n_times
+            logger.info("Edf file header read")
+        else:
+            self.raw = mne.io.read_raw_edf(str(self.path))
+            self.raw.close()
+            logger.info("Edf file read")
 
         if self.exclude_channels is not None:
             logger.debug("Excluding non EEG channel types...")
-            ch_names = self.raw.ch_names
+            ch_names = self.channel_names
             drop_chan = set(self.exclude_channels).intersection(ch_names)
 
             self.drop_channels(drop_names=drop_chan)
 
+    def _open_source(self) -> BinaryIO:
+        if self.buffer is None:
+            self._file = self.path.open(mode='rb')
+            return self._file
+
+        if isinstance(self.buffer, (bytes, bytearray, memoryview)):
+            # BytesIO shares the memory of immutable bytes until it is written to
+            return io.BytesIO(self.buffer)
+
+        # file-like buffers, e.g. mmap.mmap, are owned and closed by the caller
+        return self.buffer
+
     def _load_config(self):
         logger.debug("Loading config for EDF file read...")
 
-        with self.config.EDF_FILE_EXCLUDE.open(mode='r') as f:
-            self.exclude_channels = json.load(f).get('exclude')
+        self.exclude_channels = _read_exclude_channels(self.config)
 
 
 class EdfProcessor:
     def __init__(self, edf_record: EdfFile, classification_type: ClassificationType,
                  config=settings.EdfProcessingConfig):
-        self.edf_record = deepcopy(edf_record)
+        self.edf_record = edf_record
         self.classification_type = classification_type
         self.config = config
         self.segment_cuts = None
         self.common_channels = None
         self.processed_data = None
 
+        # selection of the record data to classify, the record itself is never modified
+        self.channel_picks = None
+        self.n_times = None
+
     def process(self) -> np.ndarray:
         logger.info("Begin processing EDF record for classification...")
 
@@ -130,6 +345,33 @@ class EdfProcessor:
 
         return array
 
+    def process_blocks(self, segments_per_block: Optional[int] = None) -> Iterator[np.ndarray]:
+        # same output as process(), yielded in blocks of segments read one window at a time
+        segments_per_block = segments_per_block or self.config.SEGMENTS_PER_BLOCK
+
+        logger.info("Begin processing EDF record for classification in blocks of %d segments...",
+                    segments_per_block)
+
+        self._load_config()
+        self._modify_for_classification()
+        self.segment_cuts = self._get_segment_cuts()
+
+        window_seconds = segments_per_block * self.segment_len
+
+        # the whole selection min and max are needed before normalizing the first block
+        signal_min, signal_max = np.inf, -np.inf
+        for window in self.edf_record.iter_windows(window_seconds=window_seconds,
+                                                   picks=self.channel_picks, stop=self.n_times):
+            window_min, window_max = self._min_max_value(window)
+            signal_min, signal_max = min(signal_min, window_min), max(signal_max, window_max)
+
+        for window in self.edf_record.iter_windows(window_seconds=window_seconds,
+                                                   picks=self.channel_picks, stop=self.n_times):
+            array = self._reshape_to_segments(window)
+            array = self._normalize(array, min_max_value=(signal_min, signal_max))
+
+            yield self._split_to_frames(segmented_array=array)
+
     def _load_config(self):
         with self.config.EDF_CHANNELS_SETUP.open(mode='r') as f:
             edf_setup = json.load(f)
@@ -143,9 +385,46 @@ class EdfProcessor:
         else:
             raise ValueError("Wrong segment and frames config.")
 
+    def get_processing_params(self) -> Dict:
+        # everything the processed data depends on besides the record samples, segment cuts are
+        # set as in processing
+        self._load_config()
+        self._modify_for_classification()
+        self.segment_cuts = self._get_segment_cuts()
+
+        return {
+            'segment_len': self.segment_len,
+            'frames_amount': self.frames_amount,
+            'channels': [self.edf_record.channel_names[idx] for idx in self.channel_picks],
+            'sfreq': self.edf_record.sampling_frequency,
+            'n_times': self.n_times,
+            'dtype': self.edf_record.dtype.name,
+            'signal_source': self.edf_record.signal_source
+        }
+
+    @classmethod
+    def group_by_channels(cls, edf_record: EdfFile,
+                          classification_types: Iterable[ClassificationType],
+                          config=settings.EdfProcessingConfig) -> List[List[ClassificationType]]:
+        # classification types picking the same channels of the record get identical processed
+        # data, so it is enough to process the record once per group
+        with config.EDF_CHANNELS_SETUP.open(mode='r') as f:
+            edf_setup = json.load(f)
+
+        groups = {}
+        for classification_type in classification_types:
+            picks = cls._get_channel_picks(channel_names=edf_record.channel_names,
+                                           common_channels=edf_setup[classification_type.value])
+            groups.setdefault(tuple(picks), []).append(classification_type)
+
+        return list(groups.values())
+
     def _modify_for_classification(self):
-        drop_chan = set(self.edf_record.channel_names).difference(self.common_channels)
-        self.edf_record.drop_channels(drop_names=drop_chan)
+        self.channel_picks = self._get_channel_picks(channel_names=self.edf_record.channel_names,
+                                                     common_channels=self.common_channels)
+
+        logger.debug("Picked channels for classification: %s",
+                     ",".join(self.edf_record.channel_names[idx] for idx in self.channel_picks))
 
         self._check_edf_duration()
 
@@ -155,21 +434,26 @@ class EdfProcessor:
         if duration < self.segment_len:
             raise ValueError(f"Cannot process EDF shorter than {self.segment_len} s duration.")
 
-        if not duration % self.segment_len == 0:
-            new_duration = int(duration / self.segment_len) * self.segment_len
-            self.edf_record.change_duration(new_duration=new_duration)
+        new_duration = int(duration / self.segment_len) * self.segment_len
+        if new_duration != duration:
+            logger.debug("Processing first %d s of %d s EDF record", new_duration, duration)
 
-    def _split_to_segments(self) -> np.ndarray:
-        assert self.edf_record.duration % self.segment_len == 0
+        self.n_times = int(new_duration * self.edf_record.sampling_frequency)
 
-        array = self.edf_record.to_numpy()
-        n_times = array.shape[-1]
+    def _get_segment_cuts(self) -> List[Tuple[int, int]]:
+        step = int(self.segment_len * self.edf_record.sampling_frequency)
+        return [(t, t + step) for t in range(0, self.n_times, step)]
+
+    def _split_to_segments(self) -> np.ndarray:
+        array = self.edf_record.to_numpy(picks=self.channel_picks, stop=self.n_times)
         step = int(self.segment_len * self.edf_record.sampling_frequency)
 
+        assert array.shape[-1] % step == 0
+
         logger.debug("Splitting EDF record to segments...")
 
-        self.segment_cuts = [(t, t + step) for t in range(0, n_times - step + 1, step)]
-        segments = np.array([array[:, t:t + step] for t in range(0, n_times - step + 1, step)])
+        self.segment_cuts = [(t, t + step) for t in range(0, array.shape[-1], step)]
+        segments = self._reshape_to_segments(array)
 
         logger.debug("Segmented data shape: %s", segments.shape)
 
@@ -177,6 +461,15 @@ class EdfProcessor:
 
         return segments
 
+    def _reshape_to_segments(self, array: np.ndarray) -> np.ndarray:
+        channels, n_times = array.shape
+        step = int(self.segment_len * self.edf_record.sampling_frequency)
+        segments_amount = n_times // step
+
+        # (channels, segments, step) view transposed to (segments, channels, step), no copy
+        segments = array[:, :segments_amount * step].reshape(channels, segments_amount, step)
+        return segments.transpose(1, 0, 2)
+
     def _split_to_frames(self, segmented_array: np.ndarray) -> np.ndarray:
         logger.debug("Input segmented data shape: %s", segmented_array.shape)
 
@@ -186,18 +479,46 @@ class EdfProcessor:
         logger.debug("Splitting segmented EDF record to frames...")
         step = int(self.frame_len * self.edf_record.sampling_frequency)
 
-        frames_list = []
-        for segment in segmented_array:
-            n_times = segment.shape[-1]
-            frames = [segment[:, t:t + step] for t in range(0, n_times - step + 1, step)]
-            frames_list.append(frames)
+        segments_amount, channels, n_times = segmented_array.shape
+        frames_amount = n_times // step
 
-        frames = np.array(frames_list)
+        # splitting the contiguous samples axis keeps the result a view of the input
+        frames = segmented_array[..., :frames_amount * step]
+        frames = frames.reshape(segments_amount, channels, frames_amount, step)
+        frames = frames.transpose(0, 2, 1, 3)
 
         logger.debug("Split into frames data shape: %s", frames.shape)
 
         return frames
 
-    def _normalize(self, array: np.ndarray) -> np.ndarray:
-        signal_min, signal_max = self.edf_record.min_max_value
-        return (array - ((signal_max + signal_min) / 2)) / ((signal_max - signal_min) / 2)
+    @staticmethod
+    def _get_channel_picks(channel_names: List[str], common_channels: List[str]) -> List[int]:
+        return [idx for idx, name in enumerate(channel_names) if name in common_channels]
+
+    @staticmethod
+    def _min_max_value(array: np.ndarray) -> Tuple[float, float]:
+        return np.amin(array), np.amax(array)
+
+    def _normalize(self, array: np.ndarray,
+                   min_max_value: Optional[Tuple[float, float]] = None) -> np.ndarray:
+        # array is a view of the data copy returned by EdfFile.to_numpy, so it is scaled in place
+        signal_min, signal_max = min_max_value or self._min_max_value(array)
+
+        np.subtract(array, (signal_max + signal_min) / 2, out=array)
+        np.divide(array, (signal_max - signal_min) / 2, out=array)
+
+        return array
+
+
+def _read_exclude_channels(config) -> Optional[List[str]]:
+    with config.EDF_FILE_EXCLUDE.open(mode='r') as f:
+        return json.load(f).get('exclude')
+
+
+def _convert_subject_info(subject_info: Optional[Dict]) -> Optional[Dict]:
+    if subject_info:
+        birthday: Tuple[int, int, int] = subject_info.get('birthday')
+        if birthday:
+            subject_info['birthday'] = datetime(*birthday)
+
+    return subject_info
@@ -0,0 +1,373 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from math import ceil
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.signal import resample_poly
+
+from eeg_web_assistant.services.logging import Logging
+
+logger = Logging.get(__name__)
+
+EDF_ANNOTATIONS_LABEL = 'EDF Annotations'
+SAMPLE_DTYPE = np.dtype('<i2')
+
+# polyphase upsampling filter reaches this many samples of the lower rate signal either side
+UPSAMPLE_PAD_SAMPLES = 10
+
+# physical dimensions scaled to volts, the same way mne does
+UNIT_SCALES = {'uV': 1e-6, 'µV': 1e-6, 'μV': 1e-6, 'mV': 1e-3}
+
+
+@dataclass(frozen=True)
+class EdfSignalHeader:
+    label: str
+    transducer: str
+    physical_dimension: str
+    physical_min: float
+    physical_max: float
+    digital_min: int
+    digital_max: int
+    prefiltering: str
+    samples_per_record: int
+
+    @property
+    def gain(self) -> float:
+        return self._calibration * UNIT_SCALES.get(self.physical_dimension, 1.)
+
+    @property
+    def offset(self) -> float:
+        offset = self.physical_min - self.digital_min * self._calibration
+        return offset * UNIT_SCALES.get(self.physical_dimension, 1.)
+
+    @property
+    def is_annotation(self) -> bool:
+        return self.label == EDF_ANNOTATIONS_LABEL
+
+    @property
+    def _calibration(self) -> float:
+        return (self.physical_max - self.physical_min) / (self.digital_max - self.digital_min)
+
+
+@dataclass(frozen=True)
+class EdfHeader:
+    version: str
+    patient_id: str
+    recording_id: str
+    start_date: str
+    start_time: str
+    header_bytes: int
+    reserved: str
+    records_amount: int
+    record_duration: float
+    signals: List[EdfSignalHeader]
+
+    FIXED_HEADER_BYTES = 256
+    SIGNAL_HEADER_BYTES = 256
+
+    @classmethod
+    def read(cls, file: BinaryIO) -> 'EdfHeader':
+        file.seek(0)
+        fixed = file.read(cls.FIXED_HEADER_BYTES)
+        if len(fixed) < cls.FIXED_HEADER_BYTES:
+            raise ValueError("File is too short to contain an EDF header")
+
+        fields = _split_fields(fixed, widths=(8, 80, 80, 8, 8, 8, 44, 8, 8, 4))
+        version, patient_id, recording_id, start_date, start_time = fields[:5]
+        header_bytes, reserved, records_amount, record_duration, signals_amount = fields[5:]
+
+        try:
+            signals_amount = int(signals_amount)
+            header_bytes = int(header_bytes)
+            records_amount = int(records_amount)
+            record_duration = float(record_duration)
+        except ValueError:
+            raise ValueError("Bad EDF file header")
+
+        signals_header = file.read(signals_amount * cls.SIGNAL_HEADER_BYTES)
+        if len(signals_header) < signals_amount * cls.SIGNAL_HEADER_BYTES:
+            raise ValueError("File is too short to contain EDF signal headers")
+
+        signals = cls._parse_signals(signals_header, signals_amount)
+
+        return cls(version=version, patient_id=patient_id, recording_id=recording_id,
+                   start_date=start_date, start_time=start_time, header_bytes=header_bytes,
+                   reserved=reserved, records_amount=records_amount,
+                   record_duration=record_duration or 1., signals=signals)
+
+    @classmethod
+    def get_size(cls, fixed_header: bytes) -> int:
+        # size of the fixed and all the signal headers, known from the fixed header alone
+        try:
+            signals_amount = int(_split_fields(fixed_header[252:256], widths=(4,))[0])
+        except ValueError:
+            raise ValueError("Bad EDF file header")
+
+        return cls.FIXED_HEADER_BYTES + signals_amount * cls.SIGNAL_HEADER_BYTES
+
+    @staticmethod
+    def _parse_signals(signals_header: bytes, signals_amount: int) -> List[EdfSignalHeader]:
+        # signal header fields are stored field by field for all the signals
+        widths = (16, 80, 8, 8, 8, 8, 8, 80, 8, 32)
+        columns, position = [], 0
+        for width in widths:
+            field_bytes = signals_header[position:position + width * signals_amount]
+            columns.append(_split_fields(field_bytes, widths=(width,) * signals_amount))
+            position += width * signals_amount
+
+        try:
+            return [EdfSignalHeader(label=columns[0][i],
+                                    transducer=columns[1][i],
+                                    physical_dimension=columns[2][i],
+                                    physical_min=float(columns[3][i]),
+                                    physical_max=float(columns[4][i]),
+                                    digital_min=int(float(columns[5][i])),
+                                    digital_max=int(float(columns[6][i])),
+                                    prefiltering=columns[7][i],
+                                    samples_per_record=int(columns[8][i]))
+                    for i in range(signals_amount)]
+        except ValueError:
+            raise ValueError("Bad EDF signal header")
+
+    @property
+    def declared_duration(self) -> Optional[float]:
+        if self.records_amount < 0:
+            return None
+
+        return self.records_amount * self.record_duration
+
+    @property
+    def record_samples(self) -> int:
+        return sum(signal.samples_per_record for signal in self.signals)
+
+    @property
+    def record_bytes(self) -> int:
+        return self.record_samples * SAMPLE_DTYPE.itemsize
+
+    @property
+    def measure_date(self) -> Optional[datetime]:
+        # EDF+ recording id holds the 4 digit year, preferred over the 2 digit header date
+        try:
+            recording_info = self.recording_id.split(' ')
+            if len(recording_info) == 5:
+                date = datetime.strptime(recording_info[1], '%d-%b-%Y')
+            else:
+                day, month, year = (int(value) for value in self.start_date.split('.'))
+                date = datetime(year + 2000 if year < 85 else year + 1900, month, day)
+
+            hour, minute, second = (int(value) for value in self.start_time.split('.'))
+        except ValueError:
+            return None
+
+        return date.replace(hour=hour, minute=minute, second=second, tzinfo=timezone.utc)
+
+    @property
+    def subject_info(self) -> Optional[Dict]:
+        # EDF+ patient id: code, sex, birthdate and name separated with spaces
+        patient_info = self.patient_id.split(' ')
+        if not patient_info[0]:
+            return None
+
+        subject_info = {'his_id': patient_info[0]}
+        if len(patient_info) < 4:
+            return subject_info
+
+        subject_info['sex'] = {'M': 1, 'F': 2}.get(patient_info[1], 0)
+
+        try:
+            birthday = datetime.strptime(patient_info[2], '%d-%b-%Y')
+            subject_info['birthday'] = (birthday.year, birthday.month, birthday.day)
+        except ValueError:
+            pass
+
+        names = patient_info[3].split('_')
+        if len(names) == 2:
+            subject_info['first_name'], subject_info['last_name'] = names
+        elif len(names) == 3:
+            (subject_info['first_name'], subject_info['middle_name'],
+             subject_info['last_name']) = names
+        else:
+            subject_info['last_name'] = patient_info[3]
+
+        for info in patient_info[4:]:
+            key, _, value = info.partition('=')
+            if key == 'hand' and value.isdigit():
+                subject_info['hand'] = int(value)
+
+        return subject_info
+
+
+class EdfReader:
+    def __init__(self, file: BinaryIO, size: Optional[int] = None):
+        # with the file size given the file may hold only the headers, e.g. of a streamed upload
+        self.file = file
+        self.size = size
+        self.header = EdfHeader.read(file)
+
+        self.signal_indices = [idx for idx, signal in enumerate(self.header.signals)
+                               if not signal.is_annotation]
+        self.signals = [self.header.signals[idx] for idx in self.signal_indices]
+
+        if not self.signals:
+            raise ValueError("EDF file contains no data signals")
+
+        # position of every signal samples inside a data record
+        record_offsets = np.cumsum([0] + [signal.samples_per_record
+                                          for signal in self.header.signals])
+        self._record_offsets = [int(record_offsets[idx]) for idx in self.signal_indices]
+
+        self.samples_per_record = max(signal.samples_per_record for signal in self.signals)
+        self.records_amount = self._get_records_amount()
+
+        logger.debug("EDF header read: %d signals, %d records of %.1f s",
+                     len(self.signals), self.records_amount, self.header.record_duration)
+
+    @property
+    def ch_names(self) -> List[str]:
+        return [signal.label for signal in self.signals]
+
+    @property
+    def sampling_frequency(self) -> float:
+        return self.samples_per_record / self.header.record_duration
+
+    @property
+    def n_times(self) -> int:
+        return self.records_amount * self.samples_per_record
+
+    @property
+    def highpass(self) -> float:
+        values = _parse_prefilter(self.signals, 'HP')
+        return max(values) if values else 0.
+
+    @property
+    def lowpass(self) -> float:
+        values = _parse_prefilter(self.signals, 'LP')
+        return min(values) if values else self.sampling_frequency / 2
+
+    def read(self, picks: Optional[Sequence[int]] = None, start: int = 0,
+             stop: Optional[int] = None, dtype=np.float64) -> np.ndarray:
+        # int16 samples are scaled to physical values only for the window read
+        picks = range(len(self.signals)) if picks is None else picks
+        stop = self.n_times if stop is None else min(stop, self.n_times)
+
+        data = np.empty((len(picks), max(stop - start, 0)), dtype=dtype)
+        signals = self._read_signals(picks, start, stop, physical=True)
+        for row, (idx, signal) in enumerate(zip(picks, signals)):
+            if signal.dtype != SAMPLE_DTYPE:
+                data[row] = signal
+                continue
+
+            np.multiply(signal, self.signals[idx].gain, out=data[row])
+            data[row] += self.signals[idx].offset
+
+        return data
+
+    def read_digital(self, picks: Optional[Sequence[int]] = None, start: int = 0,
+                     stop: Optional[int] = None) -> np.ndarray:
+        # upsampled lower rate signals are rounded to the nearest digital value
+        picks = range(len(self.signals)) if picks is None else picks
+        stop = self.n_times if stop is None else min(stop, self.n_times)
+
+        digital = np.empty((len(picks), max(stop - start, 0)), dtype=SAMPLE_DTYPE)
+        for row, signal in enumerate(self._read_signals(picks, start, stop)):
+            if signal.dtype != SAMPLE_DTYPE:
+                signal = np.clip(np.rint(signal), -2 ** 15, 2 ** 15 - 1)
+            digital[row] = signal
+
+        return digital
+
+    def _read_signals(self, picks: Sequence[int], start: int, stop: int,
+                      physical: bool = False) -> List[np.ndarray]:
+        # signals stored with fewer samples per record are upsampled to the highest rate, the
+        # way mne reads them, records around the window are read so the result does not depend
+        # on the window borders, equal rate signals are returned as stored int16 samples
+        if not 0 <= start <= stop:
+            raise ValueError(f"Wrong samples range to read: {start}-{stop}")
+
+        if stop == start or not picks:
+            return [np.empty(0, dtype=SAMPLE_DTYPE) for _ in picks]
+
+        first_record = start // self.samples_per_record
+        last_record = ceil(stop / self.samples_per_record)
+
+        lowest_rate = min(self.signals[idx].samples_per_record for idx in picks)
+        if lowest_rate < self.samples_per_record:
+            pad_records = ceil(UPSAMPLE_PAD_SAMPLES / lowest_rate)
+            first_record = max(first_record - pad_records, 0)
+            last_record = min(last_record + pad_records, self.records_amount)
+
+        records = self._read_records(first_record=first_record, last_record=last_record)
+
+        begin = start - first_record * self.samples_per_record
+        end = begin + stop - start
+
+        signals = []
+        for idx in picks:
+            offset = self._record_offsets[idx]
+            samples = self.signals[idx].samples_per_record
+            signal = records[:, offset:offset + samples].reshape(-1)
+
+            if samples != self.samples_per_record:
+                signal = signal.astype(np.float64)
+                if physical:
+                    signal *= self.signals[idx].gain
+                    signal += self.signals[idx].offset
+
+                signal = resample_poly(signal, up=self.samples_per_record, down=samples)
+
+            signals.append(signal[begin:end])
+
+        return signals
+
+    def _read_records(self, first_record: int, last_record: int) -> np.ndarray:
+        records_amount = last_record - first_record
+
+        self.file.seek(self.header.header_bytes + first_record * self.header.record_bytes)
+        buffer = self.file.read(records_amount * self.header.record_bytes)
+
+        if len(buffer) < records_amount * self.header.record_bytes:
+            raise ValueError("EDF file is shorter than declared in its header")
+
+        records = np.frombuffer(buffer, dtype=SAMPLE_DTYPE)
+        return records.reshape(records_amount, self.header.record_samples)
+
+    def _get_records_amount(self) -> int:
+        # records amount may be -1 in the header while recording, count complete records instead
+        if self.size is None:
+            self.file.seek(0, 2)
+            self.size = self.file.tell()
+
+        data_bytes = self.size - self.header.header_bytes
+        file_records = data_bytes // self.header.record_bytes
+
+        if self.header.records_amount < 0:
+            return file_records
+
+        return min(self.header.records_amount, file_records)
+
+
+def _split_fields(data: bytes, widths: Tuple[int, ...]) -> List[str]:
+    fields, position = [], 0
+    for width in widths:
+        fields.append(data[position:position + width].decode('latin-1').strip())
+        position += width
+
+    return fields
+
+
+def _parse_prefilter(signals: List[EdfSignalHeader], filter_type: str) -> List[float]:
+    values = []
+    for signal in signals:
+        match = re.search(rf'{filter_type}:\s*([a-zA-Z0-9,.]+)', signal.prefiltering)
+        if not match:
+            continue
+
+        value = match.group(1).replace('Hz', '').replace(',', '.')
+        if value == 'DC':
+            values.append(0.)
+        elif value.replace('.', '', 1).isdigit():
+            values.append(float(value))
+
+    return values
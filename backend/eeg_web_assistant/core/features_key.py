@@ -0,0 +1,21 @@
+import hashlib
+import json
+from typing import Dict
+
+
+def get_raw_hash(raw_data: bytes) -> str:
+    return get_raw_hasher(raw_data).hexdigest()
+
+
+def get_raw_hasher(raw_data: bytes = b''):
+    # incremental hasher of raw data streamed in chunks, hexdigest equal to get_raw_hash
+    return hashlib.sha256(raw_data)
+
+
+def get_features_key(raw_hash: str, processing_params: Dict, features_params: Dict) -> str:
+    # content address of extracted features, any change of the raw data, processing or features
+    # config gives a new key, so stale features are never read
+    params = json.dumps({'raw': raw_hash, 'processing': processing_params,
+                         'features': features_params}, sort_keys=True)
+
+    return hashlib.sha256(params.encode('utf-8')).hexdigest()
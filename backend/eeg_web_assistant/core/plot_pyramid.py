@@ -0,0 +1,93 @@
+import io
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from eeg_web_assistant import settings
+from eeg_web_assistant.services.logging import Logging
+
+logger = Logging.get(__name__)
+
+
+class PlotPyramid:
+    # min/max decimation levels of a recording, every level keyed by its bucket size in samples
+    # holds a (channels, buckets, 2) array of each bucket minimum and maximum
+    def __init__(self, levels: Dict[int, np.ndarray], n_times: int):
+        self.levels = levels
+        self.n_times = n_times
+
+    @property
+    def bucket_sizes(self) -> Tuple[int, ...]:
+        return tuple(sorted(self.levels))
+
+    @classmethod
+    def build(cls, windows: Iterable[np.ndarray], n_times: int,
+              config=settings.PlotConfig) -> 'PlotPyramid':
+        # windows are consecutive (channels, samples) parts of the recording, each a multiple
+        # of the first level bucket size except for the last one
+        bucket_size = config.PYRAMID_BUCKET_SIZE
+        level = np.concatenate([cls._min_max(window, bucket_size=bucket_size)
+                                for window in windows], axis=1)
+
+        # every next level merges PYRAMID_FACTOR buckets of the previous one
+        levels = {bucket_size: level}
+        while level.shape[1] > config.PYRAMID_MIN_BUCKETS:
+            level = cls._reduce(level, factor=config.PYRAMID_FACTOR)
+            bucket_size *= config.PYRAMID_FACTOR
+            levels[bucket_size] = level
+
+        logger.debug("Plot pyramid built with bucket sizes: %s", list(levels))
+
+        return cls(levels=levels, n_times=n_times)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'PlotPyramid':
+        with np.load(io.BytesIO(data)) as arrays:
+            levels = {int(name.split('_')[1]): arrays[name]
+                      for name in arrays.files if name.startswith('level_')}
+            return cls(levels=levels, n_times=int(arrays['n_times']))
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez(buffer, n_times=self.n_times,
+                 **{f'level_{bucket_size}': level for bucket_size, level in self.levels.items()})
+
+        return buffer.getvalue()
+
+    def select_bucket_size(self, start: int, stop: int, width: int) -> Optional[int]:
+        # the coarsest level still giving at least one bucket per pixel, None when even the
+        # finest level is too coarse and raw samples should be plotted instead
+        samples_per_pixel = (stop - start) / width
+        fitting = [bucket_size for bucket_size in self.bucket_sizes
+                   if bucket_size <= samples_per_pixel]
+
+        return max(fitting) if fitting else None
+
+    def get_range(self, bucket_size: int, start: int, stop: int) -> Tuple[int, np.ndarray]:
+        # buckets covering [start, stop) samples range and the first bucket sample index
+        first_bucket = start // bucket_size
+        last_bucket = -(-min(stop, self.n_times) // bucket_size)
+
+        return first_bucket * bucket_size, self.levels[bucket_size][:, first_bucket:last_bucket]
+
+    @staticmethod
+    def _min_max(array: np.ndarray, bucket_size: int) -> np.ndarray:
+        channels, n_times = array.shape
+        buckets_amount = -(-n_times // bucket_size)
+
+        # the last, incomplete bucket is padded with its own edge values
+        padded = np.pad(array, ((0, 0), (0, buckets_amount * bucket_size - n_times)), mode='edge')
+        buckets = padded.reshape(channels, buckets_amount, bucket_size)
+
+        return np.stack([buckets.min(axis=-1), buckets.max(axis=-1)], axis=-1).astype(np.float32)
+
+    @staticmethod
+    def _reduce(level: np.ndarray, factor: int) -> np.ndarray:
+        channels, buckets_amount, _ = level.shape
+        new_buckets_amount = -(-buckets_amount // factor)
+
+        padded = np.pad(level, ((0, 0), (0, new_buckets_amount * factor - buckets_amount), (0, 0)),
+                        mode='edge')
+        groups = padded.reshape(channels, new_buckets_amount, factor, 2)
+
+        return np.stack([groups[..., 0].min(axis=-1), groups[..., 1].max(axis=-1)], axis=-1)
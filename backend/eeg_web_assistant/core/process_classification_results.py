@@ -1,5 +1,5 @@
 from math import ceil, floor
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import plotly.graph_objects as go
@@ -9,14 +9,16 @@ from eeg_web_assistant import settings
 
 class ClassificationResults:
     def __init__(self,
-                 raw_array: np.ndarray,
+                 raw_array: Optional[np.ndarray],
                  proba_mean: List[float],
                  proba_std: List[float],
                  segment_cuts: List[Tuple[int, int]],
                  ch_names: List[str], sfreq: float,
+                 samples_used: Optional[List[int]] = None,
                  config=settings.PlotConfig()):
         assert len(proba_mean) == len(proba_std) == len(segment_cuts)
-        assert raw_array.shape[0] == len(ch_names)
+        assert samples_used is None or len(samples_used) == len(segment_cuts)
+        assert raw_array is None or raw_array.shape[0] == len(ch_names)
 
         self.raw_array = raw_array
         self.proba_mean = proba_mean
@@ -24,6 +26,7 @@ class ClassificationResults:
         self.segment_cuts = segment_cuts
         self.ch_names = ch_names
         self.sfreq = sfreq
+        self.samples_used = samples_used
         self.config = config
 
     def process(self) -> List[Dict]:
@@ -35,6 +38,7 @@ class ClassificationResults:
             segment = self._prepare_segment(nr=nr,
                                             prob=self.proba_mean[nr],
                                             std=self.proba_std[nr],
+                                            samples=self._get_samples_used(nr),
                                             start_x=start,
                                             stop_x=stop)
 
@@ -42,7 +46,14 @@ class ClassificationResults:
             classified_segments.append(segment)
         return classified_segments
 
-    def _prepare_segment(self, nr: int, prob: float, std: float, start_x: int, stop_x: int) -> Dict:
+    def _get_samples_used(self, nr: int) -> Optional[int]:
+        if self.samples_used is None:
+            return None
+
+        return int(self.samples_used[nr])
+
+    def _prepare_segment(self, nr: int, prob: float, std: float, start_x: int, stop_x: int,
+                         samples: Optional[int] = None) -> Dict:
         start_time = floor(start_x / self.sfreq)
         stop_time = ceil(stop_x / self.sfreq)
 
@@ -53,6 +64,9 @@ class ClassificationResults:
             'start_time': start_time,
             'stop_time': stop_time
         }
+        if samples is not None:
+            segment['samples'] = samples
+
         return segment
 
     def _get_plot_img(self, plot_array: np.ndarray, start_time: int):
@@ -0,0 +1,108 @@
+from math import ceil
+from typing import BinaryIO, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from eeg_web_assistant.core.edf_reader import SAMPLE_DTYPE, EdfReader
+from eeg_web_assistant.services.logging import Logging
+
+logger = Logging.get(__name__)
+
+
+def write_signal_blocks(reader: EdfReader, file: BinaryIO, compress: Callable[[bytes], bytes],
+                        block_seconds: float, picks: Optional[Sequence[int]] = None) -> Dict:
+    # decoded signal of the picked channels split into blocks of block_seconds, every block holds
+    # int16 digital samples compressed on its own, so a time range is read without the rest
+    picks = list(range(len(reader.ch_names)) if picks is None else picks)
+    block_n_times = int(block_seconds * reader.sampling_frequency)
+    block_offsets = [0]
+
+    for start in range(0, reader.n_times, block_n_times):
+        digital = reader.read_digital(picks=picks, start=start, stop=start + block_n_times)
+        block = compress(digital.astype(SAMPLE_DTYPE, copy=False).tobytes())
+
+        file.write(block)
+        block_offsets.append(block_offsets[-1] + len(block))
+
+    logger.debug("Signal of %d channels stored in %d blocks of %d samples", len(picks),
+                 len(block_offsets) - 1, block_n_times)
+
+    return {'ch_names': [reader.ch_names[idx] for idx in picks],
+            'sfreq': reader.sampling_frequency,
+            'n_times': reader.n_times,
+            'highpass': reader.highpass,
+            'lowpass': reader.lowpass,
+            'gains': [reader.signals[idx].gain for idx in picks],
+            'offsets': [reader.signals[idx].offset for idx in picks],
+            'block_n_times': block_n_times,
+            'block_offsets': block_offsets}
+
+
+class SignalBlockReader:
+    # random access reader of stored signal blocks with the EdfReader reading interface, the file
+    # has to be seekable, e.g. a GridFS GridOut which fetches only the chunks read
+    def __init__(self, file: BinaryIO, info: Dict, decompress: Callable[[bytes], bytes]):
+        self.file = file
+        self.info = info
+        self._decompress = decompress
+
+        self._gains = np.array(info['gains'])
+        self._offsets = np.array(info['offsets'])
+        self._block_n_times = info['block_n_times']
+        self._block_offsets = info['block_offsets']
+
+    @property
+    def ch_names(self) -> List[str]:
+        return self.info['ch_names']
+
+    @property
+    def sampling_frequency(self) -> float:
+        return self.info['sfreq']
+
+    @property
+    def n_times(self) -> int:
+        return self.info['n_times']
+
+    @property
+    def highpass(self) -> float:
+        return self.info['highpass']
+
+    @property
+    def lowpass(self) -> float:
+        return self.info['lowpass']
+
+    def read(self, picks: Optional[Sequence[int]] = None, start: int = 0,
+             stop: Optional[int] = None, dtype=np.float64) -> np.ndarray:
+        picks = list(range(len(self.ch_names)) if picks is None else picks)
+        stop = self.n_times if stop is None else min(stop, self.n_times)
+
+        if not 0 <= start <= stop:
+            raise ValueError(f"Wrong samples range to read: {start}-{stop}")
+
+        data = np.empty((len(picks), stop - start), dtype=dtype)
+        if stop == start:
+            return data
+
+        # blocks overlapping the range are stored one after another and read at once
+        first_block = start // self._block_n_times
+        last_block = ceil(stop / self._block_n_times)
+        self.file.seek(self._block_offsets[first_block])
+        buffer = self.file.read(self._block_offsets[last_block] - self._block_offsets[first_block])
+
+        gains, offsets = self._gains[picks, np.newaxis], self._offsets[picks, np.newaxis]
+        for block in range(first_block, last_block):
+            begin = self._block_offsets[block] - self._block_offsets[first_block]
+            end = self._block_offsets[block + 1] - self._block_offsets[first_block]
+            digital = np.frombuffer(self._decompress(buffer[begin:end]), dtype=SAMPLE_DTYPE)
+            digital = digital.reshape(len(self.ch_names), -1)
+
+            block_start = block * self._block_n_times
+            range_start = max(start, block_start)
+            range_stop = min(stop, block_start + digital.shape[1])
+
+            window = data[:, range_start - start:range_stop - start]
+            np.multiply(digital[picks, range_start - block_start:range_stop - block_start], gains,
+                        out=window)
+            window += offsets
+
+        return data
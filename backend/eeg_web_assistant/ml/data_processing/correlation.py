@@ -0,0 +1,36 @@
+import numpy as np
+
+
+def average_rank(array: np.ndarray) -> np.ndarray:
+    # 1-based ranks along the last axis, tied values get the average of their ranks
+    n_times = array.shape[-1]
+    flat = array.reshape(-1, n_times)
+
+    sorter = np.argsort(flat, axis=-1, kind='mergesort')
+    sorted_values = np.take_along_axis(flat, sorter, axis=-1)
+
+    # boundaries of runs of equal values in the sorted rows
+    group_start = np.ones(flat.shape, dtype=bool)
+    group_start[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    group_end = np.ones(flat.shape, dtype=bool)
+    group_end[:, :-1] = group_start[:, 1:]
+
+    positions = np.arange(n_times)
+    first = np.maximum.accumulate(np.where(group_start, positions, 0), axis=-1)
+    last = np.minimum.accumulate(np.where(group_end, positions, n_times - 1)[:, ::-1],
+                                 axis=-1)[:, ::-1]
+
+    ranks = np.empty(flat.shape, dtype=np.float64)
+    np.put_along_axis(ranks, sorter, (first + last) / 2 + 1, axis=-1)
+
+    return ranks.reshape(array.shape)
+
+
+def spearman_correlation(frames: np.ndarray) -> np.ndarray:
+    # (..., channels, samples) stack of frames -> (..., channels, channels) correlation matrices,
+    # computed as Pearson correlation of the ranks for all frames with one matrix product
+    ranks = average_rank(frames)
+    ranks -= ranks.mean(axis=-1, keepdims=True)
+    ranks /= np.linalg.norm(ranks, axis=-1, keepdims=True)
+
+    return np.matmul(ranks, np.swapaxes(ranks, -1, -2))
@@ -1,4 +1,7 @@
-from typing import Tuple
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -6,17 +9,36 @@ from scipy.integrate import simps
 from scipy.stats import kurtosis, skew
 from yasa import bandpower
 
+from eeg_web_assistant import settings
+from eeg_web_assistant.ml.data_processing.correlation import spearman_correlation
+from eeg_web_assistant.ml.data_processing.spectral import relative_bandpower
 from eeg_web_assistant.services.logging import Logging
 
 logger = Logging.get(__name__)
 
+_POOL = None
+_POOL_WORKERS = 0
+
 
 class FeatureExtractor:
+    CORRELATION_METHODS = ('rank', 'pandas')
+    # extracted features in output order, stored features are keyed by it
+    FEATURES = ('spearman_correlation', 'mean', 'variance', 'skewness', 'kurtosis',
+                'zero_crossing_count', 'absolute_area_under_signal', 'peak_to_peak',
+                'relative_bandpower')
+
     def __init__(self, array: np.ndarray, sfreq: float,
-                 bands: Tuple = ('Delta', 'Theta', 'Alpha', 'Beta')):
+                 bands: Tuple = ('Delta', 'Theta', 'Alpha', 'Beta'), batched: bool = True,
+                 correlation_method: str = 'rank', workers: Optional[int] = None):
+        if correlation_method not in self.CORRELATION_METHODS:
+            raise ValueError(f"Unsupported correlation method: {correlation_method}")
+
         self.array = array
         self.sfreq = sfreq
         self.bands = bands
+        self.batched = batched
+        self.correlation_method = correlation_method
+        self.workers = workers or settings.FeatureExtractionConfig.WORKERS
 
     def extract(self) -> np.ndarray:
         assert self.array.ndim == 4
@@ -24,6 +46,75 @@ class FeatureExtractor:
         logger.info("Calculating data features...")
         logger.debug("Shape of input data: %s", self.array.shape)
 
+        if self.batched and self._can_run_parallel():
+            all_features = self._extract_parallel()
+        elif self.batched:
+            all_features = self._extract_batched()
+        else:
+            all_features = self._extract_per_frame()
+
+        assert all_features.shape[:-1] == self.array.shape[:-1]
+
+        logger.debug("Shape of extracted features array: %s", all_features.shape)
+
+        return all_features
+
+    def _extract_batched(self) -> np.ndarray:
+        # all features are computed along the trailing (samples) axis of the whole
+        # (segments, frames, channels, samples) array at once
+        array = self.array
+
+        features = [self._spearman_correlation_batch(array),
+                    self._mean(array)[..., np.newaxis],
+                    self._variance(array)[..., np.newaxis],
+                    self._skewness(array)[..., np.newaxis],
+                    self._kurtosis(array)[..., np.newaxis],
+                    self._zero_crossing_count(array)[..., np.newaxis],
+                    self._absolute_area_under_signal(array)[..., np.newaxis],
+                    self._peak_to_peak(array)[..., np.newaxis],
+                    self._bandpower_batch(array)]
+
+        return np.concatenate(features, axis=-1)
+
+    def _extract_parallel(self) -> np.ndarray:
+        # segments are sharded in contiguous chunks across the pool, the input is copied once to
+        # shared memory so frames are not pickled, chunk results are joined in segments order
+        segments_amount = self.array.shape[0]
+        chunks = np.array_split(np.arange(segments_amount), min(self.workers, segments_amount))
+
+        logger.debug("Extracting features of %d segments in %d processes", segments_amount,
+                     len(chunks))
+
+        shared = shared_memory.SharedMemory(create=True, size=self.array.nbytes)
+        try:
+            shared_array = np.ndarray(self.array.shape, dtype=self.array.dtype, buffer=shared.buf)
+            shared_array[...] = self.array
+            del shared_array
+
+            pool = _get_pool(workers=self.workers)
+            futures = [pool.submit(_extract_shared_segments, shared.name, self.array.shape,
+                                   self.array.dtype.str, chunk[0], chunk[-1] + 1, self.sfreq,
+                                   self.bands, self.correlation_method)
+                       for chunk in chunks]
+
+            return np.concatenate([future.result() for future in futures])
+        finally:
+            shared.close()
+            shared.unlink()
+
+    def _can_run_parallel(self) -> bool:
+        if self.workers < 2 or self.array.shape[0] < 2:
+            return False
+
+        # daemonic processes, e.g. celery prefork pool workers, cannot start child processes
+        if multiprocessing.current_process().daemon:
+            logger.warning("Features extracted in a single process, %s is daemonic",
+                           multiprocessing.current_process().name)
+            return False
+
+        return True
+
+    def _extract_per_frame(self) -> np.ndarray:
         extracted_features_per_segment = []
         for segment in self.array:
             extracted_features_per_frame = []
@@ -44,18 +135,16 @@ class FeatureExtractor:
 
             extracted_features_per_segment.append(extracted_features_per_frame)
 
-        all_features = np.array(extracted_features_per_segment)
-        assert all_features.shape[:-1] == self.array.shape[:-1]
-
-        logger.debug("Shape of extracted features array: %s", all_features.shape)
-
-        return all_features
+        return np.array(extracted_features_per_segment)
 
     def _bandpower(self, array: np.ndarray) -> np.ndarray:
         df = bandpower(array, sf=self.sfreq)
         df = df.loc[:, self.bands]
         return df.to_numpy()
 
+    def _bandpower_batch(self, array: np.ndarray) -> np.ndarray:
+        return relative_bandpower(array, sfreq=self.sfreq, bands=self.bands)
+
     @staticmethod
     def _spearman_correlation(array: np.ndarray) -> np.ndarray:
         assert array.ndim == 2
@@ -63,31 +152,71 @@ class FeatureExtractor:
         df = pd.DataFrame(data=array.T)
         return df.corr(method='spearman').to_numpy()
 
+    def _spearman_correlation_batch(self, array: np.ndarray) -> np.ndarray:
+        if self.correlation_method == 'rank':
+            return spearman_correlation(array)
+
+        frames = array.reshape(-1, *array.shape[-2:])
+        correlations = np.array([self._spearman_correlation(frame) for frame in frames])
+        return correlations.reshape(*array.shape[:-1], array.shape[-2])
+
     @staticmethod
     def _mean(array: np.ndarray) -> np.ndarray:
-        return np.mean(array, axis=1)
+        return np.mean(array, axis=-1)
 
     @staticmethod
     def _variance(array: np.ndarray) -> np.ndarray:
         # unbiased estimator (ddof = 1)
-        return np.var(array, axis=1, ddof=1)
+        return np.var(array, axis=-1, ddof=1)
 
     @staticmethod
     def _skewness(array: np.ndarray) -> np.ndarray:
-        return skew(array, axis=1, bias=False, nan_policy='omit')
+        return skew(array, axis=-1, bias=False, nan_policy='omit')
 
     @staticmethod
     def _kurtosis(array: np.ndarray) -> np.ndarray:
-        return kurtosis(array, axis=1, bias=False, nan_policy='omit')
+        return kurtosis(array, axis=-1, bias=False, nan_policy='omit')
 
     @staticmethod
     def _zero_crossing_count(array: np.ndarray) -> np.ndarray:
-        return np.count_nonzero(np.diff(np.sign(array)), axis=1)
+        return np.count_nonzero(np.diff(np.sign(array), axis=-1), axis=-1)
 
     @staticmethod
     def _absolute_area_under_signal(array: np.ndarray) -> np.ndarray:
-        return simps(np.abs(array), dx=1e-6, axis=1)
+        return simps(np.abs(array), dx=1e-6, axis=-1)
 
     @staticmethod
     def _peak_to_peak(array: np.ndarray) -> np.ndarray:
-        return np.max(array, axis=1) - np.min(array, axis=1)
+        return np.max(array, axis=-1) - np.min(array, axis=-1)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    # pool is kept between extractions, e.g. of the next blocks of the same recording
+    global _POOL, _POOL_WORKERS
+
+    if _POOL is None or _POOL_WORKERS != workers:
+        if _POOL is not None:
+            _POOL.shutdown()
+        _POOL, _POOL_WORKERS = ProcessPoolExecutor(max_workers=workers), workers
+
+    return _POOL
+
+
+def _extract_shared_segments(name: str, shape: Tuple[int, ...], dtype: str, start: int, stop: int,
+                             sfreq: float, bands: Tuple, correlation_method: str) -> np.ndarray:
+    shared = shared_memory.SharedMemory(name=name)
+    try:
+        return _extract_segments(shared.buf, shape=shape, dtype=dtype, start=start, stop=stop,
+                                 sfreq=sfreq, bands=bands, correlation_method=correlation_method)
+    finally:
+        shared.close()
+
+
+def _extract_segments(buffer: memoryview, shape: Tuple[int, ...], dtype: str, start: int,
+                      stop: int, sfreq: float, bands: Tuple, correlation_method: str) -> np.ndarray:
+    # all views of the shared buffer are released on return, before it is closed
+    array = np.ndarray(shape, dtype=dtype, buffer=buffer)[start:stop]
+    feature_extractor = FeatureExtractor(array=array, sfreq=sfreq, bands=bands,
+                                         correlation_method=correlation_method, workers=1)
+
+    return feature_extractor._extract_batched()
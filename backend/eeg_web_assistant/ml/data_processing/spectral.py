@@ -0,0 +1,64 @@
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+from scipy.integrate import simps
+from scipy.signal import welch
+
+# yasa.bandpower defaults, relative power is computed over the range of all the bands
+BANDS = (
+    (0.5, 4, 'Delta'),
+    (4, 8, 'Theta'),
+    (8, 12, 'Alpha'),
+    (12, 16, 'Sigma'),
+    (16, 30, 'Beta'),
+    (30, 40, 'Gamma'),
+)
+WELCH_WIN_SECONDS = 4
+WELCH_KWARGS = {'average': 'median', 'window': 'hamming'}
+
+
+def relative_bandpower(array: np.ndarray, sfreq: float,
+                       bands: Tuple[str, ...] = ('Delta', 'Theta', 'Alpha', 'Beta')) -> np.ndarray:
+    # (..., samples) array -> (..., bands) relative power, one Welch PSD for the whole array
+    nperseg, total_mask, band_masks, resolution = _frequency_masks(sfreq=float(sfreq),
+                                                                   n_times=array.shape[-1],
+                                                                   bands=tuple(bands))
+
+    _, psd = welch(array, sfreq, nperseg=nperseg, axis=-1, **WELCH_KWARGS)
+    psd = psd[..., total_mask]
+
+    total_power = simps(psd, dx=resolution, axis=-1)
+
+    band_power = np.empty((*array.shape[:-1], len(band_masks)), dtype=np.float64)
+    for i, band_mask in enumerate(band_masks):
+        band_power[..., i] = simps(psd[..., band_mask], dx=resolution, axis=-1)
+
+    band_power /= total_power[..., np.newaxis]
+
+    return band_power
+
+
+@lru_cache(maxsize=16)
+def _frequency_masks(sfreq: float, n_times: int, bands: Tuple[str, ...]) \
+        -> Tuple[int, np.ndarray, Tuple[np.ndarray, ...], float]:
+    # frequency masks depend only on the frame length, so they are shared by all the frames
+    band_ranges = {name: (low, high) for low, high, name in BANDS}
+    unknown_bands = set(bands).difference(band_ranges)
+    if unknown_bands:
+        raise ValueError(f"Unsupported frequency bands: {', '.join(sorted(unknown_bands))}")
+
+    nperseg = min(int(WELCH_WIN_SECONDS * sfreq), n_times)
+    freqs = np.fft.rfftfreq(nperseg, d=1. / sfreq)
+
+    all_ranges = [edge for low, high, _ in BANDS for edge in (low, high)]
+    total_mask = np.logical_and(freqs >= min(all_ranges), freqs <= max(all_ranges))
+    freqs = freqs[total_mask]
+    resolution = freqs[1] - freqs[0]
+
+    band_masks = tuple(
+        np.logical_and(freqs >= band_ranges[name][0], freqs <= band_ranges[name][1])
+        for name in bands
+    )
+
+    return nperseg, total_mask, band_masks, resolution
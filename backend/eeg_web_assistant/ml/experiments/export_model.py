@@ -0,0 +1,81 @@
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import tensorflow as tf
+
+from eeg_web_assistant import settings
+from eeg_web_assistant.ml.models.exported import (SAVED_MODEL_DIR, TFLITE_HEAD_FILE,
+                                                  get_tflite_encoder_file)
+from eeg_web_assistant.ml.models.insta_gat import InstaGAT
+from eeg_web_assistant.services.logging import Logging
+
+logger = Logging.get(__name__)
+
+
+class InstaGATInference(tf.Module):
+    # graph functions of a trained model with fixed input signatures, the encoder runs in
+    # inference mode, the head keeps dropout on for monte carlo sampling
+    def __init__(self, model: InstaGAT):
+        super(InstaGATInference, self).__init__(name='instaGAT_inference')
+
+        self.dims = tf.Variable(list(model.dims), dtype=tf.int32, trainable=False)
+        self.model_variables = list(model.variables)
+
+        self.encode = tf.function(
+            lambda inputs: model.encode(inputs, training=False),
+            input_signature=[tf.TensorSpec((None, *model.dims), dtype=tf.float32)])
+        self.sample_head = tf.function(
+            lambda embedding, n: model.sample_head(embedding, n=n, training=True),
+            input_signature=[tf.TensorSpec((None, model.hidden_units), dtype=tf.float32),
+                             tf.TensorSpec((), dtype=tf.int32)])
+        self.classify = tf.function(
+            lambda embedding: model.classifier(embedding),
+            input_signature=[tf.TensorSpec((None, model.hidden_units), dtype=tf.float32)])
+
+
+def export_saved_model(model: InstaGAT, path: Path):
+    # model has to be built, i.e. called once or with its weights restored
+    tf.saved_model.save(InstaGATInference(model), str(path / SAVED_MODEL_DIR))
+    logger.info("Model %s exported to SavedModel in %s", model.name, path)
+
+
+def export_tflite(model: InstaGAT, path: Path, quantization: Optional[str] = None,
+                  calibration_data: Optional[np.ndarray] = None, config=settings.ModelPredict):
+    # the encoder is converted with a fixed batch size, the dropout head is a single dense layer
+    # stored as plain arrays and sampled outside of the interpreter
+    encoder_file = get_tflite_encoder_file(quantization)
+    if quantization == 'int8' and calibration_data is None:
+        raise ValueError("Calibration data is required for int8 quantization")
+
+    encode = tf.function(lambda inputs: model.encode(inputs, training=False))
+    input_spec = tf.TensorSpec((config.TFLITE_BATCH_SIZE, *model.dims), dtype=tf.float32)
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions(
+        [encode.get_concrete_function(input_spec)])
+    # ops without a TF Lite builtin kernel run through the TensorFlow ops delegate
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS,
+                                           tf.lite.OpsSet.SELECT_TF_OPS]
+
+    if quantization is not None:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+
+    elif quantization == 'int8':
+        # activation ranges are calibrated on input batches of the exported size, ops without an
+        # int8 kernel stay in float, input and output of the encoder stay float32
+        converter.representative_dataset = lambda: (
+            [calibration_data[t:t + config.TFLITE_BATCH_SIZE].astype(np.float32)]
+            for t in range(0, len(calibration_data) - config.TFLITE_BATCH_SIZE + 1,
+                           config.TFLITE_BATCH_SIZE))
+
+    path.mkdir(parents=True, exist_ok=True)
+    (path / encoder_file).write_bytes(converter.convert())
+
+    kernel, bias = model.classifier.get_weights()
+    np.savez(str(path / TFLITE_HEAD_FILE), kernel=kernel, bias=bias, dropout=model.dropout)
+
+    logger.info("Model %s exported to TF Lite in %s with %s quantization", model.name,
+                path / encoder_file, quantization or 'no')
@@ -0,0 +1,101 @@
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from tensorflow.keras.metrics import CategoricalAccuracy, Precision, Recall
+from tensorflow.python.keras.utils.np_utils import to_categorical
+
+from eeg_web_assistant import settings
+from eeg_web_assistant.ml.experiments.export_model import export_tflite
+from eeg_web_assistant.ml.learning.metric_callbacks import F1Score
+from eeg_web_assistant.ml.models.exported import (TFLITE_QUANTIZATIONS, TFLiteInstaGAT,
+                                                  get_tflite_encoder_file)
+from eeg_web_assistant.ml.models.insta_gat import InstaGAT
+from eeg_web_assistant.ml.predictors.monte_carlo import predict_monte_carlo
+from eeg_web_assistant.services.logging import Logging
+
+logger = Logging.get(__name__)
+
+
+def sample_calibration_data(data: np.ndarray, config=settings.ModelQuantize,
+                            seed: Optional[int] = None) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    amount = min(config.CALIBRATION_SAMPLES, len(data))
+
+    return data[rng.choice(len(data), size=amount, replace=False)].astype(np.float32)
+
+
+def evaluate_model(model, x_test: np.ndarray, y_test: np.ndarray, class_amount: int,
+                   config=settings.ModelQuantize) -> Dict[str, float]:
+    # metrics of deterministic predictions, the same ones training reports, and throughput of
+    # the full monte carlo sampling used in classification tasks
+    monte_carlo = model.monte_carlo
+    try:
+        model.monte_carlo = False
+        y_pred = predict_monte_carlo(model, input_data=x_test, iterations=1)[0]
+
+        y_true = to_categorical(y_test, num_classes=class_amount)
+        metrics = [CategoricalAccuracy(name='accuracy')]
+        for nr in range(class_amount):
+            metrics.extend([Recall(class_id=nr, name=f'recall_{nr}'),
+                            Precision(class_id=nr, name=f'precision_{nr}'),
+                            F1Score(class_id=nr, name=f'f1score_{nr}')])
+
+        results = {}
+        for metric in metrics:
+            metric.update_state(y_true, y_pred)
+            results[metric.name] = float(metric.result().numpy())
+
+        model.monte_carlo = True
+        throughput_data = x_test[:config.THROUGHPUT_SAMPLES]
+        start = perf_counter()
+        predict_monte_carlo(model, input_data=throughput_data,
+                            iterations=settings.ModelPredict.MONTE_CARLO_ITERATIONS)
+        results['segments_per_second'] = len(throughput_data) / (perf_counter() - start)
+    finally:
+        model.monte_carlo = monte_carlo
+
+    return results
+
+
+def compare_quantizations(model: InstaGAT, export_path: Path, calibration_data: np.ndarray,
+                          x_test: np.ndarray, y_test: np.ndarray, class_amount: int,
+                          quantizations: Sequence[Optional[str]] = (None, *TFLITE_QUANTIZATIONS),
+                          config=settings.ModelPredict) -> List[Dict]:
+    # every quantized encoder is exported next to the float one and evaluated against the
+    # checkpoint model, deltas are relative to the checkpoint metrics
+    baseline = evaluate_model(model, x_test=x_test, y_test=y_test, class_amount=class_amount)
+    report = [{'model': 'checkpoint', 'size_bytes': None, **baseline}]
+
+    for quantization in quantizations:
+        export_tflite(model, path=export_path, quantization=quantization,
+                      calibration_data=calibration_data, config=config)
+        tflite_model, size_bytes = _load_tflite(export_path, quantization=quantization,
+                                                config=config)
+
+        results = evaluate_model(tflite_model, x_test=x_test, y_test=y_test,
+                                 class_amount=class_amount)
+        deltas = {f'{name}_delta': value - baseline[name] for name, value in results.items()
+                  if name != 'segments_per_second'}
+        deltas['speedup'] = results['segments_per_second'] / baseline['segments_per_second']
+
+        report.append({'model': f'tflite_{quantization or "float32"}', 'size_bytes': size_bytes,
+                       **results, **deltas})
+
+        logger.info("TF Lite %s: accuracy %.4f (%+.4f), %.1f segments/s (x%.2f)",
+                    quantization or 'float32', results['accuracy'], deltas['accuracy_delta'],
+                    results['segments_per_second'], deltas['speedup'])
+
+    return report
+
+
+def _load_tflite(export_path: Path, quantization: Optional[str],
+                 config) -> Tuple[TFLiteInstaGAT, int]:
+    class QuantizationConfig:
+        TFLITE_QUANTIZATION = quantization
+        TFLITE_THREADS = config.TFLITE_THREADS
+
+    size_bytes = (export_path / get_tflite_encoder_file(quantization)).stat().st_size
+
+    return TFLiteInstaGAT.load(export_path, config=QuantizationConfig), size_bytes
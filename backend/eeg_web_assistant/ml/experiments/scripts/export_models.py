@@ -0,0 +1,30 @@
+import json
+
+import numpy as np
+
+from eeg_web_assistant import settings
+from eeg_web_assistant.ml.experiments.export_model import export_saved_model, export_tflite
+from eeg_web_assistant.ml.models.exported import get_export_path
+from eeg_web_assistant.ml.models.insta_gat import InstaGAT
+
+# exports every checkpoint used in prediction, Model.load uses the artifacts with
+# ModelPredict.BACKEND set to 'saved_model' or 'tflite'
+CHECKPOINTS = [
+    (settings.ModelPredict.ABNORMAL_CONFIG, settings.ModelPredict.ABNORMAL_WEIGHTS),
+    (settings.ModelPredict.ARTIFACT_CONFIG, settings.ModelPredict.ARTIFACT_WEIGHTS),
+    (settings.ModelPredict.SEIZURE_CONFIG, settings.ModelPredict.SEIZURE_WEIGHTS),
+]
+
+for config_path, model_weights_path in CHECKPOINTS:
+    with config_path.open(mode='r') as f:
+        model_params = json.load(f)
+
+    model = InstaGAT(**model_params)
+    model.load_weights(model_weights_path)
+
+    # checkpoint weights of subclassed models are restored when their variables are created
+    model(np.zeros((1, *model.dims), dtype=np.float32))
+
+    export_path = get_export_path(model_weights_path)
+    export_saved_model(model, path=export_path)
+    export_tflite(model, path=export_path)
@@ -0,0 +1,49 @@
+import json
+
+import numpy as np
+
+from eeg_web_assistant import settings
+from eeg_web_assistant.ml.data_processing.io_utils import open_dataset
+from eeg_web_assistant.ml.experiments.quantization import (compare_quantizations,
+                                                           sample_calibration_data)
+from eeg_web_assistant.ml.models.exported import get_export_path
+from eeg_web_assistant.ml.models.insta_gat import InstaGAT
+from eeg_web_assistant.services.logging import Logging
+
+logger = Logging.get(__name__)
+
+# quantized TF Lite encoders of every classification type are exported next to the float one,
+# Model.load uses them with ModelPredict.BACKEND 'tflite' and ModelPredict.TFLITE_QUANTIZATION
+CHECKPOINTS = [
+    ('abnormal', settings.ModelPredict.ABNORMAL_CONFIG, settings.ModelPredict.ABNORMAL_WEIGHTS,
+     settings.DatasetConfig.ABNORMAL_TRAIN, settings.DatasetConfig.ABNORMAL_TEST),
+    ('artifact', settings.ModelPredict.ARTIFACT_CONFIG, settings.ModelPredict.ARTIFACT_WEIGHTS,
+     settings.DatasetConfig.ARTIFACT_TRAIN, settings.DatasetConfig.ARTIFACT_TEST),
+    ('seizure', settings.ModelPredict.SEIZURE_CONFIG, settings.ModelPredict.SEIZURE_WEIGHTS,
+     settings.DatasetConfig.SEIZURE_TRAIN, settings.DatasetConfig.SEIZURE_TEST),
+]
+
+for name, config_path, model_weights_path, train_path, test_path in CHECKPOINTS:
+    with config_path.open(mode='r') as f:
+        model_params = json.load(f)
+
+    model = InstaGAT(**model_params)
+    model.load_weights(model_weights_path)
+    model(np.zeros((1, *model.dims), dtype=np.float32))
+
+    x_train, _, _, _ = open_dataset(train_path)
+    calibration_data = sample_calibration_data(x_train)
+    del x_train
+
+    x_test, y_test, labels_encoder, _ = open_dataset(test_path)
+
+    export_path = get_export_path(model_weights_path)
+    report = compare_quantizations(model, export_path=export_path,
+                                   calibration_data=calibration_data,
+                                   x_test=x_test.astype(np.float32), y_test=y_test,
+                                   class_amount=len(labels_encoder))
+
+    with (export_path / settings.ModelQuantize.REPORT_FILE).open(mode='w') as f:
+        json.dump(report, f, indent=2)
+
+    logger.info("Quantization report of %s model saved in %s", name, export_path)
@@ -5,6 +5,7 @@ import tensorflow as tf
 
 from eeg_web_assistant import settings
 from eeg_web_assistant.core.classification_types import ClassificationType
+from eeg_web_assistant.ml.models.exported import SavedModelInstaGAT, TFLiteInstaGAT, get_export_path
 from eeg_web_assistant.ml.models.insta_gat import InstaGAT
 
 
@@ -49,8 +50,21 @@ class Model:
             raise ValueError(f"Unsupported model type: {name}")
 
     @staticmethod
-    def _get_model(config_path: Path, model_weights_path: Path,
-                   monte_carlo: bool = True) -> tf.keras.models.Model:
+    def _get_model(config_path: Path, model_weights_path: Path, monte_carlo: bool = True,
+                   config=settings.ModelPredict) -> tf.keras.models.Model:
+        # exported inference artifacts are looked up by the name of the checkpoint they were
+        # exported from, see ml/experiments/scripts/export_models.py
+        if config.BACKEND == 'saved_model':
+            return SavedModelInstaGAT.load(get_export_path(model_weights_path, config=config),
+                                           monte_carlo=monte_carlo)
+
+        if config.BACKEND == 'tflite':
+            return TFLiteInstaGAT.load(get_export_path(model_weights_path, config=config),
+                                       monte_carlo=monte_carlo, config=config)
+
+        if config.BACKEND != 'checkpoint':
+            raise ValueError(f"Unsupported model backend: {config.BACKEND}")
+
         with config_path.open(mode='r') as f:
             model_params = json.load(f)
 
@@ -0,0 +1,119 @@
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import tensorflow as tf
+
+from eeg_web_assistant import settings
+
+# files of an exported model inside its export directory
+SAVED_MODEL_DIR = 'saved_model'
+TFLITE_ENCODER_FILE = 'encoder.tflite'
+TFLITE_HEAD_FILE = 'head.npz'
+
+# post-training quantization of the TF Lite encoder: float16 weights, int8 weights with float
+# activations, int8 weights and activations calibrated on training data
+TFLITE_QUANTIZATIONS = ('float16', 'dynamic_int8', 'int8')
+
+
+def get_export_path(model_weights_path: Path, config=settings.ModelPredict) -> Path:
+    return config.EXPORT_DIR / model_weights_path.stem
+
+
+def get_tflite_encoder_file(quantization: Optional[str] = None) -> str:
+    if quantization is None:
+        return TFLITE_ENCODER_FILE
+
+    if quantization not in TFLITE_QUANTIZATIONS:
+        raise ValueError(f"Unsupported quantization: {quantization}")
+
+    return f'encoder_{quantization}.tflite'
+
+
+class SavedModelInstaGAT:
+    # InstaGAT inference artifact restored from a SavedModel with concrete encode and head
+    # functions, exposes the same encode() / sample_head() interface as the keras model
+    def __init__(self, module: tf.Module, monte_carlo: bool = True):
+        self.module = module
+        self.monte_carlo = monte_carlo
+        self.dims = tuple(int(dim) for dim in module.dims.numpy())
+
+    @classmethod
+    def load(cls, path: Path, monte_carlo: bool = True) -> 'SavedModelInstaGAT':
+        return cls(tf.saved_model.load(str(path / SAVED_MODEL_DIR)), monte_carlo=monte_carlo)
+
+    def encode(self, inputs: tf.Tensor, training: Optional[bool] = None) -> tf.Tensor:
+        return self.module.encode(tf.cast(inputs, tf.float32))
+
+    def sample_head(self, embedding: tf.Tensor, n: int,
+                    training: Optional[bool] = None) -> tf.Tensor:
+        if self.monte_carlo or training:
+            return self.module.sample_head(embedding, tf.constant(n, dtype=tf.int32))
+
+        return tf.tile(tf.expand_dims(self.module.classify(embedding), axis=0), [n, 1, 1])
+
+
+class TFLiteInstaGAT:
+    # InstaGAT inference artifact with the encoder run by the TF Lite interpreter on fixed size
+    # batches and the dropout head, a single dense layer, sampled in numpy
+    def __init__(self, interpreter: tf.lite.Interpreter, kernel: np.ndarray, bias: np.ndarray,
+                 dropout: float, monte_carlo: bool = True):
+        self.interpreter = interpreter
+        self.kernel = kernel
+        self.bias = bias
+        self.dropout = dropout
+        self.monte_carlo = monte_carlo
+
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.batch_size, *dims = self._input['shape']
+        self.dims = tuple(int(dim) for dim in dims)
+
+        self._rng = np.random.default_rng()
+
+    @classmethod
+    def load(cls, path: Path, monte_carlo: bool = True,
+             config=settings.ModelPredict) -> 'TFLiteInstaGAT':
+        encoder_file = get_tflite_encoder_file(config.TFLITE_QUANTIZATION)
+        interpreter = tf.lite.Interpreter(model_path=str(path / encoder_file),
+                                          num_threads=config.TFLITE_THREADS)
+
+        with np.load(str(path / TFLITE_HEAD_FILE)) as head:
+            return cls(interpreter, kernel=head['kernel'], bias=head['bias'],
+                       dropout=float(head['dropout']), monte_carlo=monte_carlo)
+
+    def encode(self, inputs: tf.Tensor, training: Optional[bool] = None) -> tf.Tensor:
+        inputs = np.asarray(inputs, dtype=np.float32)
+        samples_amount = inputs.shape[0]
+
+        outputs = []
+        for begin in range(0, samples_amount, self.batch_size):
+            batch = inputs[begin:begin + self.batch_size]
+            rows = batch.shape[0]
+            if rows < self.batch_size:
+                batch = np.concatenate([batch, np.zeros((self.batch_size - rows, *self.dims),
+                                                        dtype=np.float32)])
+
+            self.interpreter.set_tensor(self._input['index'], batch)
+            self.interpreter.invoke()
+            outputs.append(self.interpreter.get_tensor(self._output['index'])[:rows])
+
+        return tf.convert_to_tensor(np.concatenate(outputs))
+
+    def sample_head(self, embedding: tf.Tensor, n: int,
+                    training: Optional[bool] = None) -> tf.Tensor:
+        embedding = np.asarray(embedding, dtype=np.float32)
+        x = np.broadcast_to(embedding, (n, *embedding.shape))
+
+        if (self.monte_carlo or training) and self.dropout > 0:
+            # inverted dropout as in keras, kept units are scaled by 1 / (1 - rate)
+            keep = self._rng.random(x.shape) >= self.dropout
+            x = x * keep / np.float32(1. - self.dropout)
+
+        return tf.convert_to_tensor(self._softmax(x @ self.kernel + self.bias))
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        return exp / exp.sum(axis=-1, keepdims=True)
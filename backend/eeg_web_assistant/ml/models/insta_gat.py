@@ -46,17 +46,31 @@ class InstaGAT(tf.keras.Model):
         self.classifier = tf.keras.layers.Dense(class_num, activation='softmax')
 
     def call(self, inputs: tf.Tensor, training: Optional[bool] = None, **kwargs):
+        x = self.encode(inputs, training=training)
+        x = self.dropout_layer(x, training=self.monte_carlo or training)
+
+        return self.classifier(x)
+
+    def encode(self, inputs: tf.Tensor, training: Optional[bool] = None) -> tf.Tensor:
+        # deterministic part of the model in inference, (samples, hidden_units) LSTM embedding
         layers = []
         for frame in range(self.frames):
             feature_matrix = getattr(self, f'feature_matrix_{frame}')(inputs)
             correlation_matrix = getattr(self, f'correlation_matrix_{frame}')(inputs)
-            graph = getattr(self, f'graph_{frame}')([feature_matrix, correlation_matrix])
+            graph = getattr(self, f'graph_{frame}')([feature_matrix, correlation_matrix],
+                                                    training=training)
             flatten = getattr(self, f'flatten_{frame}')(graph)
             layers.append(flatten)
 
         x = self.concatenate(layers)
         x = self.reshape(x)
-        x = self.lstm(x)
+
+        return self.lstm(x, training=training)
+
+    def sample_head(self, embedding: tf.Tensor, n: int,
+                    training: Optional[bool] = None) -> tf.Tensor:
+        # n dropout samples of the classifier over the embedding, (n, samples, class_num)
+        x = tf.tile(tf.expand_dims(embedding, axis=0), [n, 1, 1])
         x = self.dropout_layer(x, training=self.monte_carlo or training)
 
         return self.classifier(x)
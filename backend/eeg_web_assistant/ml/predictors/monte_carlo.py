@@ -0,0 +1,132 @@
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+
+from eeg_web_assistant import settings
+from eeg_web_assistant.services.logging import Logging
+
+logger = Logging.get(__name__)
+
+
+def predict_monte_carlo(model: tf.keras.Model, input_data: np.ndarray, iterations: int,
+                        training: Optional[bool] = None,
+                        config=settings.ModelPredict) -> np.ndarray:
+    # (samples, ...) input -> (iterations, samples, classes) dropout samples of the predictions,
+    # input rows are tiled across the iterations and run in as few forward passes as the memory
+    # budget allows, every tiled row gets its own dropout mask as in separate predict calls;
+    # models split into encode() and sample_head() sample only their stochastic head instead
+    if hasattr(model, 'encode') and hasattr(model, 'sample_head'):
+        return _predict_split_model(model, input_data=input_data, iterations=iterations,
+                                    config=config)
+
+    if training is None:
+        # models with a monte carlo flag keep dropout on in inference mode, other layers with
+        # dropout (e.g. graph attention) stay off then, other models need the training mode
+        training = not getattr(model, 'monte_carlo', False)
+
+    samples_amount = input_data.shape[0]
+    total_rows = iterations * samples_amount
+    rows_per_pass = _get_rows_per_pass(input_data=input_data, total_rows=total_rows,
+                                       config=config)
+
+    logger.debug("Monte carlo prediction of %d iterations over %d samples in %d passes",
+                 iterations, samples_amount, -(-total_rows // rows_per_pass))
+
+    outputs = []
+    for begin in range(0, total_rows, rows_per_pass):
+        # row r of the tiled input is sample r % samples_amount of iteration r // samples_amount
+        rows = np.arange(begin, min(begin + rows_per_pass, total_rows)) % samples_amount
+        batch = input_data[rows]
+
+        if training:
+            outputs.append(model(batch, training=True).numpy())
+        else:
+            outputs.append(model.predict_on_batch(batch))
+
+    return np.concatenate(outputs).reshape(iterations, samples_amount, -1)
+
+
+def predict_proba_adaptive(model: tf.keras.Model, input_data: np.ndarray, class_id: int = 1,
+                           config=settings.ModelPredict) \
+        -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # class probability mean, std and amount of monte carlo samples used per sample, drawn in
+    # blocks until both estimates of a sample change less than the tolerance or the iterations
+    # cap is reached, all the still active samples have the same amount drawn
+    samples_amount = input_data.shape[0]
+    block = config.MONTE_CARLO_BLOCK_ITERATIONS
+    tolerance = config.MONTE_CARLO_TOLERANCE
+
+    sample_block = _get_block_sampler(model, input_data=input_data, config=config)
+
+    probs_sum = np.zeros(samples_amount)
+    probs_square_sum = np.zeros(samples_amount)
+    samples_used = np.zeros(samples_amount, dtype=int)
+    mean, std = np.zeros(samples_amount), np.zeros(samples_amount)
+
+    active = np.arange(samples_amount)
+    while active.size:
+        iterations = min(block, config.MONTE_CARLO_ITERATIONS - samples_used[active[0]])
+        probs = sample_block(active, iterations)[..., class_id].astype(np.float64)
+
+        probs_sum[active] += probs.sum(axis=0)
+        probs_square_sum[active] += np.square(probs).sum(axis=0)
+        samples_used[active] += iterations
+
+        previous_mean, previous_std = mean[active], std[active]
+        mean[active] = probs_sum[active] / samples_used[active]
+        variance = probs_square_sum[active] / samples_used[active] - np.square(mean[active])
+        std[active] = np.sqrt(np.maximum(variance, 0.))
+
+        converged = np.logical_and(np.abs(mean[active] - previous_mean) < tolerance,
+                                   np.abs(std[active] - previous_std) < tolerance)
+        # estimates of the first block have nothing to be compared with
+        converged &= samples_used[active] > block
+        converged |= samples_used[active] >= config.MONTE_CARLO_ITERATIONS
+
+        active = active[~converged]
+
+    logger.debug("Adaptive monte carlo prediction used %d of %d samples", samples_used.sum(),
+                 samples_amount * config.MONTE_CARLO_ITERATIONS)
+
+    return mean, std, samples_used
+
+
+def _get_block_sampler(model: tf.keras.Model, input_data: np.ndarray,
+                       config) -> Callable[[np.ndarray, int], np.ndarray]:
+    # function drawing (iterations, samples, classes) predictions for the selected samples
+    if hasattr(model, 'encode') and hasattr(model, 'sample_head'):
+        embedding = _encode(model, input_data=input_data, config=config)
+        return lambda indices, iterations: model.sample_head(
+            tf.gather(embedding, indices), n=iterations).numpy()
+
+    return lambda indices, iterations: predict_monte_carlo(
+        model, input_data=input_data[indices], iterations=iterations, config=config)
+
+
+def _predict_split_model(model: tf.keras.Model, input_data: np.ndarray, iterations: int,
+                         config) -> np.ndarray:
+    # only the head after the embedding is stochastic, so the encoder runs once per sample
+    embedding = _encode(model, input_data=input_data, config=config)
+
+    logger.debug("Monte carlo prediction of %d head samples over %d embeddings",
+                 iterations, embedding.shape[0])
+
+    return model.sample_head(embedding, n=iterations).numpy()
+
+
+def _encode(model: tf.keras.Model, input_data: np.ndarray, config) -> tf.Tensor:
+    rows_per_pass = _get_rows_per_pass(input_data=input_data, total_rows=input_data.shape[0],
+                                       config=config)
+
+    return tf.concat([model.encode(tf.convert_to_tensor(input_data[t:t + rows_per_pass],
+                                                        dtype=tf.float32))
+                      for t in range(0, input_data.shape[0], rows_per_pass)], axis=0)
+
+
+def _get_rows_per_pass(input_data: np.ndarray, total_rows: int, config) -> int:
+    # forward pass memory is estimated as a multiple of the input row size
+    row_bytes = input_data[0].nbytes * config.MONTE_CARLO_ACTIVATION_FACTOR
+    budget_rows = int(config.MONTE_CARLO_MEMORY_BUDGET_MB * 2 ** 20 // row_bytes)
+
+    return max(1, min(budget_rows, total_rows))
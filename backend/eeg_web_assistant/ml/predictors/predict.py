@@ -1,41 +1,63 @@
-from typing import Optional
+from typing import Dict, Iterable, Optional
 
 import numpy as np
 
+from eeg_web_assistant import settings
 from eeg_web_assistant.core.classification_types import ClassificationType
 from eeg_web_assistant.ml.data_processing.eeg_features import FeatureExtractor
 from eeg_web_assistant.ml.models import Model
+from eeg_web_assistant.ml.predictors.monte_carlo import predict_monte_carlo, predict_proba_adaptive
+
+FEATURE_BANDS = ('Delta', 'Theta', 'Alpha', 'Beta')
 
 
 def predict_eeg_proba_per_segment(eeg_array: np.ndarray, classification_type: ClassificationType,
                                   sfreq: float):
     features = _extract_features(eeg_array=eeg_array, sfreq=sfreq)
 
-    probs_mean, probs_std = _predict_proba(features, class_type=classification_type, batch_size=32)
+    probs_mean, probs_std, samples_used = _predict_proba(features, class_type=classification_type)
+
+    return probs_mean, probs_std, samples_used
+
+
+def extract_eeg_blocks_features(eeg_blocks: Iterable[np.ndarray], sfreq: float) -> np.ndarray:
+    # features are small compared to the signal, so only they are kept for all the segments
+    return np.concatenate([_extract_features(eeg_array=eeg_array, sfreq=sfreq)
+                           for eeg_array in eeg_blocks])
+
+
+def predict_features_proba_per_segment(features: np.ndarray,
+                                       classification_type: ClassificationType):
+    # features extracted once can be classified by every model using the same channels
+    probs_mean, probs_std, samples_used = _predict_proba(features, class_type=classification_type)
+
+    return probs_mean, probs_std, samples_used
+
 
-    return probs_mean, probs_std
+def get_features_params() -> Dict:
+    # parameters of the extracted features, part of the stored features key
+    return {'features': FeatureExtractor.FEATURES, 'bands': FEATURE_BANDS}
 
 
 def _extract_features(eeg_array: np.ndarray, sfreq: float) -> np.ndarray:
-    feature_extractor = FeatureExtractor(array=eeg_array, sfreq=sfreq,
-                                         bands=('Delta', 'Theta', 'Alpha', 'Beta'))
+    feature_extractor = FeatureExtractor(array=eeg_array, sfreq=sfreq, bands=FEATURE_BANDS)
 
     return feature_extractor.extract()
 
 
-def _predict_proba(input_data: np.ndarray, class_type: ClassificationType, batch_size: int = 32,
-                   monte_carlo_iter: int = 100, class_id: int = 1):
+def _predict_proba(input_data: np.ndarray, class_type: ClassificationType,
+                   monte_carlo_iter: int = settings.ModelPredict.MONTE_CARLO_ITERATIONS,
+                   class_id: int = 1, adaptive: bool = settings.ModelPredict.MONTE_CARLO_ADAPTIVE):
     model = Model.load(class_type)
 
-    pred_probs = []
-    for i in range(monte_carlo_iter):
-        probs = model.predict(input_data, batch_size=batch_size)
-        probs = [prob[class_id] for prob in probs]
-        pred_probs.append(probs)
+    if adaptive:
+        return predict_proba_adaptive(model, input_data=input_data, class_id=class_id)
 
-    pred_probs = np.stack(pred_probs)
+    pred_probs = predict_monte_carlo(model, input_data=input_data, iterations=monte_carlo_iter)
+    pred_probs = pred_probs[..., class_id]
+    samples_used = np.full(input_data.shape[0], fill_value=monte_carlo_iter)
 
-    return pred_probs.mean(axis=0), pred_probs.std(axis=0)
+    return pred_probs.mean(axis=0), pred_probs.std(axis=0), samples_used
 
 
 def _predict_classes(probs: np.ndarray, variance: np.ndarray, prob_threshold: float = 0.5,
@@ -7,3 +7,12 @@ class RecordingPlot(BaseModel):
     ch_names: List[str]
     data_array: List[List[float]]
     sfreq: float
+
+
+class RecordingPlotRange(BaseModel):
+    ch_names: List[str]
+    start: float  # time of the first point in seconds
+    sfreq: float  # points per second
+    bucket_size: int  # samples merged into a point, 1 for raw samples
+    data_min: List[List[float]]
+    data_max: List[List[float]]
@@ -34,6 +34,7 @@ class ClassificationSegmentInDB(BaseModel):
     std: float
     start_time: int
     stop_time: int
+    samples: Optional[int]  # monte carlo samples drawn for the segment
 
 
 class ClassificationInfoInDB(BaseModel):
@@ -72,6 +73,9 @@ class RecordingDataInDB(DatabaseModel):
     notes: Optional[str]
     username: str
     raw_id: PyObjectId
+    raw_hash: Optional[str]  # sha256 of the raw EDF, address of its stored features
+    plot_pyramid_id: Optional[PyObjectId]
+    signal_blocks_id: Optional[PyObjectId]  # decoded signal for range reads, set after upload
     created: datetime
     recording_info: RecordingInfoInDB
     subject_info: Optional[SubjectInfoInDB]
@@ -1,5 +1,6 @@
 from eeg_web_assistant import settings
 from eeg_web_assistant.services.api import API
+from eeg_web_assistant.services.cache import Cache
 from eeg_web_assistant.services.database import Database
 from eeg_web_assistant.services.logging import Logging
 from eeg_web_assistant.services.worker import Worker
@@ -7,6 +8,7 @@ from eeg_web_assistant.services.worker import Worker
 logging = Logging.create(config=settings.LoggingConfig())
 worker = Worker.create(config=settings.WorkerConfig())
 database = Database.create(config=settings.DatabaseConfig())
+cache = Cache.create(config=settings.CacheConfig())
 api = API.create(config=settings.APIConfig())
 
 app = api.app
@@ -60,6 +60,46 @@ def enqueue_classification_for_task_id(recording_id: PyObjectId,
         return task.id
 
 
+@router.patch('/{recording_id}/types',
+              status_code=status.HTTP_202_ACCEPTED,
+              responses={status.HTTP_200_OK: {"model": ExceptionModel},
+                         status.HTTP_401_UNAUTHORIZED: {"model": ExceptionModel},
+                         status.HTTP_403_FORBIDDEN: {"model": ExceptionModel},
+                         status.HTTP_404_NOT_FOUND: {"model": ExceptionModel}})
+def enqueue_classifications(recording_id: PyObjectId,
+                            classification_types: List[ClassificationType] = Query(...),
+                            user: UserInDB = Depends(get_current_user),
+                            db: Database = Depends(Database),
+                            worker: Worker = Depends(Worker)):
+    logger.debug("Enqueue classification task of types {%s} for recording id {%s} called by "
+                 "user {%s}", classification_types, recording_id, user.username)
+
+    recording = RecordingDataInDB(**_get_recording(id_=recording_id, username=user.username, db=db))
+
+    classification = recording.classification or {}
+    missing_types = [class_type.value for class_type in dict.fromkeys(classification_types)
+                     if class_type.value not in classification]
+
+    if not missing_types:
+        json_segments = {class_type.value: jsonable_encoder(
+            classification[class_type.value].segments) for class_type in classification_types}
+        return JSONResponse(status_code=status.HTTP_200_OK, content=json_segments)
+
+    # already classified types are not repeated, the task result holds only the missing ones
+    try:
+        task = worker.classification.classify_recording_types.delay(
+            recording_id=str(recording_id),
+            raw_data_id=str(recording.raw_id),
+            classification_types=missing_types,
+            ch_names=recording.recording_info.ch_names,
+            sfreq=recording.recording_info.sfreq
+        )
+    except worker.classification.classify_recording_types.OperationalError as exc:
+        logger.exception("Sending classify task raised: %r", exc)
+    else:
+        return task.id
+
+
 @router.get('/{task_id}',
             response_model=TaskStatus,
             responses={status.HTTP_401_UNAUTHORIZED: {"model": ExceptionModel}})
@@ -71,7 +111,12 @@ def get_classification_status(task_id: str, user: UserInDB = Depends(get_current
     result = task.result
 
     if task.status == 'SUCCESS':
-        result = ClassificationInfoInDB(**task.result).segments
+        if 'type' in task.result:
+            result = ClassificationInfoInDB(**task.result).segments
+        else:
+            # multiple types task result is keyed by classification type
+            result = {class_type: ClassificationInfoInDB(**info).segments
+                      for class_type, info in task.result.items()}
 
     return TaskStatus(task_id=task_id, status=task.status, result=result)
 
@@ -1,31 +1,35 @@
-import pathlib
 from datetime import datetime
 from math import ceil, floor
-from tempfile import NamedTemporaryFile
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, Iterator, List, Optional
 
 import fastapi
 import numpy as np
 from bson import ObjectId
-from fastapi import APIRouter, Depends, File, Query, UploadFile, status
+from fastapi import (APIRouter, BackgroundTasks, Depends, File, Header, Query, Response, UploadFile,
+                     status)
 from pydantic import constr
 
 from eeg_web_assistant import settings
-from eeg_web_assistant.core.edf_file import EdfFile
-from eeg_web_assistant.models.plot import RecordingPlot
+from eeg_web_assistant.core.edf_file import EdfFile, EdfUploadProbe
+from eeg_web_assistant.core.features_key import get_raw_hasher
+from eeg_web_assistant.core.plot_pyramid import PlotPyramid
+from eeg_web_assistant.models.plot import RecordingPlot, RecordingPlotRange
 from eeg_web_assistant.models.recording import (RecordingDataInDB, RecordingDataListItemOut,
                                                 RecordingDataOut, RecordingInfoInDB, SortByQuery,
                                                 UpdateRecordingData, UpdateSubjectInfo)
 from eeg_web_assistant.models.user import UserInDB
+from eeg_web_assistant.services.cache import Cache
 from eeg_web_assistant.services.database import Database
 from eeg_web_assistant.services.logging import Logging
 from eeg_web_assistant.utils.bson import PyObjectId
 from eeg_web_assistant.utils.dict import get_dict_with_prefix_keys
 from eeg_web_assistant.utils.exceptions import (EdfDurationExceededError, EdfExtensionError,
                                                 EdfReadError, ExceptionModel,
-                                                PlotFragmentNrExceededError,
+                                                PlotFragmentNrExceededError, PlotRangeError,
                                                 RecordingForbiddenAccessError,
                                                 RecordingNotFoundError)
+from eeg_web_assistant.utils.plot_payload import (PLOT_BINARY_MEDIA_TYPE, encode_plot_payload,
+                                                  negotiate_binary_dtype)
 from eeg_web_assistant.utils.security import get_current_user
 
 logger = Logging.get(__name__)
@@ -91,7 +95,7 @@ def get_recording(id_: PyObjectId, user: UserInDB = Depends(get_current_user),
                           status.HTTP_403_FORBIDDEN: {'model': ExceptionModel},
                           status.HTTP_404_NOT_FOUND: {'model': ExceptionModel}})
 def delete_recording(id_: PyObjectId, user: UserInDB = Depends(get_current_user),
-                     db: Database = Depends(Database)):
+                     db: Database = Depends(Database), cache: Cache = Depends(Cache)):
     logger.debug("Delete recording with id {%s} called by user {%s}", id_, user.username)
 
     recording_by_id = db.recordings_data.find_one_by_id(id_=id_)
@@ -101,6 +105,15 @@ def delete_recording(id_: PyObjectId, user: UserInDB = Depends(get_current_user)
     deleted_recording = db.recordings_data.find_one_and_delete(id_=id_, username=user.username)
     if deleted_recording:
         db.recordings_raw.delete(deleted_recording.get('raw_id'))
+        if deleted_recording.get('plot_pyramid_id'):
+            db.recordings_pyramid.delete(deleted_recording.get('plot_pyramid_id'))
+        if deleted_recording.get('signal_blocks_id'):
+            db.signal_blocks.delete(deleted_recording.get('signal_blocks_id'))
+        # features are shared by all recordings of the same raw data, also of other users
+        raw_hash = deleted_recording.get('raw_hash')
+        if raw_hash and not db.recordings_data.count_by_raw_hash(raw_hash=raw_hash):
+            db.features.delete_by_raw_hash(raw_hash=raw_hash)
+        cache.plot_fragments.delete(str(id_))
     else:
         raise RecordingForbiddenAccessError()
 
@@ -110,7 +123,8 @@ def delete_recording(id_: PyObjectId, user: UserInDB = Depends(get_current_user)
 @router.post('',
              responses={status.HTTP_400_BAD_REQUEST: {'model': ExceptionModel},
                         status.HTTP_401_UNAUTHORIZED: {'model': ExceptionModel}})
-def create_recording(name: constr(max_length=30), new_file: UploadFile = File(...),
+def create_recording(name: constr(max_length=30), background_tasks: BackgroundTasks,
+                     new_file: UploadFile = File(...),
                      user: UserInDB = Depends(get_current_user),
                      db: Database = Depends(Database)):
     logger.debug("Create recording called by user {%s}", user.username)
@@ -118,36 +132,54 @@ def create_recording(name: constr(max_length=30), new_file: UploadFile = File(..
     if not new_file.filename.endswith('.edf'):
         raise EdfExtensionError()
 
-    edf_raw_bytes = new_file.file.read()
-    new_file.file.close()
-
-    with NamedTemporaryFile(suffix='.edf') as tf:
-        tf.write(edf_raw_bytes)
-        try:
-            edf_file = EdfFile(path=pathlib.Path(tf.name))
-        except ValueError:
-            raise EdfReadError()
+    # the upload is streamed into storage chunk by chunk, headers are validated on the first
+    # chunks and the data records are only counted and hashed
+    edf_probe = EdfUploadProbe()
+    raw_hasher = get_raw_hasher()
 
-    if ceil(edf_file.duration / 60) > settings.EdfFileConfig.MAX_DURATION_MINUTES:
+    try:
+        inserted_raw_id = db.recordings_raw.put_stream(
+            _read_upload_chunks(new_file.file, edf_probe=edf_probe, raw_hasher=raw_hasher)
+        )
+    except ValueError:
+        raise EdfReadError()
+    finally:
+        new_file.file.close()
+
+    try:
+        edf_metadata = edf_probe.get_metadata()
+    except ValueError:
+        db.recordings_raw.delete(inserted_raw_id)
+        raise EdfReadError()
+
+    if ceil(edf_metadata.duration / 60) > settings.EdfFileConfig.MAX_DURATION_MINUTES:
+        db.recordings_raw.delete(inserted_raw_id)
         raise EdfDurationExceededError()
 
-    inserted_raw_id = db.recordings_raw.put(edf_raw_bytes)
-
-    record_info = RecordingInfoInDB(meas_date=edf_file.measure_date, highpass=edf_file.highpass,
-                                    lowpass=edf_file.lowpass, sfreq=edf_file.sampling_frequency,
-                                    n_times=edf_file.n_times, ch_names=edf_file.channel_names)
+    record_info = RecordingInfoInDB(meas_date=edf_metadata.measure_date,
+                                    highpass=edf_metadata.highpass,
+                                    lowpass=edf_metadata.lowpass,
+                                    sfreq=edf_metadata.sampling_frequency,
+                                    n_times=edf_metadata.n_times,
+                                    ch_names=edf_metadata.ch_names)
 
     new_recording = RecordingDataInDB(name=name,
                                       username=user.username,
                                       created=datetime.utcnow(),
                                       recording_info=record_info.dict(exclude_unset=True),
-                                      raw_id=inserted_raw_id)
+                                      raw_id=inserted_raw_id,
+                                      raw_hash=raw_hasher.hexdigest())
 
-    if edf_file.subject_info:
-        new_recording.subject_info = edf_file.subject_info
+    if edf_metadata.subject_info:
+        new_recording.subject_info = edf_metadata.subject_info
 
     inserted_id = db.recordings_data.insert_one(new_recording.dict(exclude_unset=True))
 
+    # signal blocks and plot pyramid need the whole signal decoded, they are stored after the
+    # response is sent, requests before that read the raw EDF
+    background_tasks.add_task(_store_decoded_signal, recording_id=ObjectId(inserted_id),
+                              raw_id=inserted_raw_id, db=db)
+
     return inserted_id
 
 
@@ -200,16 +232,65 @@ def update_recording_subject_info(id_: PyObjectId,
         return str(updated_recording.get('_id'))
 
 
+@router.get('/{id_}/plot',
+            response_model=RecordingPlotRange,
+            responses={status.HTTP_400_BAD_REQUEST: {'model': ExceptionModel},
+                       status.HTTP_401_UNAUTHORIZED: {'model': ExceptionModel},
+                       status.HTTP_403_FORBIDDEN: {'model': ExceptionModel},
+                       status.HTTP_404_NOT_FOUND: {'model': ExceptionModel}})
+def get_plot_range(id_: PyObjectId,
+                   start: float = Query(0, ge=0, title='Range start in seconds'),
+                   stop: Optional[float] = Query(None, gt=0, title='Range stop in seconds'),
+                   width: int = Query(..., ge=1, le=settings.PlotConfig.MAX_PLOT_WIDTH,
+                                      title='Plot width in pixels'),
+                   user: UserInDB = Depends(get_current_user),
+                   db: Database = Depends(Database)):
+    logger.debug("Get plot range called by user {%s} for recording id={%s}, range=%s-%s, "
+                 "width=%d", user.username, id_, start, stop, width)
+
+    recording = RecordingDataInDB(**_get_recording(id_=id_, username=user.username, db=db))
+    sfreq = recording.recording_info.sfreq
+    n_times = recording.recording_info.n_times
+
+    start_idx = int(start * sfreq)
+    stop_idx = n_times if stop is None else min(int(stop * sfreq), n_times)
+    if start_idx >= stop_idx:
+        raise PlotRangeError()
+
+    pyramid = _get_plot_pyramid(recording=recording, db=db)
+    bucket_size = pyramid.select_bucket_size(start=start_idx, stop=stop_idx, width=width)
+
+    if bucket_size is None:
+        # zoomed in below the finest level, at most PYRAMID_BUCKET_SIZE samples per pixel
+        edf_file = _get_signal_file(recording=recording, db=db)
+        data_min = data_max = edf_file.to_numpy(start=start_idx, stop=stop_idx)
+        first_idx, bucket_size = start_idx, 1
+    else:
+        first_idx, level = pyramid.get_range(bucket_size=bucket_size, start=start_idx,
+                                             stop=stop_idx)
+        data_min, data_max = level[..., 0], level[..., 1]
+
+    return RecordingPlotRange(ch_names=recording.recording_info.ch_names,
+                              start=first_idx / sfreq,
+                              sfreq=sfreq / bucket_size,
+                              bucket_size=bucket_size,
+                              data_min=data_min.tolist(),
+                              data_max=data_max.tolist())
+
+
 @router.get('/{id_}/plot/{nr}',
             response_model=RecordingPlot,
-            responses={status.HTTP_400_BAD_REQUEST: {'model': ExceptionModel},
+            responses={status.HTTP_200_OK: {'content': {PLOT_BINARY_MEDIA_TYPE: {}}},
+                       status.HTTP_400_BAD_REQUEST: {'model': ExceptionModel},
                        status.HTTP_401_UNAUTHORIZED: {'model': ExceptionModel},
                        status.HTTP_403_FORBIDDEN: {'model': ExceptionModel},
                        status.HTTP_404_NOT_FOUND: {'model': ExceptionModel}})
 def get_plot_data(id_: PyObjectId,
                   nr: int = fastapi.Path(..., ge=0, title='Number of plot fragment to get'),
                   user: UserInDB = Depends(get_current_user),
-                  db: Database = Depends(Database)):
+                  db: Database = Depends(Database),
+                  cache: Cache = Depends(Cache),
+                  accept: Optional[str] = Header(None)):
     logger.debug("Get plot data called by user {%s} for recording id={%s}, plot_nr={%s}",
                  user.username, id_, nr)
 
@@ -220,27 +301,32 @@ def get_plot_data(id_: PyObjectId,
     if nr > max_fragment_nr:
         raise PlotFragmentNrExceededError()
 
-    raw_data = db.recordings_raw.get(recording.raw_id)
+    sfreq = min(recording.recording_info.sfreq, settings.PlotConfig.MAX_SAMPLING_FREQUENCY)
 
-    with NamedTemporaryFile(suffix='.edf') as tf:
-        tf.write(raw_data)
+    fragment_array = cache.plot_fragments.get((str(id_), nr, sfreq))
+    if fragment_array is None and recording.signal_blocks_id:
+        # only the signal blocks of the requested fragment are read
+        fragment_array = _read_plot_fragment(edf_file=_get_signal_file(recording=recording, db=db),
+                                             nr=nr, sfreq=sfreq)
+        cache.plot_fragments.put((str(id_), nr, sfreq), fragment_array)
+    elif fragment_array is None:
+        # decode the recording once and cache all its fragments for the following pages
+        fragments = _decode_plot_fragments(raw_data=db.recordings_raw.get(recording.raw_id),
+                                           sfreq=sfreq)
+        for fragment_nr, fragment in enumerate(fragments):
+            cache.plot_fragments.put((str(id_), fragment_nr, sfreq), fragment)
 
-        edf_file = EdfFile(path=pathlib.Path(tf.name))
-        if edf_file.sampling_frequency > settings.PlotConfig.MAX_SAMPLING_FREQUENCY:
-            edf_file.resample(new_sfreq=settings.PlotConfig.MAX_SAMPLING_FREQUENCY)
+        fragment_array = fragments[nr] if nr < len(fragments) else fragments[-1][:, :0]
 
-        edf_numpy = edf_file.to_numpy()
+    binary_dtype = negotiate_binary_dtype(accept)
+    if binary_dtype:
+        payload = encode_plot_payload(ch_names=recording.recording_info.ch_names,
+                                      array=fragment_array, sfreq=sfreq, dtype=binary_dtype)
+        return Response(content=payload, media_type=PLOT_BINARY_MEDIA_TYPE)
 
-    step = int(settings.PlotConfig.FRAGMENT_DURATION_SECONDS * edf_file.sampling_frequency)
-    begin_idx = int(nr * step)
-    end_idx = begin_idx + step
-
-    fragment_array = edf_numpy[:, begin_idx:end_idx]
-    fragment_array = fragment_array.astype(np.float16)
-
-    return RecordingPlot(ch_names=edf_file.channel_names,
-                         data_array=fragment_array.tolist(),
-                         sfreq=edf_file.sampling_frequency)
+    return RecordingPlot(ch_names=recording.recording_info.ch_names,
+                         data_array=fragment_array.astype(np.float16).tolist(),
+                         sfreq=sfreq)
 
 
 def _get_recording(id_: ObjectId, username: str, db: Database) -> Dict:
@@ -256,3 +342,110 @@ def _get_recording(id_: ObjectId, username: str, db: Database) -> Dict:
         raise RecordingForbiddenAccessError()
 
     return recording_by_id_and_username
+
+
+def _read_upload_chunks(file: BinaryIO, edf_probe: EdfUploadProbe,
+                        raw_hasher) -> Iterator[bytes]:
+    while True:
+        chunk = file.read(settings.EdfFileConfig.UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            return
+
+        edf_probe.update(chunk)
+        raw_hasher.update(chunk)
+
+        # too long recordings are rejected by their header before the rest is uploaded
+        declared_duration = edf_probe.header and edf_probe.header.declared_duration
+        if (declared_duration
+                and ceil(declared_duration / 60) > settings.EdfFileConfig.MAX_DURATION_MINUTES):
+            raise EdfDurationExceededError()
+
+        yield chunk
+
+
+def _build_plot_pyramid(edf_file: EdfFile) -> PlotPyramid:
+    # fragment long windows are a multiple of the finest bucket size for integer sfreq
+    windows = edf_file.iter_windows(window_seconds=settings.PlotConfig.FRAGMENT_DURATION_SECONDS)
+    return PlotPyramid.build(windows=windows, n_times=edf_file.n_times)
+
+
+def _get_plot_pyramid(recording: RecordingDataInDB, db: Database) -> PlotPyramid:
+    if recording.plot_pyramid_id:
+        return PlotPyramid.from_bytes(db.recordings_pyramid.get(recording.plot_pyramid_id))
+
+    # recordings uploaded before pyramids were introduced, or whose pyramid is still being
+    # built after upload, get theirs on the first request
+    logger.info("Building missing plot pyramid for recording id={%s}", recording.id)
+
+    return _store_plot_pyramid(recording_id=recording.id,
+                               edf_file=_get_signal_file(recording=recording, db=db), db=db)
+
+
+def _get_signal_file(recording: RecordingDataInDB, db: Database) -> EdfFile:
+    # stored signal blocks are read by time range, recordings without them decode the raw EDF,
+    # float32 precision is all the plots need
+    if recording.signal_blocks_id:
+        return EdfFile(blocks=db.signal_blocks.open(recording.signal_blocks_id), dtype=np.float32)
+
+    return EdfFile(buffer=db.recordings_raw.get(recording.raw_id), dtype=np.float32)
+
+
+def _store_decoded_signal(recording_id: ObjectId, raw_id: ObjectId, db: Database):
+    edf_file = EdfFile(buffer=db.recordings_raw.get(raw_id), dtype=np.float32)
+
+    try:
+        # excluded channels, e.g. low rate TUH IBI or BURSTS signals, are not stored
+        signal_blocks_id = db.signal_blocks.put(edf_file.reader, picks=edf_file.channel_indices)
+    except ValueError:
+        # e.g. EDF file shorter than declared, the raw EDF stays the only source
+        logger.warning("Signal blocks not stored for recording id={%s}", recording_id)
+    else:
+        updated_recording = db.recordings_data.find_one_by_id_and_update(
+            id_=recording_id, update_data={'signal_blocks_id': signal_blocks_id}
+        )
+        if not updated_recording:
+            # recording deleted while its signal was decoded
+            db.signal_blocks.delete(signal_blocks_id)
+            return
+
+    try:
+        _store_plot_pyramid(recording_id=recording_id, edf_file=edf_file, db=db)
+    except Exception as exc:
+        # the pyramid is built again on the first plot range request
+        logger.exception("Plot pyramid not stored for recording id={%s}: %r", recording_id, exc)
+
+
+def _store_plot_pyramid(recording_id: ObjectId, edf_file: EdfFile, db: Database) -> PlotPyramid:
+    pyramid = _build_plot_pyramid(edf_file)
+    pyramid_id = db.recordings_pyramid.put(pyramid.to_bytes())
+
+    updated_recording = db.recordings_data.find_one_by_id_and_update_unset(
+        id_=recording_id, update_data={'plot_pyramid_id': pyramid_id}
+    )
+    if not updated_recording:
+        # recording deleted while its pyramid was built, or a concurrent build stored its own
+        db.recordings_pyramid.delete(pyramid_id)
+
+    return pyramid
+
+
+def _read_plot_fragment(edf_file: EdfFile, nr: int, sfreq: float) -> np.ndarray:
+    if edf_file.sampling_frequency > sfreq:
+        edf_file.resample(new_sfreq=sfreq)
+
+    step = int(settings.PlotConfig.FRAGMENT_DURATION_SECONDS * sfreq)
+    return edf_file.to_numpy(start=nr * step, stop=(nr + 1) * step)
+
+
+def _decode_plot_fragments(raw_data: bytes, sfreq: float) -> List[np.ndarray]:
+    # float32 is kept, so both JSON float16 and binary float32 responses can be served
+    edf_file = EdfFile(buffer=raw_data, dtype=np.float32)
+    if edf_file.sampling_frequency > sfreq:
+        edf_file.resample(new_sfreq=sfreq)
+
+    edf_array = edf_file.to_numpy()
+    step = int(settings.PlotConfig.FRAGMENT_DURATION_SECONDS * sfreq)
+
+    # copies, so a cached fragment does not keep the whole recording array alive
+    return [edf_array[:, begin:begin + step].copy()
+            for begin in range(0, edf_array.shape[-1], step)]
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, status
 
 from eeg_web_assistant.models.user import (CreateUser, UpdateUserPassword, UpdateUserPersonalInfo,
                                            UserInDB, UserOut)
+from eeg_web_assistant.services.cache import Cache
 from eeg_web_assistant.services.database import Database
 from eeg_web_assistant.services.logging import Logging
 from eeg_web_assistant.utils.exceptions import (DuplicatedEmailError, DuplicatedUsernameError,
@@ -94,20 +95,31 @@ def update_user_personal_info(updated_user: UpdateUserPersonalInfo,
 @router.delete('',
                responses={status.HTTP_401_UNAUTHORIZED: {"model": ExceptionModel},
                           status.HTTP_404_NOT_FOUND: {"model": ExceptionModel}})
-def delete_user(user: UserInDB = Depends(get_current_user), db: Database = Depends(Database)):
+def delete_user(user: UserInDB = Depends(get_current_user), db: Database = Depends(Database),
+                cache: Cache = Depends(Cache)):
     logger.debug("Delete user called by user {%s}", user.username)
 
     deleted_user = db.users.find_one_and_delete(username=user.username)
     if not deleted_user:
         raise UserNotFoundError()
 
-    raw_to_delete = [rec['raw_id'] for rec in
-                     db.recordings_data.find_many_by_username_return_raw_ids(
-                         username=user.username)]
+    recordings_to_delete = db.recordings_data.find_many_by_username_return_raw_ids(
+        username=user.username)
 
-    for raw_id in raw_to_delete:
-        db.recordings_raw.delete(file_id=raw_id)
+    for rec in recordings_to_delete:
+        db.recordings_raw.delete(file_id=rec['raw_id'])
+        if rec.get('plot_pyramid_id'):
+            db.recordings_pyramid.delete(file_id=rec['plot_pyramid_id'])
+        if rec.get('signal_blocks_id'):
+            db.signal_blocks.delete(file_id=rec['signal_blocks_id'])
+        cache.plot_fragments.delete(str(rec['_id']))
 
     db.recordings_data.find_many_and_delete(username=user.username)
 
+    # features are shared by all recordings of the same raw data, also of other users
+    raw_hashes = {rec['raw_hash'] for rec in recordings_to_delete if rec.get('raw_hash')}
+    for raw_hash in raw_hashes:
+        if not db.recordings_data.count_by_raw_hash(raw_hash=raw_hash):
+            db.features.delete_by_raw_hash(raw_hash=raw_hash)
+
     return str(deleted_user.get('_id'))
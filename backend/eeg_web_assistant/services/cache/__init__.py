@@ -0,0 +1,14 @@
+from eeg_web_assistant import settings
+from eeg_web_assistant.services import Service
+from eeg_web_assistant.services.cache.array_cache import ArrayCache
+
+
+class Cache(metaclass=Service):
+    def __init__(self, config: settings.CacheConfig):
+        self.config = config
+
+        # plot fragments keyed by (recording id, fragment nr, sampling frequency)
+        self.plot_fragments = ArrayCache(
+            max_memory_bytes=self.config.PLOT_MAX_MEMORY_MB * 2 ** 20,
+            spill_dir=self.config.PLOT_SPILL_DIR,
+            max_disk_bytes=self.config.PLOT_MAX_DISK_MB * 2 ** 20)
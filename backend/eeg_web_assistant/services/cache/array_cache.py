@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Hashable, Optional, Tuple
+from uuid import uuid4
+
+import numpy as np
+
+from eeg_web_assistant.services.logging import Logging
+
+logger = Logging.get(__name__)
+
+# keys are tuples starting with a group, e.g. the recording id, so a group is deleted at once
+CacheKey = Tuple[Hashable, ...]
+
+
+class ArrayCache:
+    def __init__(self, max_memory_bytes: int, spill_dir: Optional[Path] = None,
+                 max_disk_bytes: int = 0):
+        self.max_memory_bytes = max_memory_bytes
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        # least recently used entries first
+        self._memory: 'OrderedDict[CacheKey, np.ndarray]' = OrderedDict()
+        self._disk: 'OrderedDict[CacheKey, Tuple[Path, int]]' = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = Lock()
+
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    @property
+    def disk_bytes(self) -> int:
+        return self._disk_bytes
+
+    def __contains__(self, key: CacheKey) -> bool:
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    def get(self, key: CacheKey) -> Optional[np.ndarray]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+            if key in self._disk:
+                path, _ = self._pop_disk(key)
+                try:
+                    array = np.load(path)
+                except FileNotFoundError:
+                    # e.g. the spill directory cleaned up, the entry is read again from the source
+                    logger.debug("Cache entry %s missing on disk", key)
+                    return None
+
+                path.unlink(missing_ok=True)
+
+                logger.debug("Cache entry %s loaded from disk", key)
+                self._put_memory(key, array)
+                return array
+
+        return None
+
+    def put(self, key: CacheKey, array: np.ndarray):
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= self._memory.pop(key).nbytes
+            if key in self._disk:
+                self._pop_disk(key)[0].unlink(missing_ok=True)
+
+            self._put_memory(key, array)
+
+    def delete(self, group: Hashable):
+        with self._lock:
+            for key in [key for key in self._memory if key[0] == group]:
+                self._memory_bytes -= self._memory.pop(key).nbytes
+
+            for key in [key for key in self._disk if key[0] == group]:
+                self._pop_disk(key)[0].unlink(missing_ok=True)
+
+    def _put_memory(self, key: CacheKey, array: np.ndarray):
+        if array.nbytes > self.max_memory_bytes:
+            logger.debug("Array of %d bytes is too big to be cached", array.nbytes)
+            return
+
+        self._memory[key] = array
+        self._memory_bytes += array.nbytes
+
+        while self._memory_bytes > self.max_memory_bytes:
+            evicted_key, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+            self._spill(evicted_key, evicted)
+
+    def _spill(self, key: CacheKey, array: np.ndarray):
+        if self.spill_dir is None or array.nbytes > self.max_disk_bytes:
+            return
+
+        # unique names, the spill directory may be shared by several processes caching the same keys
+        path = self.spill_dir.joinpath('_'.join(str(part) for part in key) + f'_{uuid4().hex}.npy')
+        np.save(path, array)
+
+        self._disk[key] = (path, array.nbytes)
+        self._disk_bytes += array.nbytes
+
+        while self._disk_bytes > self.max_disk_bytes:
+            self._pop_disk(next(iter(self._disk)))[0].unlink(missing_ok=True)
+
+    def _pop_disk(self, key: CacheKey) -> Tuple[Path, int]:
+        path, nbytes = self._disk.pop(key)
+        self._disk_bytes -= nbytes
+
+        return path, nbytes
@@ -2,8 +2,10 @@ from pymongo import MongoClient
 
 from eeg_web_assistant import settings
 from eeg_web_assistant.services import Service
-from eeg_web_assistant.services.database.collections import (_RecordingDataCollection,
+from eeg_web_assistant.services.database.collections import (_FeatureCollection,
+                                                             _RecordingDataCollection,
                                                              _RecordingRawCollection,
+                                                             _SignalBlockCollection,
                                                              _UserCollection)
 
 
@@ -24,4 +26,20 @@ class Database(metaclass=Service):
 
         self.recordings_raw = _RecordingRawCollection(
             database=self._database,
-            collection=self.config.RECORDING_RAW_COLLECTION)
+            collection=self.config.RECORDING_RAW_COLLECTION,
+            codec=self.config.RAW_CODEC)
+
+        self.recordings_pyramid = _RecordingRawCollection(
+            database=self._database,
+            collection=self.config.RECORDING_PYRAMID_COLLECTION,
+            codec=self.config.RAW_CODEC)
+
+        self.signal_blocks = _SignalBlockCollection(
+            database=self._database,
+            collection=self.config.SIGNAL_BLOCK_COLLECTION,
+            codec=self.config.RAW_CODEC,
+            block_seconds=self.config.SIGNAL_BLOCK_SECONDS)
+
+        self.features = _FeatureCollection(
+            database=self._database,
+            collection=self.config.FEATURE_COLLECTION)
@@ -0,0 +1,152 @@
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Type
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# files stored before codecs were recorded in GridFS metadata are gzip streams
+LEGACY_CODEC = 'gzip'
+
+
+class Codec(ABC):
+    name: str
+    default_level: Optional[int] = None
+
+    def __init__(self, level: Optional[int] = None):
+        self.level = self.default_level if level is None else level
+
+    @property
+    def spec(self) -> str:
+        return self.name if self.level is None else f'{self.name}:{self.level}'
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    @abstractmethod
+    def compressor(self):
+        # incremental compressor with compress(chunk) and flush() returning bytes
+        pass
+
+    @abstractmethod
+    def decompress(self, data: bytes) -> bytes:
+        pass
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = self.compressor()
+        return compressor.compress(data) + compressor.flush()
+
+
+class NoneCodec(Codec):
+    name = 'none'
+
+    def compressor(self):
+        return _IdentityCompressor()
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+
+class ZlibCodec(Codec):
+    name = 'zlib'
+    default_level = 1
+    wbits = zlib.MAX_WBITS
+
+    def compressor(self):
+        return zlib.compressobj(self.level, zlib.DEFLATED, self.wbits)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data, self.wbits)
+
+
+class GzipCodec(ZlibCodec):
+    # gzip module default level, the format of files stored before codecs
+    name = 'gzip'
+    default_level = 9
+    wbits = 16 + zlib.MAX_WBITS
+
+
+class Lz4Codec(Codec):
+    name = 'lz4'
+    default_level = 0
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return lz4_frame is not None
+
+    def compressor(self):
+        return _Lz4Compressor(lz4_frame.LZ4FrameCompressor(compression_level=self.level))
+
+    def decompress(self, data: bytes) -> bytes:
+        return lz4_frame.decompress(data)
+
+
+class ZstdCodec(Codec):
+    name = 'zstd'
+    default_level = 3
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return zstandard is not None
+
+    def compressor(self):
+        return zstandard.ZstdCompressor(level=self.level).compressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        # streamed frames have no content size in their header, so one shot decompress fails
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+CODECS: Dict[str, Type[Codec]] = {codec.name: codec for codec in
+                                  (NoneCodec, ZlibCodec, GzipCodec, Lz4Codec, ZstdCodec)}
+
+
+def get_codec(spec: str) -> Codec:
+    # codec spec is its name with an optional level, e.g. 'zlib:1', 'zstd' or 'none'
+    name, _, level = spec.partition(':')
+
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Unknown compression codec: {name}")
+    if not codec.is_available():
+        raise ValueError(f"Compression codec {name} is not installed")
+
+    try:
+        return codec(level=int(level) if level else None)
+    except ValueError:
+        raise ValueError(f"Wrong compression codec level: {spec}")
+
+
+def get_available_codecs() -> List[str]:
+    return [name for name, codec in CODECS.items() if codec.is_available()]
+
+
+class _IdentityCompressor:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b''
+
+
+class _Lz4Compressor:
+    # lz4 frame header is written by begin, before the first compressed block
+    def __init__(self, compressor):
+        self._compressor = compressor
+        self._header = compressor.begin()
+
+    def compress(self, data: bytes) -> bytes:
+        header, self._header = self._header, b''
+        return header + self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        header, self._header = self._header, b''
+        return header + self._compressor.flush()
@@ -1,13 +1,18 @@
-import gzip
+import io
 from abc import ABC
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence
 
 import gridfs
+import numpy as np
 import pymongo
 from bson import ObjectId
 from pymongo import ReturnDocument
 
+from eeg_web_assistant.core.edf_reader import EdfReader
+from eeg_web_assistant.core.signal_blocks import SignalBlockReader, write_signal_blocks
+from eeg_web_assistant.services.database.codecs import LEGACY_CODEC, get_codec
+
 
 class BaseCollection(ABC):
     def __init__(self, database, collection):
@@ -51,11 +56,16 @@ class _RecordingDataCollection(BaseCollection):
 
     def find_many_by_username_return_raw_ids(self, username: str) -> List[Dict]:
         return list(self._collection.find(filter={'username': username},
-                                          projection={'username': True, 'raw_id': True}))
+                                          projection={'username': True, 'raw_id': True,
+                                                      'plot_pyramid_id': True, 'raw_hash': True,
+                                                      'signal_blocks_id': True}))
 
     def find_one_by_id(self, id_: ObjectId) -> Optional[Dict]:
         return self._collection.find_one(filter={'_id': id_})
 
+    def count_by_raw_hash(self, raw_hash: str) -> int:
+        return self._collection.count_documents(filter={'raw_hash': raw_hash})
+
     def find_one_by_id_and_username(self, id_: ObjectId, username: str) -> Optional[Dict]:
         return self._collection.find_one(filter={'_id': id_, 'username': username})
 
@@ -69,6 +79,13 @@ class _RecordingDataCollection(BaseCollection):
                                                     update={'$set': update_data},
                                                     return_document=ReturnDocument.AFTER)
 
+    def find_one_by_id_and_update_unset(self, id_: ObjectId, update_data: Dict) -> Optional[Dict]:
+        # fields are set only while none of them is set yet, e.g. by a concurrent request
+        unset_filter = {key: None for key in update_data}
+        return self._collection.find_one_and_update(filter={'_id': id_, **unset_filter},
+                                                    update={'$set': update_data},
+                                                    return_document=ReturnDocument.AFTER)
+
     def find_one_by_id_and_username_and_update(self,
                                                id_: ObjectId,
                                                username: str,
@@ -93,19 +110,99 @@ class _RecordingDataCollection(BaseCollection):
 
 
 class _RecordingRawCollection(BaseCollection):
-    def __init__(self, database, collection):
+    def __init__(self, database, collection, codec: str = LEGACY_CODEC):
         super().__init__(database, collection)
         self._fs = gridfs.GridFS(database, collection=collection)
+        self._codec = get_codec(codec)
 
     def put(self, raw_data: bytes) -> ObjectId:
-        raw_id = self._fs.put(gzip.compress(raw_data))
+        return self.put_stream([raw_data])
+
+    def put_stream(self, chunks: Iterable[bytes]) -> ObjectId:
+        # every chunk is compressed and written to GridFS as it comes, neither the raw nor the
+        # compressed data is held whole in memory, a failed upload leaves no file behind
+        compressor = self._codec.compressor()
+        grid_in = self._fs.new_file(metadata={'codec': self._codec.name})
+
+        try:
+            for chunk in chunks:
+                grid_in.write(compressor.compress(chunk))
+            grid_in.write(compressor.flush())
+        except Exception:
+            grid_in.abort()
+            raise
 
-        return raw_id
+        grid_in.close()
+
+        return grid_in._id
 
     def get(self, file_id: ObjectId) -> bytes:
-        raw_data = self._fs.get(file_id).read()
+        # codec of every file is read from its metadata, files of an earlier codec stay readable
+        # after the configured one changes
+        grid_out = self._fs.get(file_id)
+        codec = (grid_out.metadata or {}).get('codec', LEGACY_CODEC)
+
+        return get_codec(codec).decompress(grid_out.read())
+
+    def delete(self, file_id: ObjectId):
+        self._fs.delete(file_id)
+
+
+class _SignalBlockCollection(BaseCollection):
+    # decoded signal of a recording in a single GridFS file of separately compressed blocks, block
+    # offsets and channel scales are kept in its metadata
+    def __init__(self, database, collection, codec: str, block_seconds: float):
+        super().__init__(database, collection)
+        self._fs = gridfs.GridFS(database, collection=collection)
+        self._codec = get_codec(codec)
+        self._block_seconds = block_seconds
+
+    def put(self, reader: EdfReader, picks: Optional[Sequence[int]] = None) -> ObjectId:
+        grid_in = self._fs.new_file()
+
+        try:
+            info = write_signal_blocks(reader, file=grid_in, compress=self._codec.compress,
+                                       block_seconds=self._block_seconds, picks=picks)
+        except Exception:
+            grid_in.abort()
+            raise
+
+        grid_in.metadata = {'codec': self._codec.name, **info}
+        grid_in.close()
 
-        return gzip.decompress(raw_data)
+        return grid_in._id
+
+    def open(self, file_id: ObjectId) -> SignalBlockReader:
+        grid_out = self._fs.get(file_id)
+        codec = get_codec(grid_out.metadata['codec'])
+
+        return SignalBlockReader(grid_out, info=grid_out.metadata, decompress=codec.decompress)
 
     def delete(self, file_id: ObjectId):
         self._fs.delete(file_id)
+
+
+class _FeatureCollection(BaseCollection):
+    # extracted features stored under their content key, recordings of the same raw data
+    # processed the same way share them
+    def __init__(self, database, collection):
+        super().__init__(database, collection)
+        self._fs = gridfs.GridFS(database, collection=collection)
+
+    def put(self, key: str, features: np.ndarray, raw_hash: str) -> ObjectId:
+        buffer = io.BytesIO()
+        np.save(buffer, features, allow_pickle=False)
+
+        return self._fs.put(buffer.getvalue(), filename=key, metadata={'raw_hash': raw_hash})
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        try:
+            features_file = self._fs.get_last_version(filename=key)
+        except gridfs.NoFile:
+            return None
+
+        return np.load(io.BytesIO(features_file.read()), allow_pickle=False)
+
+    def delete_by_raw_hash(self, raw_hash: str):
+        for features_file in self._fs.find(filter={'metadata.raw_hash': raw_hash}):
+            self._fs.delete(features_file._id)
@@ -1,5 +1,8 @@
+from functools import partial
+
 from celery import Celery
 from celery.result import AsyncResult
+from celery.signals import worker_process_init
 
 from eeg_web_assistant import settings
 from eeg_web_assistant.services import Service
@@ -15,6 +18,11 @@ class Worker(metaclass=Service):
         from eeg_web_assistant.services.worker.tasks import classification
         self.classification = classification
 
+        if self.config.preload_models:
+            # fired only in worker pool processes, never in the API sending tasks
+            from eeg_web_assistant.services.worker.startup import preload_models
+            worker_process_init.connect(partial(preload_models, config=self.config), weak=False)
+
     @property
     def app(self):
         return self._app
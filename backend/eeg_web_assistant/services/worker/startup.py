@@ -0,0 +1,38 @@
+from time import perf_counter
+
+import numpy as np
+import tensorflow as tf
+
+from eeg_web_assistant import settings
+from eeg_web_assistant.core.classification_types import ClassificationType
+from eeg_web_assistant.ml.models import Model
+from eeg_web_assistant.ml.predictors.monte_carlo import predict_monte_carlo
+from eeg_web_assistant.services.logging import Logging
+
+logger = Logging.get(__name__)
+
+
+def preload_models(config=settings.WorkerConfig, **kwargs):
+    # called in every worker process at startup, so the first task does not pay model
+    # construction, weights restoring and the first forward pass
+    for class_type in ClassificationType:
+        start = perf_counter()
+        model = Model.load(class_type)
+        load_time = perf_counter() - start
+
+        warm_up_time = 0.
+        if config.warm_up_models:
+            start = perf_counter()
+            warm_up_model(model)
+            warm_up_time = perf_counter() - start
+
+        logger.info("Model %s loaded in %.2f s, warmed up in %.2f s", class_type.value,
+                    load_time, warm_up_time)
+
+
+def warm_up_model(model: tf.keras.Model, config=settings.ModelPredict):
+    # subclassed models restore checkpoint weights on their first call, dummy input runs the
+    # same monte carlo path as classification tasks do
+    dummy_input = np.zeros((1, *model.dims), dtype=np.float32)
+    predict_monte_carlo(model, input_data=dummy_input,
+                        iterations=config.MONTE_CARLO_BLOCK_ITERATIONS)
@@ -1,6 +1,4 @@
-from pathlib import Path
-from tempfile import NamedTemporaryFile
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 import numpy as np
 from bson import ObjectId
@@ -8,58 +6,126 @@ from celery import current_app
 
 from eeg_web_assistant.core.classification_types import ClassificationType
 from eeg_web_assistant.core.edf_file import EdfFile, EdfProcessor
+from eeg_web_assistant.core.features_key import get_features_key, get_raw_hash
 from eeg_web_assistant.core.process_classification_results import ClassificationResults
-from eeg_web_assistant.ml.predictors.predict import predict_eeg_proba_per_segment
+from eeg_web_assistant.ml.predictors.predict import (extract_eeg_blocks_features,
+                                                     get_features_params,
+                                                     predict_features_proba_per_segment)
 from eeg_web_assistant.models.recording import ClassificationInfoInDB, ClassificationSegmentInDB
 from eeg_web_assistant.services.database import Database
+from eeg_web_assistant.services.logging import Logging
 from eeg_web_assistant.utils.dict import get_dict_with_prefix_keys
 
+logger = Logging.get(__name__)
+
 
 @current_app.task(name='tasks.classification.classify_recording', serializer='pickle')
 def classify_recording(recording_id: str, raw_data_id: str, classification_type: str,
                        ch_names: List[str], sfreq: float):
-    raw_data = Database().recordings_raw.get(ObjectId(raw_data_id))
+    classification_infos = _classify_recording(recording_id=recording_id,
+                                               raw_data_id=raw_data_id,
+                                               classification_types=[classification_type],
+                                               ch_names=ch_names, sfreq=sfreq)
+
+    return classification_infos[classification_type]
+
+
+@current_app.task(name='tasks.classification.classify_recording_types', serializer='pickle')
+def classify_recording_types(recording_id: str, raw_data_id: str,
+                             classification_types: List[str], ch_names: List[str], sfreq: float):
+    # results of all the types keyed by type, the recording is decoded and its features are
+    # extracted once per set of channels the types use
+    return _classify_recording(recording_id=recording_id, raw_data_id=raw_data_id,
+                               classification_types=classification_types, ch_names=ch_names,
+                               sfreq=sfreq)
 
-    raw_array, processed_array, segment_cuts = _process_edf(
-        edf_data=raw_data, class_type=ClassificationType(classification_type)
-    )
 
-    proba_mean, proba_std = predict_eeg_proba_per_segment(
-        eeg_array=processed_array,
-        classification_type=ClassificationType(classification_type),
+def _classify_recording(recording_id: str, raw_data_id: str, classification_types: List[str],
+                        ch_names: List[str], sfreq: float) -> Dict[str, Dict]:
+    edf_file, raw_hash = _open_recording_signal(recording_id=recording_id,
+                                                raw_data_id=raw_data_id)
+
+    classification_results = _classify_edf(
+        edf_file=edf_file,
+        raw_hash=raw_hash,
+        class_types=[ClassificationType(class_type) for class_type in classification_types],
         sfreq=sfreq
     )
 
-    results_obj = ClassificationResults(raw_array=raw_array, proba_mean=proba_mean,
-                                        proba_std=proba_std, segment_cuts=segment_cuts,
-                                        ch_names=ch_names, sfreq=sfreq)
+    update_data = {}
+    classification_infos = {}
+    for class_type, (proba_mean, proba_std, samples_used, segment_cuts) in \
+            classification_results.items():
+        results_obj = ClassificationResults(raw_array=None, proba_mean=proba_mean,
+                                            proba_std=proba_std, segment_cuts=segment_cuts,
+                                            ch_names=ch_names, sfreq=sfreq,
+                                            samples_used=samples_used)
 
-    classified_segments = [ClassificationSegmentInDB(**val) for val in results_obj.process()]
-    classification_info = ClassificationInfoInDB(
-        type=ClassificationType(classification_type),
-        segments=classified_segments
-    )
+        classified_segments = [ClassificationSegmentInDB(**val) for val in results_obj.process()]
+        classification_info = ClassificationInfoInDB(type=class_type,
+                                                     segments=classified_segments)
 
-    Database().recordings_data.find_one_by_id_and_update(
-        id_=ObjectId(recording_id),
-        update_data=get_dict_with_prefix_keys(
-            dictionary=classification_info.dict(exclude_unset=True),
-            prefix=f'classification.{classification_type}.')
-    )
+        classification_infos[class_type.value] = classification_info.dict(exclude_unset=True)
+        update_data.update(get_dict_with_prefix_keys(
+            dictionary=classification_infos[class_type.value],
+            prefix=f'classification.{class_type.value}.'))
+
+    # all the types are written in a single update
+    Database().recordings_data.find_one_by_id_and_update(id_=ObjectId(recording_id),
+                                                         update_data=update_data)
+
+    return classification_infos
+
+
+def _open_recording_signal(recording_id: str, raw_data_id: str) -> Tuple[EdfFile, str]:
+    database = Database()
+    recording = database.recordings_data.find_one_by_id(id_=ObjectId(recording_id)) or {}
+
+    if recording.get('signal_blocks_id') and recording.get('raw_hash'):
+        # stored signal blocks are read one block of segments at a time, the raw EDF is not
+        # fetched at all
+        signal_blocks = database.signal_blocks.open(recording['signal_blocks_id'])
+        return EdfFile(blocks=signal_blocks, dtype=np.float32), recording['raw_hash']
+
+    # processing and features extraction run on float32 windows of the int16 samples
+    raw_data = database.recordings_raw.get(ObjectId(raw_data_id))
+    return EdfFile(buffer=raw_data, dtype=np.float32), get_raw_hash(raw_data)
+
+
+def _classify_edf(edf_file: EdfFile, raw_hash: str, class_types: List[ClassificationType],
+                  sfreq: float) \
+        -> Dict[ClassificationType,
+                Tuple[np.ndarray, np.ndarray, np.ndarray, List[Tuple[int, int]]]]:
+    features_store = Database().features
+
+    classification_results = {}
+    for group in EdfProcessor.group_by_channels(edf_record=edf_file,
+                                                classification_types=class_types):
+        edf_processor = EdfProcessor(edf_record=edf_file, classification_type=group[0])
 
-    return classification_info.dict(exclude_unset=True)
+        # features of the same raw data, processing and features config are extracted once
+        # and then only the models run, e.g. after a report is deleted or a model is updated
+        features_key = get_features_key(raw_hash=raw_hash,
+                                        processing_params=edf_processor.get_processing_params(),
+                                        features_params=get_features_params())
+        features = features_store.get(features_key)
 
+        if features is None:
+            logger.debug("Processing EDF once for classification types: %s",
+                         ",".join(class_type.value for class_type in group))
 
-def _process_edf(edf_data: bytes,
-                 class_type: ClassificationType
-                 ) -> Tuple[np.ndarray, np.ndarray, List[Tuple[int, int]]]:
-    with NamedTemporaryFile(suffix='.edf') as tf:
-        tf.write(edf_data)
-        edf_file = EdfFile(path=Path(tf.name))
-        raw_array = edf_file.to_numpy()
+            # signal is streamed, one block of segments at a time is processed
+            features = extract_eeg_blocks_features(eeg_blocks=edf_processor.process_blocks(),
+                                                   sfreq=sfreq)
+            features_store.put(features_key, features=features, raw_hash=raw_hash)
+        else:
+            logger.debug("Stored features used for classification types: %s",
+                         ",".join(class_type.value for class_type in group))
 
-        edf_processor = EdfProcessor(edf_record=edf_file, classification_type=class_type)
-        processed_array = edf_processor.process()
-        segment_cuts = edf_processor.segment_cuts
+        for class_type in group:
+            proba_mean, proba_std, samples_used = predict_features_proba_per_segment(
+                features, classification_type=class_type)
+            classification_results[class_type] = (proba_mean, proba_std, samples_used,
+                                                  edf_processor.segment_cuts)
 
-    return raw_array, processed_array, segment_cuts
+    return classification_results
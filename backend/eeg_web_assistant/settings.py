@@ -12,6 +12,7 @@ DATA_DIR = STORAGE_DIR / 'data'
 HPARAMS_DIR = PROJECT_DIR / 'eeg_web_assistant' / 'ml' / 'experiments' / 'hparams'
 MODEL_WEIGHTS_DIR = STORAGE_DIR / 'checkpoints'
 MODEL_CONFIG_DIR = STORAGE_DIR / 'configs' / 'models'
+MODEL_EXPORT_DIR = STORAGE_DIR / 'exported'
 
 
 # CONFIGS
@@ -36,21 +37,33 @@ class WorkerConfig:
     worker_hijack_root_logger = False
     task_serializer = 'pickle'
     accept_content = {'pickle', 'json'}
+    # models loading in worker processes at startup, not celery settings
+    preload_models = True
+    warm_up_models = True
 
 
 @dataclass(init=False, frozen=True)
 class EdfFileConfig:
     EDF_FILE_EXCLUDE = STORAGE_DIR / 'configs' / 'edf' / 'edf_file_exclude_channels.json'
     MAX_DURATION_MINUTES = 30
+    UPLOAD_CHUNK_BYTES = 2 ** 20
 
 
 @dataclass(init=False, frozen=True)
 class EdfProcessingConfig:
     SEGMENT_LEN_SECONDS = 16
     TIMEFRAMES_AMOUNT = 8
+    SEGMENTS_PER_BLOCK = 16
     EDF_CHANNELS_SETUP = STORAGE_DIR / 'configs' / 'edf' / 'edf_classify_channels.json'
 
 
+@dataclass(init=False, frozen=True)
+class FeatureExtractionConfig:
+    # processes the segments are sharded across, used only outside of daemonic processes
+    # (e.g. celery worker pool processes of the prefork pool)
+    WORKERS = 1
+
+
 @dataclass(init=False, frozen=True)
 class PlotConfig:
     FRAGMENT_DURATION_SECONDS = 64
@@ -60,6 +73,17 @@ class PlotConfig:
     WIDTH = 800
     HEIGHT = 600
     PADDINGS_LRTB = (90, 20, 20, 20)
+    PYRAMID_BUCKET_SIZE = 16  # samples per bucket of the finest min/max level
+    PYRAMID_FACTOR = 4
+    PYRAMID_MIN_BUCKETS = 1024
+    MAX_PLOT_WIDTH = 4096
+
+
+@dataclass(init=False, frozen=True)
+class CacheConfig:
+    PLOT_MAX_MEMORY_MB = 256
+    PLOT_SPILL_DIR = None  # directory for fragments evicted from memory, None disables spill
+    PLOT_MAX_DISK_MB = 2048
 
 
 @dataclass(init=False, frozen=True)
@@ -97,6 +121,13 @@ class ModelTrain:
     MODEL_DUMP_CONFIG_DIR = MODEL_CONFIG_DIR
 
 
+@dataclass(init=False, frozen=True)
+class ModelQuantize:
+    CALIBRATION_SAMPLES = 500  # random training samples the int8 activation ranges are set on
+    THROUGHPUT_SAMPLES = 112  # test samples timed with the full monte carlo sampling
+    REPORT_FILE = 'quantization_report.json'
+
+
 @dataclass(init=False, frozen=True)
 class ModelPredict:
     ABNORMAL_WEIGHTS = MODEL_WEIGHTS_DIR.joinpath(
@@ -114,6 +145,21 @@ class ModelPredict:
     SEIZURE_CONFIG = MODEL_CONFIG_DIR.joinpath(
         '2020-10-24_02-52_instaGAT-tuheeg_seizure_2class-epochs-200.json')
 
+    MONTE_CARLO_ITERATIONS = 100  # samples per segment, the cap of the adaptive mode
+    # adaptive sampling stops early and changes the outputs, so it has to be enabled explicitly
+    MONTE_CARLO_ADAPTIVE = getenv('MODEL_MONTE_CARLO_ADAPTIVE', default='false') == 'true'
+    MONTE_CARLO_BLOCK_ITERATIONS = 10
+    MONTE_CARLO_TOLERANCE = 0.005  # on the mean and std change after a block
+    MONTE_CARLO_MEMORY_BUDGET_MB = 512
+    MONTE_CARLO_ACTIVATION_FACTOR = 16  # forward pass memory as a multiple of the input size
+
+    # 'checkpoint', 'saved_model' or 'tflite', exported with ml/experiments/scripts/export_models.py
+    BACKEND = getenv('MODEL_BACKEND', default='checkpoint')
+    EXPORT_DIR = MODEL_EXPORT_DIR
+    TFLITE_BATCH_SIZE = 32  # fixed encoder input batch, the last batch is zero padded
+    TFLITE_THREADS = None
+    TFLITE_QUANTIZATION = getenv('MODEL_QUANTIZATION')  # None, 'float16', 'dynamic_int8', 'int8'
+
 
 @dataclass(init=False, frozen=True)
 class TestConfig:
@@ -129,6 +175,13 @@ class DatabaseConfig:
     USER_COLLECTION = 'user'
     RECORDING_DATA_COLLECTION = 'edf_recording_data'
     RECORDING_RAW_COLLECTION = 'edf_raw'
+    RECORDING_PYRAMID_COLLECTION = 'edf_plot_pyramid'
+    FEATURE_COLLECTION = 'edf_features'
+    SIGNAL_BLOCK_COLLECTION = 'edf_signal_blocks'
+    SIGNAL_BLOCK_SECONDS = 16
+    # compression of raw EDF and plot pyramid files: none, gzip, zlib, lz4 or zstd with
+    # an optional level, e.g. 'zstd:3', lz4 and zstd need the 'compression' extra installed
+    RAW_CODEC = getenv('DB_RAW_CODEC', default='zlib:1')
 
 
 @dataclass(init=False, frozen=True)
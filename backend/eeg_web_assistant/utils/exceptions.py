@@ -52,6 +52,12 @@ class PlotFragmentNrExceededError(HTTPException):
                          detail="Requested plot nr exceeds available fragments amount")
 
 
+class PlotRangeError(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST,
+                         detail="Requested plot time range is empty or out of the recording")
+
+
 class NonExistingClassificationError(HTTPException):
     def __init__(self):
         super().__init__(status_code=status.HTTP_400_BAD_REQUEST,
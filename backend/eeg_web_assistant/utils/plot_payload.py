@@ -0,0 +1,51 @@
+import json
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# binary plot payload: little-endian uint32 header length, UTF-8 JSON header with channel names,
+# shape, sfreq and dtype, then the C-ordered little-endian samples buffer
+PLOT_BINARY_MEDIA_TYPE = 'application/octet-stream'
+PLOT_BINARY_DTYPES = {'float16': np.dtype('<f2'), 'float32': np.dtype('<f4')}
+PLOT_BINARY_DEFAULT_DTYPE = 'float16'
+
+_HEADER_LENGTH = struct.Struct('<I')
+
+
+def negotiate_binary_dtype(accept: Optional[str]) -> Optional[str]:
+    # binary dtype requested in the Accept header, e.g. 'application/octet-stream; dtype=float32',
+    # None when the client accepts only JSON
+    if not accept:
+        return None
+
+    for media_range in accept.split(','):
+        media_type, *params = (part.strip() for part in media_range.split(';'))
+        if media_type != PLOT_BINARY_MEDIA_TYPE:
+            continue
+
+        options = dict(param.partition('=')[::2] for param in params)
+        dtype = options.get('dtype', PLOT_BINARY_DEFAULT_DTYPE)
+        if dtype in PLOT_BINARY_DTYPES:
+            return dtype
+
+    return None
+
+
+def encode_plot_payload(ch_names: List[str], array: np.ndarray, sfreq: float,
+                        dtype: str = PLOT_BINARY_DEFAULT_DTYPE) -> bytes:
+    array = np.ascontiguousarray(array, dtype=PLOT_BINARY_DTYPES[dtype])
+    header = json.dumps({'ch_names': ch_names, 'shape': array.shape, 'sfreq': sfreq,
+                         'dtype': dtype}).encode('utf-8')
+
+    return b''.join([_HEADER_LENGTH.pack(len(header)), header, array.tobytes()])
+
+
+def decode_plot_payload(payload: bytes) -> Tuple[Dict, np.ndarray]:
+    header_length, = _HEADER_LENGTH.unpack_from(payload)
+    header_end = _HEADER_LENGTH.size + header_length
+    header = json.loads(payload[_HEADER_LENGTH.size:header_end].decode('utf-8'))
+
+    array = np.frombuffer(payload, dtype=PLOT_BINARY_DTYPES[header['dtype']], offset=header_end)
+
+    return header, array.reshape(header['shape'])
@@ -26,6 +26,10 @@ setup(
         'yasa==0.3.0',
     ],
     extras_require={
+        'compression': [
+            'lz4==3.1.0',
+            'zstandard==0.14.0',
+        ],
         'dev': [
             'nbstripout==0.3.9',
             'pytest==6.0.2',
@@ -0,0 +1,107 @@
+import pathlib
+from functools import partial
+from tempfile import NamedTemporaryFile
+from timeit import repeat
+
+import numpy as np
+
+from eeg_web_assistant.core.edf_file import EdfFile, probe_edf
+from eeg_web_assistant.core.plot_pyramid import PlotPyramid
+from tests.unit.test_core.test_edf_reader import create_edf_bytes
+
+RECORDING_MINUTES = 30
+SFREQ = 256
+CHANNELS = 23
+PLOT_SFREQ = 200
+PLOT_FRAGMENT_SECONDS = 64
+PLOT_FRAGMENT_NR = 10
+REPEATS = 5
+
+
+def create_recording() -> bytes:
+    n_times = RECORDING_MINUTES * 60 * SFREQ
+    digital = np.random.randint(low=-32768, high=32767, dtype=np.int16, size=(CHANNELS, n_times))
+    labels = [f'EEG CH{idx}-REF' for idx in range(CHANNELS)]
+
+    return create_edf_bytes(digital=digital, samples_per_record=[SFREQ] * CHANNELS, labels=labels,
+                            patient_id='00000254 F 02-MAR-1980 Anna_Nowak',
+                            recording_id='Startdate 02-MAR-2004 X X X')
+
+
+def read_info(edf_file: EdfFile):
+    # what create_recording reads from the uploaded file
+    return (edf_file.duration, edf_file.measure_date, edf_file.highpass, edf_file.lowpass,
+            edf_file.sampling_frequency, edf_file.n_times, edf_file.channel_names,
+            edf_file.subject_info)
+
+
+def read_fragment(edf_file: EdfFile) -> np.ndarray:
+    # what get_plot_data reads for one plot fragment
+    edf_file.resample(new_sfreq=PLOT_SFREQ)
+    step = PLOT_FRAGMENT_SECONDS * PLOT_SFREQ
+
+    return edf_file.to_numpy(start=PLOT_FRAGMENT_NR * step, stop=(PLOT_FRAGMENT_NR + 1) * step)
+
+
+def upload_with_temp_file(edf_bytes: bytes, streaming: bool):
+    with NamedTemporaryFile(suffix='.edf') as tf:
+        tf.write(edf_bytes)
+        tf.flush()
+
+        edf_file = EdfFile(path=pathlib.Path(tf.name), streaming=streaming)
+        read_info(edf_file)
+        edf_file.close()
+
+
+def upload_with_buffer(edf_bytes: bytes):
+    read_info(EdfFile(buffer=edf_bytes))
+
+
+def upload_with_buffer_and_pyramid(edf_bytes: bytes):
+    # upload before the plot pyramid was built after the response
+    edf_file = EdfFile(buffer=edf_bytes)
+    read_info(edf_file)
+    PlotPyramid.build(windows=edf_file.iter_windows(window_seconds=PLOT_FRAGMENT_SECONDS),
+                      n_times=edf_file.n_times)
+
+
+def upload_with_probe(edf_bytes: bytes):
+    probe_edf(edf_bytes)
+
+
+def plot_with_temp_file(edf_bytes: bytes):
+    with NamedTemporaryFile(suffix='.edf') as tf:
+        tf.write(edf_bytes)
+        tf.flush()
+
+        edf_file = EdfFile(path=pathlib.Path(tf.name), streaming=True)
+        read_fragment(edf_file)
+        edf_file.close()
+
+
+def plot_with_buffer(edf_bytes: bytes):
+    read_fragment(EdfFile(buffer=edf_bytes))
+
+
+def measure(function, *args) -> float:
+    return min(repeat(lambda: function(*args), number=1, repeat=REPEATS))
+
+
+if __name__ == '__main__':
+    edf_bytes = create_recording()
+
+    print(f"Synthetic recording: {RECORDING_MINUTES} min, {SFREQ} Hz, {CHANNELS} channels, "
+          f"{len(edf_bytes) / 2 ** 20:.1f} MB")
+
+    cases = [
+        ('upload, temp file + mne', partial(upload_with_temp_file, streaming=False)),
+        ('upload, temp file + reader', partial(upload_with_temp_file, streaming=True)),
+        ('upload, buffer', upload_with_buffer),
+        ('upload, buffer + plot pyramid', upload_with_buffer_and_pyramid),
+        ('upload, header probe', upload_with_probe),
+        ('plot fragment, temp file', plot_with_temp_file),
+        ('plot fragment, buffer', plot_with_buffer),
+    ]
+
+    for name, function in cases:
+        print(f"{name}: {measure(function, edf_bytes) * 1000:.1f} ms")
@@ -0,0 +1,134 @@
+import json
+import resource
+from multiprocessing import Process, Queue
+from time import perf_counter
+from timeit import repeat
+from typing import List, Optional
+
+import numpy as np
+
+from eeg_web_assistant import settings
+from eeg_web_assistant.core.classification_types import ClassificationType
+from eeg_web_assistant.core.edf_file import EdfProcessor
+
+RECORDING_MINUTES = 30
+SFREQ = 256
+CLASSIFICATION_TYPE = ClassificationType.ABNORMAL
+REPEATS = 5
+
+
+class SyntheticEdfRecord:
+    # minimal stand-in for EdfFile holding a random signal instead of a parsed EDF
+    def __init__(self, ch_names: List[str], minutes: int, sfreq: int):
+        self.channel_names = list(ch_names)
+        self.sampling_frequency = sfreq
+        self.array = np.random.uniform(low=-1e-4, high=1e-4,
+                                       size=(len(ch_names), minutes * 60 * sfreq))
+
+    @property
+    def duration(self) -> int:
+        return self.array.shape[-1] // self.sampling_frequency
+
+    def to_numpy(self, picks: Optional[List[int]] = None, start: int = 0,
+                 stop: Optional[int] = None) -> np.ndarray:
+        if picks is None:
+            picks = np.arange(len(self.channel_names))
+
+        # fancy indexing returns a copy, as mne.io.Raw.get_data does
+        return self.array[picks, start:stop]
+
+
+class PreviousEdfProcessor(EdfProcessor):
+    # list based segmentation and two pass, out of place normalization, kept as the reference
+    def _split_to_segments(self) -> np.ndarray:
+        array = self.edf_record.to_numpy(picks=self.channel_picks, stop=self.n_times)
+        n_times = array.shape[-1]
+        step = int(self.segment_len * self.edf_record.sampling_frequency)
+
+        self.segment_cuts = [(t, t + step) for t in range(0, n_times - step + 1, step)]
+        return np.array([array[:, t:t + step] for t in range(0, n_times - step + 1, step)])
+
+    def _split_to_frames(self, segmented_array: np.ndarray) -> np.ndarray:
+        step = int(self.frame_len * self.edf_record.sampling_frequency)
+
+        frames_list = []
+        for segment in segmented_array:
+            n_times = segment.shape[-1]
+            frames_list.append([segment[:, t:t + step] for t in range(0, n_times - step + 1, step)])
+
+        return np.array(frames_list)
+
+    def _normalize(self, array: np.ndarray) -> np.ndarray:
+        selected = self.edf_record.to_numpy(picks=self.channel_picks, stop=self.n_times)
+        signal_min, signal_max = np.amin(selected), np.amax(selected)
+        return (array - ((signal_max + signal_min) / 2)) / ((signal_max - signal_min) / 2)
+
+
+def create_processor(processor_cls: type) -> EdfProcessor:
+    with settings.EdfProcessingConfig.EDF_CHANNELS_SETUP.open(mode='r') as f:
+        ch_names = json.load(f)[CLASSIFICATION_TYPE.value]
+
+    edf_record = SyntheticEdfRecord(ch_names=ch_names + ['EKG1-REF', 'PHOTIC-REF'],
+                                    minutes=RECORDING_MINUTES, sfreq=SFREQ)
+
+    return processor_cls(edf_record=edf_record, classification_type=CLASSIFICATION_TYPE)
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure_memory(processor_cls: type, normalize: bool, queue: Queue):
+    processor = create_processor(processor_cls)
+    rss_before = max_rss_mb()
+
+    if normalize:
+        processed = processor.process()
+    else:
+        processor._load_config()
+        processor._modify_for_classification()
+        processed = processor._split_to_frames(segmented_array=processor._split_to_segments())
+
+    signal_mb = processor.edf_record.array.nbytes / 2 ** 20
+    queue.put((processed.shape, signal_mb, rss_before, max_rss_mb()))
+
+
+def measure_time(processor_cls: type):
+    processor = create_processor(processor_cls)
+    processor._load_config()
+    processor._modify_for_classification()
+
+    # normalization runs in place, so every run gets a freshly segmented array
+    normalize_times = []
+    for _ in range(REPEATS):
+        segments = processor._split_to_segments()
+        start = perf_counter()
+        processor._normalize(segments)
+        normalize_times.append(perf_counter() - start)
+
+    process_time = min(repeat(processor.process, number=1, repeat=REPEATS))
+
+    return min(normalize_times), process_time
+
+
+if __name__ == '__main__':
+    processors = [('previous', PreviousEdfProcessor), ('current', EdfProcessor)]
+
+    print(f"Synthetic recording: {RECORDING_MINUTES} min, {SFREQ} Hz")
+
+    for stage, normalize in [('segmentation and framing', False), ('full processing', True)]:
+        for name, processor_cls in processors:
+            queue = Queue()
+            process = Process(target=measure_memory, args=(processor_cls, normalize, queue))
+            process.start()
+            shape, signal_mb, rss_before, rss_after = queue.get()
+            process.join()
+
+            print(f"{stage}, {name}: output shape {shape}, signal size {signal_mb:.1f} MB, "
+                  f"peak RSS {rss_after:.1f} MB (+{rss_after - rss_before:.1f} MB)")
+
+    for name, processor_cls in processors:
+        normalize_time, process_time = measure_time(processor_cls)
+        print(f"{name}: normalization {normalize_time * 1000:.1f} ms, "
+              f"full processing {process_time * 1000:.1f} ms")
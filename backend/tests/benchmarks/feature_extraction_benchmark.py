@@ -0,0 +1,42 @@
+from timeit import repeat
+
+import numpy as np
+
+from eeg_web_assistant import settings
+from eeg_web_assistant.ml.data_processing.eeg_features import FeatureExtractor
+
+RECORDING_MINUTES = 30
+SFREQ = 256
+CHANNELS = 21
+REPEATS = 3
+
+
+def generate_processed_array(minutes: int, sfreq: int, channels: int) -> np.ndarray:
+    segment_len = settings.EdfProcessingConfig.SEGMENT_LEN_SECONDS
+    frames = settings.EdfProcessingConfig.TIMEFRAMES_AMOUNT
+
+    segments = int(minutes * 60 / segment_len)
+    frame_n_times = int(segment_len / frames * sfreq)
+
+    return np.random.uniform(low=-1., high=1., size=(segments, frames, channels, frame_n_times))
+
+
+def benchmark_extract(array: np.ndarray, sfreq: float, batched: bool) -> float:
+    extractor = FeatureExtractor(array=array, sfreq=sfreq, batched=batched)
+    return min(repeat(extractor.extract, number=1, repeat=REPEATS))
+
+
+if __name__ == '__main__':
+    array = generate_processed_array(minutes=RECORDING_MINUTES, sfreq=SFREQ, channels=CHANNELS)
+    print(f"Input array shape: {array.shape}")
+
+    per_frame_features = FeatureExtractor(array=array, sfreq=SFREQ, batched=False).extract()
+    batched_features = FeatureExtractor(array=array, sfreq=SFREQ, batched=True).extract()
+    print(f"Max absolute difference: {np.max(np.abs(per_frame_features - batched_features)):.3e}")
+
+    per_frame_time = benchmark_extract(array, sfreq=SFREQ, batched=False)
+    batched_time = benchmark_extract(array, sfreq=SFREQ, batched=True)
+
+    print(f"Per frame extraction: {per_frame_time:.3f} s")
+    print(f"Batched extraction:   {batched_time:.3f} s")
+    print(f"Speedup: {per_frame_time / batched_time:.1f}x")
@@ -0,0 +1,36 @@
+import os
+from timeit import repeat
+
+import numpy as np
+
+from eeg_web_assistant.ml.data_processing.eeg_features import FeatureExtractor
+from tests.benchmarks.feature_extraction_benchmark import generate_processed_array
+
+RECORDING_MINUTES = 30
+SFREQ = 256
+CHANNELS = 21
+REPEATS = 3
+
+
+def benchmark_extract(array: np.ndarray, sfreq: float, workers: int) -> float:
+    extractor = FeatureExtractor(array=array, sfreq=sfreq, workers=workers)
+    # first run starts the process pool, it is reused by the next extractions
+    extractor.extract()
+    return min(repeat(extractor.extract, number=1, repeat=REPEATS))
+
+
+if __name__ == '__main__':
+    array = generate_processed_array(minutes=RECORDING_MINUTES, sfreq=SFREQ, channels=CHANNELS)
+    print(f"Input array shape: {array.shape}")
+
+    expected = FeatureExtractor(array=array, sfreq=SFREQ, workers=1).extract()
+
+    single_time = None
+    for workers in range(1, os.cpu_count() + 1):
+        features = FeatureExtractor(array=array, sfreq=SFREQ, workers=workers).extract()
+        assert np.array_equal(expected, features), "Parallel output differs"
+
+        extract_time = benchmark_extract(array, sfreq=SFREQ, workers=workers)
+        single_time = single_time or extract_time
+
+        print(f"{workers} workers: {extract_time:.3f} s, speedup {single_time / extract_time:.2f}x")
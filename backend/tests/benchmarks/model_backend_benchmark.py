@@ -0,0 +1,88 @@
+import json
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+from eeg_web_assistant.ml.experiments.export_model import export_saved_model, export_tflite
+from eeg_web_assistant.ml.models import Model
+from eeg_web_assistant.ml.models.insta_gat import InstaGAT
+from eeg_web_assistant.ml.predictors.monte_carlo import predict_monte_carlo
+
+SEGMENTS = 112  # 30 min recording split into 16 s segments
+FRAMES = 8
+CHANNELS = 21
+FEATURES = 11
+ITERATIONS = 100
+REPEATS = 5
+
+
+class BenchmarkConfig:
+    EXPORT_DIR = None
+    TFLITE_BATCH_SIZE = 32
+    TFLITE_THREADS = None
+    TFLITE_QUANTIZATION = None
+    BACKEND = 'checkpoint'
+
+
+def prepare_checkpoint(directory: Path):
+    # randomly initialized model saved the same way training does it
+    dims = (FRAMES, CHANNELS, CHANNELS + FEATURES)
+    model = InstaGAT(dims=dims, class_num=2, monte_carlo=True)
+    model(np.zeros((1, *dims), dtype=np.float32))
+
+    config_path = directory / 'instaGAT.json'
+    weights_path = directory / 'instaGAT.ckpt'
+    with config_path.open(mode='w') as f:
+        json.dump(model.get_config(), f)
+    model.save_weights(str(weights_path))
+
+    export_path = directory / 'exported' / weights_path.stem
+    export_saved_model(model, path=export_path)
+    export_tflite(model, path=export_path, config=BenchmarkConfig)
+
+    return config_path, weights_path
+
+
+def measure_startup(backend: str, config_path: Path, weights_path: Path):
+    # model loading with the first forward pass, which restores checkpoint weights or traces
+    BenchmarkConfig.BACKEND = backend
+
+    start = perf_counter()
+    model = Model._get_model(config_path=config_path, model_weights_path=weights_path,
+                             config=BenchmarkConfig)
+    dummy_input = np.zeros((1, *model.dims), dtype=np.float32)
+    predict_monte_carlo(model, input_data=dummy_input, iterations=10)
+
+    return perf_counter() - start, model
+
+
+def measure_latency(model, input_data: np.ndarray) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = perf_counter()
+        predict_monte_carlo(model, input_data=input_data, iterations=ITERATIONS)
+        times.append(perf_counter() - start)
+
+    return float(np.median(times))
+
+
+if __name__ == '__main__':
+    input_data = np.random.uniform(size=(SEGMENTS, FRAMES, CHANNELS, CHANNELS + FEATURES))
+    input_data = input_data.astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        BenchmarkConfig.EXPORT_DIR = directory / 'exported'
+        config_path, weights_path = prepare_checkpoint(directory)
+
+        print(f"{SEGMENTS} segments, {ITERATIONS} monte carlo iterations")
+
+        for backend in ('checkpoint', 'saved_model', 'tflite'):
+            startup_time, model = measure_startup(backend, config_path=config_path,
+                                                  weights_path=weights_path)
+            latency = measure_latency(model, input_data=input_data)
+
+            print(f"{backend}: startup {startup_time:.2f} s, "
+                  f"batch latency {latency * 1000:.1f} ms")
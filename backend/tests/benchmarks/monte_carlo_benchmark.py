@@ -0,0 +1,63 @@
+from time import perf_counter
+
+import numpy as np
+import tensorflow as tf
+
+from eeg_web_assistant.ml.models.cbam import build_cbam_model
+from eeg_web_assistant.ml.models.insta_gat import InstaGAT
+from eeg_web_assistant.ml.predictors.monte_carlo import predict_monte_carlo
+
+SEGMENTS = 112  # 30 min recording split into 16 s segments
+FRAMES = 8
+CHANNELS = 21
+FEATURES = 11
+ITERATIONS = 100
+BATCH_SIZE = 32
+
+
+def build_models():
+    dims = (FRAMES, CHANNELS, CHANNELS + FEATURES)
+    return [
+        ('instaGAT', lambda: InstaGAT(dims=dims, class_num=2, monte_carlo=True)),
+        ('cbam', lambda: build_cbam_model(shape=(None, *dims), class_num=2)),
+    ]
+
+
+def predict_loop(model: tf.keras.Model, input_data: np.ndarray) -> np.ndarray:
+    # previous implementation, one full predict call per monte carlo iteration, dropout is
+    # switched on by the model flag or by the training mode
+    if getattr(model, 'monte_carlo', False):
+        return np.stack([model.predict(input_data, batch_size=BATCH_SIZE, verbose=0)
+                         for _ in range(ITERATIONS)])
+
+    return np.stack([np.concatenate([model(input_data[t:t + BATCH_SIZE], training=True).numpy()
+                                     for t in range(0, len(input_data), BATCH_SIZE)])
+                     for _ in range(ITERATIONS)])
+
+
+def predict_batched(model: tf.keras.Model, input_data: np.ndarray) -> np.ndarray:
+    return predict_monte_carlo(model, input_data=input_data, iterations=ITERATIONS)
+
+
+def measure(predict, model: tf.keras.Model, input_data: np.ndarray):
+    start = perf_counter()
+    probs = predict(model, input_data)[..., 1]
+    return perf_counter() - start, probs.mean(axis=0), probs.std(axis=0)
+
+
+if __name__ == '__main__':
+    input_data = np.random.uniform(size=(SEGMENTS, FRAMES, CHANNELS, CHANNELS + FEATURES))
+    input_data = input_data.astype(np.float32)
+
+    print(f"{SEGMENTS} segments, {ITERATIONS} monte carlo iterations")
+
+    for name, build_model in build_models():
+        model = build_model()
+        model(input_data[:1])
+
+        loop_time, loop_mean, loop_std = measure(predict_loop, model, input_data)
+        batched_time, batched_mean, batched_std = measure(predict_batched, model, input_data)
+
+        print(f"{name}: loop {loop_time:.2f} s, batched {batched_time:.2f} s, "
+              f"max mean difference {np.abs(loop_mean - batched_mean).max():.4f}, "
+              f"max std difference {np.abs(loop_std - batched_std).max():.4f}")
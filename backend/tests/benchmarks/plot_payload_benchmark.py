@@ -0,0 +1,37 @@
+import json
+from timeit import repeat
+
+import numpy as np
+
+from eeg_web_assistant.models.plot import RecordingPlot
+from eeg_web_assistant.utils.plot_payload import encode_plot_payload
+
+CHANNELS = 21
+FRAGMENT_SECONDS = 64
+SFREQ = 200
+REPEATS = 5
+
+
+def encode_json(ch_names, array: np.ndarray) -> bytes:
+    # what get_plot_data returns by default, pydantic model serialized by fastapi
+    plot = RecordingPlot(ch_names=ch_names, data_array=array.astype(np.float16).tolist(),
+                         sfreq=SFREQ)
+    return json.dumps(plot.dict()).encode('utf-8')
+
+
+if __name__ == '__main__':
+    ch_names = [f'EEG CH{idx}-REF' for idx in range(CHANNELS)]
+    array = np.random.uniform(low=-1e-4, high=1e-4,
+                              size=(CHANNELS, FRAGMENT_SECONDS * SFREQ)).astype(np.float32)
+
+    print(f"Plot fragment: {CHANNELS} channels x {FRAGMENT_SECONDS} s x {SFREQ} Hz")
+
+    cases = [
+        ('json float16', lambda: encode_json(ch_names, array)),
+        ('binary float16', lambda: encode_plot_payload(ch_names, array, SFREQ, 'float16')),
+        ('binary float32', lambda: encode_plot_payload(ch_names, array, SFREQ, 'float32')),
+    ]
+
+    for name, encode in cases:
+        encode_time = min(repeat(encode, number=1, repeat=REPEATS))
+        print(f"{name}: {len(encode()) / 2 ** 10:.0f} kB, {encode_time * 1000:.1f} ms")
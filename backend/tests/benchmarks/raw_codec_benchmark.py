@@ -0,0 +1,70 @@
+from time import perf_counter
+from typing import List, Tuple
+
+import numpy as np
+
+from eeg_web_assistant import settings
+from eeg_web_assistant.services.database.codecs import get_available_codecs, get_codec
+from tests.unit.test_core.test_edf_reader import create_edf_bytes
+
+CODEC_SPECS = ['none', 'gzip:9', 'gzip:6', 'zlib:6', 'zlib:1', 'lz4:0', 'lz4:3', 'zstd:1',
+               'zstd:3', 'zstd:9']
+SYNTHETIC_MINUTES = 30
+SYNTHETIC_SFREQ = 256
+SYNTHETIC_CHANNELS = 23
+REPEATS = 3
+
+
+def load_samples() -> List[Tuple[str, bytes]]:
+    samples = [(path.name, path.read_bytes())
+               for path in sorted(settings.DB_SAMPLES_DIR.glob('*.edf'))]
+    if samples:
+        return samples
+
+    # without real samples, band limited noise compresses closer to EEG than white noise does
+    n_times = SYNTHETIC_MINUTES * 60 * SYNTHETIC_SFREQ
+    noise = np.random.normal(scale=2000, size=(SYNTHETIC_CHANNELS, n_times))
+    kernel = np.hanning(16) / np.hanning(16).sum()
+    digital = np.array([np.convolve(row, kernel, mode='same') for row in noise]).astype(np.int16)
+
+    edf_bytes = create_edf_bytes(digital=digital,
+                                 samples_per_record=[SYNTHETIC_SFREQ] * SYNTHETIC_CHANNELS,
+                                 labels=[f'EEG CH{idx}-REF' for idx in range(SYNTHETIC_CHANNELS)])
+    return [('synthetic', edf_bytes)]
+
+
+def measure(codec, raw_data: bytes) -> Tuple[float, float, float]:
+    chunk_bytes = settings.EdfFileConfig.UPLOAD_CHUNK_BYTES
+    compress_times, decompress_times = [], []
+
+    for _ in range(REPEATS):
+        # compressed chunk by chunk, the way uploads are stored
+        start = perf_counter()
+        compressor = codec.compressor()
+        compressed = b''.join([compressor.compress(raw_data[idx:idx + chunk_bytes])
+                               for idx in range(0, len(raw_data), chunk_bytes)]
+                              + [compressor.flush()])
+        compress_times.append(perf_counter() - start)
+
+        start = perf_counter()
+        decompressed = codec.decompress(compressed)
+        decompress_times.append(perf_counter() - start)
+
+        assert decompressed == raw_data
+
+    megabytes = len(raw_data) / 2 ** 20
+    return (megabytes / min(compress_times), megabytes / min(decompress_times),
+            len(raw_data) / len(compressed))
+
+
+if __name__ == '__main__':
+    available = get_available_codecs()
+    specs = [spec for spec in CODEC_SPECS if spec.partition(':')[0] in available]
+
+    for name, raw_data in load_samples():
+        print(f"{name}: {len(raw_data) / 2 ** 20:.1f} MB")
+
+        for spec in specs:
+            compress_speed, decompress_speed, ratio = measure(get_codec(spec), raw_data)
+            print(f"  {spec:>7}: compress {compress_speed:7.1f} MB/s, "
+                  f"decompress {decompress_speed:7.1f} MB/s, ratio {ratio:.2f}")
@@ -1,6 +1,7 @@
 import json
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 from mne.io.edf.edf import RawEDF
 
 from eeg_web_assistant.core.classification_types import ClassificationType
@@ -43,6 +44,36 @@ class TestEdfFile(IntegrationTestCase):
                               for channel in self.edf_file.exclude_channels]))
 
 
+class TestEdfFileStreaming(IntegrationTestCase):
+
+    def setUp(self) -> None:
+        path = DATA_DIR.joinpath('edf_file_seizure_all_channels.edf')
+        self.edf_file = EdfFile(path=path, config=EdfFileTestConfig())
+        self.streamed_edf_file = EdfFile(path=path, config=EdfFileTestConfig(), streaming=True)
+
+    def tearDown(self) -> None:
+        self.streamed_edf_file.close()
+
+    def test_load__same_info_as_mne(self):
+        # THEN
+        self.assertListEqual(self.edf_file.channel_names, self.streamed_edf_file.channel_names)
+        self.assertEqual(self.edf_file.sampling_frequency,
+                         self.streamed_edf_file.sampling_frequency)
+        self.assertEqual(self.edf_file.n_times, self.streamed_edf_file.n_times)
+
+    def test_to_numpy__same_data_as_mne(self):
+        # GIVEN
+        picks = [2, 0, 1]
+        start, stop = 100, 2000
+
+        # WHEN
+        actual = self.streamed_edf_file.to_numpy(picks=picks, start=start, stop=stop)
+
+        # THEN
+        expected = self.edf_file.to_numpy(picks=picks, start=start, stop=stop)
+        np.testing.assert_allclose(actual, expected, atol=1e-12)
+
+
 class TestEdfProcessor(IntegrationTestCase):
 
     def setUp(self) -> None:
@@ -65,14 +96,17 @@ class TestEdfProcessor(IntegrationTestCase):
         duration = self.edf_file.raw.n_times / self.edf_file.raw.info['sfreq']
         expected_duration = segment_len * int(duration / segment_len)
 
-        self.edf_file.channel_setup = common_channels
+        sfreq = self.edf_file.sampling_frequency
+        channel_names = list(self.edf_file.channel_names)
 
         # WHEN
         self.edf_processor._modify_for_classification()
 
         # THEN
-        self.assertSetEqual(set(self.edf_processor.edf_record.channel_names), set(common_channels))
-        self.assertEqual(self.edf_processor.edf_record.duration, expected_duration)
+        picked_channels = [channel_names[idx] for idx in self.edf_processor.channel_picks]
+        self.assertSetEqual(set(picked_channels), set(common_channels))
+        self.assertEqual(self.edf_processor.n_times, int(expected_duration * sfreq))
+        self.assertListEqual(self.edf_file.channel_names, channel_names)
 
     def test_process__return_correct_shape(self):
         # GIVEN
@@ -83,9 +117,9 @@ class TestEdfProcessor(IntegrationTestCase):
         processed_array = self.edf_processor.process()
 
         sfreq = self.edf_processor.edf_record.sampling_frequency
-        channel_num = len(self.edf_processor.edf_record.channel_names)
+        channel_num = len(self.edf_processor.channel_picks)
         frame_times = int(segment_len / frame_num) * sfreq
-        segment_num = self.edf_processor.edf_record.duration / segment_len
+        segment_num = self.edf_processor.n_times / sfreq / segment_len
 
         # THEN
         expected_shape = (segment_num, frame_num, channel_num, frame_times)
@@ -1,11 +1,16 @@
+import io
 import json
+import mmap
+from tempfile import TemporaryFile
 from unittest.mock import MagicMock, patch
 
 import numpy as np
 
 from eeg_web_assistant.core.classification_types import ClassificationType
-from eeg_web_assistant.core.edf_file import EdfFile, EdfProcessor
+from eeg_web_assistant.core.edf_file import EdfFile, EdfProcessor, EdfUploadProbe, probe_edf
+from eeg_web_assistant.core.edf_reader import EdfReader
 from tests.unit import UnitTestCase
+from tests.unit.test_core.test_edf_reader import create_edf_bytes
 
 DATA_DIR = UnitTestCase.FIXTURE_DIR.joinpath('edf_processing')
 
@@ -116,6 +121,203 @@ class TestEdfFile(UnitTestCase):
         self.assertEqual(new_duration, self.edf_file.duration)
 
 
+class TestEdfFileBuffer(UnitTestCase):
+
+    def setUp(self) -> None:
+        self.digital = np.random.randint(low=-32768, high=32767, dtype=np.int16, size=(3, 16 * 4))
+        self.labels = ['EEG FP1-REF', 'PHOTIC-REF', 'EEG CZ-REF']
+        self.edf_bytes = create_edf_bytes(digital=self.digital, labels=self.labels,
+                                          samples_per_record=[16] * 3)
+
+        self.expected = EdfReader(io.BytesIO(self.edf_bytes)).read(picks=[0, 2])
+
+    def test_init__from_bytes(self):
+        # WHEN
+        edf_file = EdfFile(buffer=self.edf_bytes, config=EdfFileTestConfig())
+
+        # THEN
+        self.assertTrue(edf_file.streaming)
+        self.assertListEqual(['EEG FP1-REF', 'EEG CZ-REF'], edf_file.channel_names)
+        np.testing.assert_array_equal(self.expected, edf_file.to_numpy())
+
+    def test_to_numpy__float32_windows(self):
+        # GIVEN
+        edf_file = EdfFile(buffer=self.edf_bytes, config=EdfFileTestConfig(), dtype=np.float32)
+        resampled_edf_file = EdfFile(buffer=self.edf_bytes, config=EdfFileTestConfig(),
+                                     dtype=np.float32)
+        resampled_edf_file.resample(new_sfreq=8)
+
+        # WHEN
+        actual = edf_file.to_numpy(start=5, stop=40)
+        resampled = resampled_edf_file.to_numpy(start=2, stop=20)
+
+        # THEN
+        self.assertEqual(np.float32, actual.dtype)
+        np.testing.assert_allclose(self.expected[:, 5:40], actual, rtol=1e-6)
+        self.assertEqual(np.float32, resampled.dtype)
+
+    def test_to_numpy__resampled_fragment_equal_to_whole_signal(self):
+        # GIVEN
+        digital = np.random.randint(low=-32768, high=32767, dtype=np.int16, size=(3, 16 * 40))
+        edf_bytes = create_edf_bytes(digital=digital, labels=self.labels,
+                                     samples_per_record=[16] * 3)
+
+        for new_sfreq in (8, 12, 24):
+            with self.subTest(new_sfreq=new_sfreq):
+                edf_file = EdfFile(buffer=edf_bytes, config=EdfFileTestConfig())
+                edf_file.resample(new_sfreq=new_sfreq)
+                expected = edf_file.to_numpy()
+
+                # WHEN
+                fragments = [(start, stop, edf_file.to_numpy(start=start, stop=stop))
+                             for start, stop in ((0, 50), (101, 173), (200, edf_file.n_times))]
+
+                # THEN
+                self.assertEqual(40 * new_sfreq, expected.shape[1])
+                for start, stop, fragment in fragments:
+                    np.testing.assert_allclose(expected[:, start:stop], fragment, rtol=1e-9,
+                                               atol=1e-12)
+
+    def test_change_duration__after_resample(self):
+        # GIVEN
+        digital = np.random.randint(low=-32768, high=32767, dtype=np.int16, size=(3, 16 * 40))
+        edf_bytes = create_edf_bytes(digital=digital, labels=self.labels,
+                                     samples_per_record=[16] * 3)
+        edf_file = EdfFile(buffer=edf_bytes, config=EdfFileTestConfig())
+        edf_file.resample(new_sfreq=12)
+        expected = edf_file.to_numpy()
+
+        # WHEN
+        edf_file.change_duration(new_duration=30)
+
+        # THEN
+        self.assertEqual(12, edf_file.sampling_frequency)
+        self.assertEqual(30, edf_file.duration)
+        self.assertEqual(30 * 12, edf_file.n_times)
+        np.testing.assert_allclose(expected[:, 100:200], edf_file.to_numpy(start=100, stop=200),
+                                   rtol=1e-9, atol=1e-12)
+
+    def test_change_duration__out_of_recording_duration(self):
+        # GIVEN
+        edf_file = EdfFile(buffer=self.edf_bytes, config=EdfFileTestConfig())
+
+        for new_duration in (0, -1, edf_file.duration + 1):
+            with self.subTest(new_duration=new_duration):
+                # WHEN
+                with self.assertRaises(ValueError):
+                    edf_file.change_duration(new_duration=new_duration)
+
+                # THEN
+                self.assertEqual(4, edf_file.duration)
+                self.assertEqual(16 * 4, edf_file.n_times)
+
+    def test_init__from_memory_mapped_file(self):
+        # GIVEN
+        with TemporaryFile() as f:
+            f.write(self.edf_bytes)
+            f.flush()
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                # WHEN
+                edf_file = EdfFile(buffer=buffer, config=EdfFileTestConfig())
+
+                # THEN
+                np.testing.assert_array_equal(self.expected, edf_file.to_numpy())
+
+    def test_init__without_path_and_buffer(self):
+        # WHEN & THEN
+        self.assertRaises(ValueError, EdfFile, config=EdfFileTestConfig())
+
+
+class TestProbeEdf(UnitTestCase):
+
+    def setUp(self) -> None:
+        digital = np.random.randint(low=-32768, high=32767, dtype=np.int16, size=(3, 16 * 4))
+        self.edf_bytes = create_edf_bytes(
+            digital=digital, labels=['EEG FP1-REF', 'PHOTIC-REF', 'EEG CZ-REF'],
+            samples_per_record=[16] * 3,
+            patient_id='00000254 F 02-MAR-1980 Anna_Nowak',
+            recording_id='Startdate 02-MAR-2004 X X X'
+        )
+
+    def test_probe_edf__equal_to_edf_file_info(self):
+        # GIVEN
+        edf_file = EdfFile(buffer=self.edf_bytes, config=EdfFileTestConfig())
+
+        # WHEN
+        metadata = probe_edf(self.edf_bytes, config=EdfFileTestConfig())
+
+        # THEN
+        self.assertListEqual(edf_file.channel_names, metadata.ch_names)
+        self.assertEqual(edf_file.sampling_frequency, metadata.sampling_frequency)
+        self.assertEqual(edf_file.n_times, metadata.n_times)
+        self.assertEqual(edf_file.duration, metadata.duration)
+        self.assertEqual(edf_file.highpass, metadata.highpass)
+        self.assertEqual(edf_file.lowpass, metadata.lowpass)
+        self.assertEqual(edf_file.measure_date, metadata.measure_date)
+        self.assertDictEqual(edf_file.subject_info, metadata.subject_info)
+
+    @patch('eeg_web_assistant.core.edf_reader.EdfReader._read_records')
+    def test_probe_edf__data_records_not_read(self, read_records):
+        # WHEN
+        metadata = probe_edf(io.BytesIO(self.edf_bytes), config=EdfFileTestConfig())
+
+        # THEN
+        self.assertEqual(4, metadata.duration)
+        read_records.assert_not_called()
+
+    def test_probe_edf__raise_error_when_header_truncated(self):
+        # WHEN & THEN
+        self.assertRaises(ValueError, probe_edf, self.edf_bytes[:300], config=EdfFileTestConfig())
+
+
+class TestEdfUploadProbe(UnitTestCase):
+
+    def setUp(self) -> None:
+        digital = np.random.randint(low=-32768, high=32767, dtype=np.int16, size=(3, 16 * 4))
+        self.edf_bytes = create_edf_bytes(digital=digital,
+                                          labels=['EEG FP1-REF', 'PHOTIC-REF', 'EEG CZ-REF'],
+                                          samples_per_record=[16] * 3)
+        self.probe = EdfUploadProbe(config=EdfFileTestConfig())
+
+    def update(self, data: bytes, chunk_size: int):
+        for start in range(0, len(data), chunk_size):
+            self.probe.update(data[start:start + chunk_size])
+
+    def test_get_metadata__equal_to_probe_of_whole_file(self):
+        for chunk_size in (100, 256, 1024, len(self.edf_bytes)):
+            with self.subTest(chunk_size=chunk_size):
+                # GIVEN
+                self.probe = EdfUploadProbe(config=EdfFileTestConfig())
+
+                # WHEN
+                self.update(self.edf_bytes, chunk_size=chunk_size)
+
+                # THEN
+                self.assertEqual(probe_edf(self.edf_bytes, config=EdfFileTestConfig()),
+                                 self.probe.get_metadata())
+                self.assertEqual(len(self.edf_bytes), self.probe.size)
+
+    def test_update__header_read_from_first_chunks(self):
+        # WHEN
+        self.update(self.edf_bytes[:4 * 256], chunk_size=100)
+
+        # THEN
+        self.assertIsNotNone(self.probe.header)
+        self.assertEqual(4., self.probe.header.declared_duration)
+
+    def test_update__raise_error_when_header_bad(self):
+        # WHEN & THEN
+        self.assertRaises(ValueError, self.probe.update, b'x' * 1024)
+
+    def test_get_metadata__raise_error_when_header_incomplete(self):
+        # GIVEN
+        self.probe.update(self.edf_bytes[:300])
+
+        # WHEN & THEN
+        self.assertRaises(ValueError, self.probe.get_metadata)
+
+
 class TestEdfProcessor(UnitTestCase):
     def setUp(self) -> None:
         edf_record = MagicMock()
@@ -146,6 +348,63 @@ class TestEdfProcessor(UnitTestCase):
         self.assertEqual(expected_frame_len, self.edf_processor.frame_len)
         self.assertSetEqual(set(expected_channels), set(self.edf_processor.common_channels))
 
+    def test_get_processing_params(self):
+        # GIVEN
+        edf_record = MagicMock()
+        edf_record.channel_names = ['EEG FP1-REF', 'EEG EKG-REF', 'EEG FP2-REF']
+        edf_record.sampling_frequency = 250.
+        edf_record.duration = 40
+        edf_record.dtype = np.dtype(np.float32)
+        edf_record.signal_source = 'edf'
+
+        self.edf_processor.edf_record = edf_record
+        self.edf_processor.classification_type = ClassificationType.SEIZURE
+        self.edf_processor.config = EdfProcessorCorrectTestConfig()
+
+        # WHEN
+        params = self.edf_processor.get_processing_params()
+
+        # THEN
+        self.assertDictEqual({'segment_len': 16, 'frames_amount': 8,
+                              'channels': ['EEG FP1-REF', 'EEG FP2-REF'], 'sfreq': 250.,
+                              'n_times': 8000, 'dtype': 'float32', 'signal_source': 'edf'},
+                             params)
+        self.assertListEqual([(0, 4000), (4000, 8000)], self.edf_processor.segment_cuts)
+
+    def test_group_by_channels__types_with_same_channels_grouped(self):
+        # GIVEN
+        with EdfProcessorCorrectTestConfig().EDF_CHANNELS_SETUP.open(mode='r') as f:
+            edf_chan_setup = json.load(f)
+
+        edf_record = MagicMock()
+        edf_record.channel_names = edf_chan_setup['artifact'] + ['EEG EKG-REF']
+
+        # WHEN
+        groups = EdfProcessor.group_by_channels(edf_record=edf_record,
+                                                classification_types=list(ClassificationType),
+                                                config=EdfProcessorCorrectTestConfig())
+
+        # THEN
+        self.assertListEqual([[ClassificationType.ABNORMAL, ClassificationType.SEIZURE],
+                              [ClassificationType.ARTIFACT]], groups)
+
+    def test_group_by_channels__types_with_same_picked_channels_grouped(self):
+        # GIVEN
+        with EdfProcessorCorrectTestConfig().EDF_CHANNELS_SETUP.open(mode='r') as f:
+            edf_chan_setup = json.load(f)
+
+        # record without the channels only artifact classification uses
+        edf_record = MagicMock()
+        edf_record.channel_names = edf_chan_setup['abnormal']
+
+        # WHEN
+        groups = EdfProcessor.group_by_channels(edf_record=edf_record,
+                                                classification_types=list(ClassificationType),
+                                                config=EdfProcessorCorrectTestConfig())
+
+        # THEN
+        self.assertListEqual([list(ClassificationType)], groups)
+
     def test_load_config__raise_error(self):
         # GIVEN
         self.edf_processor.frames_num = EdfProcessorErrorTestConfig.TIMEFRAMES_AMOUNT
@@ -169,7 +428,7 @@ class TestEdfProcessor(UnitTestCase):
             min_val, max_val = params['min_val'], params['max_val']
 
             with self.subTest(test_num=i):
-                self.edf_processor.edf_record.min_max_value = (min_val, max_val)
+                self.edf_processor._min_max_value = MagicMock(return_value=(min_val, max_val))
 
                 # WHEN
                 actual = self.edf_processor._normalize(input_array)
@@ -177,6 +436,42 @@ class TestEdfProcessor(UnitTestCase):
                 # THEN
                 np.testing.assert_array_equal(actual, output_array)
 
+    def test_min_max_value(self):
+        # GIVEN
+        input_array = np.random.uniform(low=-1.5, high=1.7, size=(3, 4, 20))
+
+        # WHEN
+        actual = self.edf_processor._min_max_value(input_array)
+
+        # THEN
+        self.assertTupleEqual((np.amin(input_array), np.amax(input_array)), actual)
+
+    def test_normalize__in_place(self):
+        # GIVEN
+        input_array = np.random.uniform(low=-1.5, high=1.7, size=(3, 4, 20))
+
+        # WHEN
+        actual = self.edf_processor._normalize(input_array)
+
+        # THEN
+        self.assertIs(input_array, actual)
+        self.assertAlmostEqual(-1., np.amin(actual))
+        self.assertAlmostEqual(1., np.amax(actual))
+
+    def test_normalize__float32_in_place(self):
+        # GIVEN
+        input_array = np.random.uniform(low=-1.5, high=1.7, size=(3, 4, 20))
+        expected = self.edf_processor._normalize(input_array.copy())
+        float32_array = input_array.astype(np.float32)
+
+        # WHEN
+        actual = self.edf_processor._normalize(float32_array)
+
+        # THEN
+        self.assertIs(float32_array, actual)
+        self.assertEqual(np.float32, actual.dtype)
+        np.testing.assert_allclose(expected, actual, rtol=1e-5, atol=1e-6)
+
     def test_split_to_segments(self):
         # GIVEN
         with DATA_DIR.joinpath('test_split_segments.json').open() as f:
@@ -203,6 +498,40 @@ class TestEdfProcessor(UnitTestCase):
             self.assertEqual(actual_output.shape[-1], segment_len * sfreq)
             self.assertListEqual(expected_segment_cuts, self.edf_processor.segment_cuts)
 
+    def test_split_to_segments__view_of_record_array(self):
+        # GIVEN
+        sfreq, segment_len = 10, 16
+        input_array = np.random.uniform(size=(4, 3 * segment_len * sfreq))
+
+        self.edf_processor.edf_record.to_numpy = MagicMock(return_value=input_array)
+        self.edf_processor.edf_record.duration = 3 * segment_len
+        self.edf_processor.edf_record.sampling_frequency = sfreq
+        self.edf_processor.segment_len = segment_len
+
+        # WHEN
+        actual_output = self.edf_processor._split_to_segments()
+
+        # THEN
+        self.assertTupleEqual((3, 4, segment_len * sfreq), actual_output.shape)
+        self.assertTrue(np.shares_memory(actual_output, input_array))
+
+    def test_split_to_frames__view_of_segmented_array(self):
+        # GIVEN
+        sfreq, segment_len, frame_amount = 10, 16, 8
+        input_array = np.random.uniform(size=(3, 4, segment_len * sfreq))
+
+        self.edf_processor.edf_record.sampling_frequency = sfreq
+        self.edf_processor.segment_len = segment_len
+        self.edf_processor.frame_len = segment_len / frame_amount
+
+        # WHEN
+        actual_output = self.edf_processor._split_to_frames(segmented_array=input_array)
+
+        # THEN
+        self.assertTupleEqual((3, frame_amount, 4, sfreq * segment_len // frame_amount),
+                              actual_output.shape)
+        self.assertTrue(np.shares_memory(actual_output, input_array))
+
     def test_split_to_frames(self):
         # GIVEN
         with DATA_DIR.joinpath('test_split_frames.json').open() as f:
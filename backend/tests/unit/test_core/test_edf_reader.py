@@ -0,0 +1,167 @@
+import io
+from datetime import datetime, timezone
+from typing import List
+
+import numpy as np
+from scipy.signal import resample_poly
+
+from eeg_web_assistant.core.edf_reader import EdfReader
+from tests.unit import UnitTestCase
+
+
+def create_edf_bytes(digital: np.ndarray, samples_per_record: List[int], labels: List[str],
+                     record_duration: int = 1, physical_range=(-500., 500.),
+                     digital_range=(-32768, 32767), patient_id: str = 'X X X X',
+                     recording_id: str = 'Startdate X X X X') -> bytes:
+    # digital: (signals, records * samples_per_record) int16 samples of equal rate signals,
+    # signals with lower samples_per_record take the first samples of their row
+    signals_amount = len(labels)
+    records_amount = digital.shape[1] // max(samples_per_record)
+
+    def field(value, width: int) -> bytes:
+        return str(value).ljust(width).encode('latin-1')
+
+    header = b''.join([field(0, 8), field(patient_id, 80), field(recording_id, 80),
+                       field('02.03.04', 8), field('10.20.30', 8),
+                       field(256 * (signals_amount + 1), 8), field('EDF+C', 44),
+                       field(records_amount, 8), field(record_duration, 8),
+                       field(signals_amount, 4)])
+
+    signal_fields = [(labels, 16), (['AgAgCl'] * signals_amount, 80), (['uV'] * signals_amount, 8),
+                     ([physical_range[0]] * signals_amount, 8),
+                     ([physical_range[1]] * signals_amount, 8),
+                     ([digital_range[0]] * signals_amount, 8),
+                     ([digital_range[1]] * signals_amount, 8),
+                     (['HP:0.5Hz LP:70Hz'] * signals_amount, 80), (samples_per_record, 8),
+                     ([''] * signals_amount, 32)]
+    for values, width in signal_fields:
+        header += b''.join(field(value, width) for value in values)
+
+    records = []
+    for record in range(records_amount):
+        for signal, samples in enumerate(samples_per_record):
+            records.append(digital[signal, record * samples:(record + 1) * samples])
+
+    return header + np.concatenate(records).astype('<i2').tobytes()
+
+
+class TestEdfReader(UnitTestCase):
+
+    def setUp(self) -> None:
+        self.sfreq = 16
+        self.records_amount = 5
+        self.digital = np.random.randint(low=-32768, high=32767, dtype=np.int16,
+                                         size=(3, self.sfreq * self.records_amount))
+        self.labels = ['EEG FP1-REF', 'EEG FP2-REF', 'EEG CZ-REF']
+
+        edf_bytes = create_edf_bytes(digital=self.digital, labels=self.labels,
+                                     samples_per_record=[self.sfreq] * 3,
+                                     patient_id='00000254 F 02-MAR-1980 Anna_Maria_Nowak hand=1',
+                                     recording_id='Startdate 02-MAR-2004 X X X')
+        self.reader = EdfReader(io.BytesIO(edf_bytes))
+
+        gain = 1000. / 65535 * 1e-6
+        offset = (-500. + 32768 * 1000. / 65535) * 1e-6
+        self.expected = self.digital * gain + offset
+
+    def test_header__signals_info(self):
+        # THEN
+        self.assertListEqual(self.labels, self.reader.ch_names)
+        self.assertEqual(self.sfreq, self.reader.sampling_frequency)
+        self.assertEqual(self.sfreq * self.records_amount, self.reader.n_times)
+        self.assertEqual(0.5, self.reader.highpass)
+        self.assertEqual(70., self.reader.lowpass)
+
+    def test_header__measure_date_and_subject_info(self):
+        # THEN
+        self.assertEqual(datetime(2004, 3, 2, 10, 20, 30, tzinfo=timezone.utc),
+                         self.reader.header.measure_date)
+        self.assertDictEqual({'his_id': '00000254', 'sex': 2, 'birthday': (1980, 3, 2),
+                              'first_name': 'Anna', 'middle_name': 'Maria',
+                              'last_name': 'Nowak', 'hand': 1},
+                             self.reader.header.subject_info)
+
+    def test_read__whole_recording(self):
+        # WHEN
+        actual = self.reader.read()
+
+        # THEN
+        np.testing.assert_allclose(actual, self.expected, rtol=1e-12)
+
+    def test_read__float32(self):
+        # WHEN
+        data = self.reader.read(start=10, stop=40, dtype=np.float32)
+
+        # THEN
+        self.assertEqual(np.float32, data.dtype)
+        np.testing.assert_allclose(self.expected[:, 10:40], data, rtol=1e-6)
+
+    def test_read_digital__window_across_records(self):
+        # WHEN
+        digital = self.reader.read_digital(picks=[1], start=10, stop=40)
+
+        # THEN
+        self.assertEqual(np.int16, digital.dtype)
+        np.testing.assert_array_equal(self.digital[[1], 10:40], digital)
+
+    def test_read__window_across_records(self):
+        # WHEN
+        actual = self.reader.read(picks=[2, 0], start=5, stop=39)
+
+        # THEN
+        np.testing.assert_allclose(actual, self.expected[[2, 0], 5:39], rtol=1e-12)
+
+    def test_read__wrong_range(self):
+        # WHEN & THEN
+        self.assertRaises(ValueError, self.reader.read, start=10, stop=5)
+
+    def test_read__skip_annotations_signal(self):
+        # GIVEN
+        digital = np.concatenate([self.digital, np.zeros((1, self.digital.shape[1]))])
+        edf_bytes = create_edf_bytes(digital=digital,
+                                     labels=self.labels + ['EDF Annotations'],
+                                     samples_per_record=[self.sfreq] * 3 + [4])
+
+        # WHEN
+        reader = EdfReader(io.BytesIO(edf_bytes))
+
+        # THEN
+        self.assertListEqual(self.labels, reader.ch_names)
+        np.testing.assert_allclose(reader.read(), self.expected, rtol=1e-12)
+
+    def test_read__different_sampling_frequency(self):
+        # GIVEN
+        edf_bytes = create_edf_bytes(digital=self.digital, labels=self.labels,
+                                     samples_per_record=[self.sfreq, self.sfreq, 4])
+        reader = EdfReader(io.BytesIO(edf_bytes))
+        lower_rate = self.expected[2, :4 * self.records_amount]
+
+        # WHEN
+        actual = reader.read()
+
+        # THEN
+        self.assertEqual((3, self.sfreq * self.records_amount), actual.shape)
+        np.testing.assert_allclose(actual[:2], self.expected[:2], rtol=1e-12)
+        np.testing.assert_allclose(actual[2], resample_poly(lower_rate, up=self.sfreq, down=4),
+                                   rtol=1e-9, atol=1e-12)
+
+    def test_read__different_sampling_frequency_window(self):
+        # GIVEN
+        digital = np.random.randint(low=-32768, high=32767, dtype=np.int16, size=(2, 16 * 40))
+        edf_bytes = create_edf_bytes(digital=digital, labels=self.labels[:2],
+                                     samples_per_record=[16, 1])
+        reader = EdfReader(io.BytesIO(edf_bytes))
+        expected = reader.read()
+
+        # WHEN
+        actual = reader.read(start=300, stop=350)
+        actual_digital = reader.read_digital(start=300, stop=350)
+
+        # THEN
+        np.testing.assert_allclose(actual, expected[:, 300:350], rtol=1e-9, atol=1e-12)
+        np.testing.assert_array_equal(reader.read_digital()[:, 300:350], actual_digital)
+        np.testing.assert_array_equal(digital[0, 300:350], actual_digital[0])
+
+    def test_init__truncated_file(self):
+        # WHEN & THEN
+        self.assertRaises(ValueError, EdfReader, io.BytesIO(b'0       too short'))
@@ -0,0 +1,61 @@
+from eeg_web_assistant.core.features_key import get_features_key, get_raw_hash, get_raw_hasher
+from tests.unit import UnitTestCase
+
+
+class TestFeaturesKey(UnitTestCase):
+
+    def setUp(self) -> None:
+        self.raw_hash = get_raw_hash(b'raw edf data')
+        self.processing_params = {'segment_len': 16, 'frames_amount': 8,
+                                  'channels': ['EEG FP1-REF', 'EEG FP2-REF'], 'sfreq': 250.,
+                                  'n_times': 8000, 'signal_source': 'edf'}
+        self.features_params = {'features': ('mean', 'variance'), 'bands': ('Delta', 'Theta')}
+
+    def test_get_features_key__same_for_same_params(self):
+        # WHEN
+        key = get_features_key(raw_hash=self.raw_hash, processing_params=self.processing_params,
+                               features_params=self.features_params)
+        same_key = get_features_key(raw_hash=get_raw_hash(b'raw edf data'),
+                                    processing_params=dict(reversed(
+                                        self.processing_params.items())),
+                                    features_params=self.features_params)
+
+        # THEN
+        self.assertEqual(key, same_key)
+
+    def test_get_features_key__changes_with_any_param(self):
+        # GIVEN
+        key = get_features_key(raw_hash=self.raw_hash, processing_params=self.processing_params,
+                               features_params=self.features_params)
+
+        params = [
+            (get_raw_hash(b'other edf data'), self.processing_params, self.features_params),
+            (self.raw_hash, {**self.processing_params, 'segment_len': 8}, self.features_params),
+            (self.raw_hash, {**self.processing_params, 'channels': ['EEG FP1-REF']},
+             self.features_params),
+            (self.raw_hash, {**self.processing_params, 'signal_source': 'signal_blocks'},
+             self.features_params),
+            (self.raw_hash, self.processing_params, {**self.features_params, 'bands': ('Delta',)}),
+        ]
+
+        for raw_hash, processing_params, features_params in params:
+            with self.subTest(processing_params=processing_params,
+                              features_params=features_params):
+                # WHEN
+                other_key = get_features_key(raw_hash=raw_hash,
+                                             processing_params=processing_params,
+                                             features_params=features_params)
+
+                # THEN
+                self.assertNotEqual(key, other_key)
+
+    def test_get_raw_hasher__equal_to_raw_hash_of_joined_chunks(self):
+        # GIVEN
+        raw_hasher = get_raw_hasher()
+
+        # WHEN
+        for chunk in (b'raw ', b'edf ', b'data'):
+            raw_hasher.update(chunk)
+
+        # THEN
+        self.assertEqual(self.raw_hash, raw_hasher.hexdigest())
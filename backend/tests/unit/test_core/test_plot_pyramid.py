@@ -0,0 +1,75 @@
+import numpy as np
+
+from eeg_web_assistant.core.plot_pyramid import PlotPyramid
+from tests.unit import UnitTestCase
+
+
+class PlotPyramidTestConfig:
+    PYRAMID_BUCKET_SIZE = 4
+    PYRAMID_FACTOR = 2
+    PYRAMID_MIN_BUCKETS = 3
+
+
+class TestPlotPyramid(UnitTestCase):
+
+    def setUp(self) -> None:
+        self.array = np.random.uniform(low=-1., high=1., size=(3, 30))
+
+        # windows of 8 samples, the last one incomplete
+        windows = [self.array[:, t:t + 8] for t in range(0, 30, 8)]
+        self.pyramid = PlotPyramid.build(windows=windows, n_times=30,
+                                         config=PlotPyramidTestConfig())
+
+    def test_build__levels(self):
+        # THEN
+        self.assertTupleEqual((4, 8, 16), self.pyramid.bucket_sizes)
+        self.assertTupleEqual((3, 8, 2), self.pyramid.levels[4].shape)
+        self.assertTupleEqual((3, 4, 2), self.pyramid.levels[8].shape)
+        self.assertTupleEqual((3, 2, 2), self.pyramid.levels[16].shape)
+
+    def test_build__min_max_of_buckets(self):
+        for bucket_size in self.pyramid.bucket_sizes:
+            with self.subTest(bucket_size=bucket_size):
+                # GIVEN
+                expected = [[(self.array[ch, t:t + bucket_size].min(),
+                              self.array[ch, t:t + bucket_size].max())
+                             for t in range(0, 30, bucket_size)] for ch in range(3)]
+
+                # THEN
+                np.testing.assert_allclose(self.pyramid.levels[bucket_size], expected,
+                                           rtol=1e-6)
+
+    def test_to_bytes__from_bytes(self):
+        # WHEN
+        pyramid = PlotPyramid.from_bytes(self.pyramid.to_bytes())
+
+        # THEN
+        self.assertEqual(self.pyramid.n_times, pyramid.n_times)
+        self.assertTupleEqual(self.pyramid.bucket_sizes, pyramid.bucket_sizes)
+        for bucket_size in self.pyramid.bucket_sizes:
+            np.testing.assert_array_equal(self.pyramid.levels[bucket_size],
+                                          pyramid.levels[bucket_size])
+
+    def test_select_bucket_size(self):
+        params = [
+            # start, stop, width, expected bucket size
+            (0, 30, 1, 16),
+            (0, 30, 3, 8),
+            (0, 30, 6, 4),
+            (0, 30, 10, None),
+            (8, 24, 2, 8),
+        ]
+
+        for start, stop, width, expected in params:
+            with self.subTest(start=start, stop=stop, width=width):
+                # WHEN & THEN
+                self.assertEqual(expected, self.pyramid.select_bucket_size(start=start, stop=stop,
+                                                                           width=width))
+
+    def test_get_range(self):
+        # WHEN
+        first_idx, level = self.pyramid.get_range(bucket_size=8, start=10, stop=30)
+
+        # THEN
+        self.assertEqual(8, first_idx)
+        np.testing.assert_array_equal(self.pyramid.levels[8][:, 1:4], level)
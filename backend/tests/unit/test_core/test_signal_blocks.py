@@ -0,0 +1,121 @@
+import io
+import zlib
+
+import numpy as np
+
+from eeg_web_assistant.core.edf_file import EdfFile
+from eeg_web_assistant.core.edf_reader import EdfReader
+from eeg_web_assistant.core.signal_blocks import SignalBlockReader, write_signal_blocks
+from tests.unit import UnitTestCase
+from tests.unit.test_core.test_edf_file import EdfFileTestConfig
+from tests.unit.test_core.test_edf_reader import create_edf_bytes
+
+
+class ReadCountingFile(io.BytesIO):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.bytes_read = 0
+
+    def read(self, size=-1) -> bytes:
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+class TestSignalBlocks(UnitTestCase):
+
+    def setUp(self) -> None:
+        self.sfreq = 16
+        digital = np.random.randint(low=-32768, high=32767, dtype=np.int16,
+                                    size=(3, self.sfreq * 10))
+        self.edf_bytes = create_edf_bytes(digital=digital,
+                                          labels=['EEG FP1-REF', 'PHOTIC-REF', 'EEG CZ-REF'],
+                                          samples_per_record=[self.sfreq] * 3)
+        self.edf_reader = EdfReader(io.BytesIO(self.edf_bytes))
+
+        blocks_file = io.BytesIO()
+        self.info = write_signal_blocks(self.edf_reader, file=blocks_file, compress=zlib.compress,
+                                        block_seconds=3)
+        self.blocks_file = ReadCountingFile(blocks_file.getvalue())
+        self.blocks_reader = SignalBlockReader(self.blocks_file, info=self.info,
+                                               decompress=zlib.decompress)
+
+    def test_write_signal_blocks__info(self):
+        # THEN
+        self.assertListEqual(self.edf_reader.ch_names, self.blocks_reader.ch_names)
+        self.assertEqual(self.edf_reader.sampling_frequency, self.blocks_reader.sampling_frequency)
+        self.assertEqual(self.edf_reader.n_times, self.blocks_reader.n_times)
+        self.assertEqual(3 * self.sfreq, self.info['block_n_times'])
+        self.assertEqual(5, len(self.info['block_offsets']))
+
+    def test_read__equal_to_edf_reader(self):
+        ranges = [(0, None), (0, 48), (5, 40), (40, 100), (150, 160), (20, 20), (100, 500)]
+        for start, stop in ranges:
+            with self.subTest(start=start, stop=stop):
+                # WHEN
+                actual = self.blocks_reader.read(picks=[2, 0], start=start, stop=stop)
+
+                # THEN
+                np.testing.assert_array_equal(
+                    self.edf_reader.read(picks=[2, 0], start=start, stop=stop), actual)
+
+    def test_read__only_overlapping_blocks(self):
+        # WHEN
+        self.blocks_reader.read(start=50, stop=60)
+
+        # THEN
+        block_offsets = self.info['block_offsets']
+        self.assertEqual(block_offsets[2] - block_offsets[1], self.blocks_file.bytes_read)
+
+    def test_read__wrong_range(self):
+        # WHEN & THEN
+        self.assertRaises(ValueError, self.blocks_reader.read, start=20, stop=10)
+
+    def test_edf_file__from_signal_blocks_equal_to_buffer(self):
+        # GIVEN
+        edf_file = EdfFile(buffer=self.edf_bytes, config=EdfFileTestConfig())
+        edf_file.resample(new_sfreq=8)
+
+        # WHEN
+        blocks_edf_file = EdfFile(blocks=self.blocks_reader, config=EdfFileTestConfig())
+        blocks_edf_file.resample(new_sfreq=8)
+
+        # THEN
+        self.assertListEqual(['EEG FP1-REF', 'EEG CZ-REF'], blocks_edf_file.channel_names)
+        self.assertEqual(edf_file.n_times, blocks_edf_file.n_times)
+        np.testing.assert_array_equal(edf_file.to_numpy(start=10, stop=30),
+                                      blocks_edf_file.to_numpy(start=10, stop=30))
+
+    def test_edf_file__signal_source(self):
+        # WHEN
+        edf_file = EdfFile(buffer=self.edf_bytes, config=EdfFileTestConfig())
+        blocks_edf_file = EdfFile(blocks=self.blocks_reader, config=EdfFileTestConfig())
+
+        # THEN
+        self.assertEqual('edf', edf_file.signal_source)
+        self.assertEqual('signal_blocks', blocks_edf_file.signal_source)
+
+    def test_write_signal_blocks__only_channels_kept_after_exclusion(self):
+        # GIVEN
+        digital = np.random.randint(low=-32768, high=32767, dtype=np.int16,
+                                    size=(3, self.sfreq * 10))
+        edf_bytes = create_edf_bytes(digital=digital,
+                                     labels=['EEG FP1-REF', 'BURSTS', 'EEG CZ-REF'],
+                                     samples_per_record=[self.sfreq, 1, self.sfreq])
+        edf_file = EdfFile(buffer=edf_bytes, config=EdfFileTestConfig())
+        blocks_file = io.BytesIO()
+
+        # WHEN
+        info = write_signal_blocks(edf_file.reader, file=blocks_file, compress=zlib.compress,
+                                   block_seconds=3, picks=edf_file.channel_indices)
+
+        # THEN
+        self.assertListEqual(['EEG FP1-REF', 'EEG CZ-REF'], info['ch_names'])
+        self.assertEqual(2, len(info['gains']))
+        self.assertEqual(2, len(info['offsets']))
+
+        blocks_reader = SignalBlockReader(io.BytesIO(blocks_file.getvalue()), info=info,
+                                          decompress=zlib.decompress)
+        blocks_edf_file = EdfFile(blocks=blocks_reader, config=EdfFileTestConfig())
+        self.assertListEqual(edf_file.channel_names, blocks_edf_file.channel_names)
+        np.testing.assert_array_equal(edf_file.to_numpy(), blocks_edf_file.to_numpy())
@@ -1,8 +1,9 @@
 import json
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import numpy as np
 
+from eeg_web_assistant.ml.data_processing.correlation import spearman_correlation
 from eeg_web_assistant.ml.data_processing.eeg_features import FeatureExtractor
 from tests.unit import UnitTestCase
 
@@ -19,6 +20,52 @@ class TestFeatureExtractor(UnitTestCase):
         self._run_array_equal_subtests(test_name='spearman_corr',
                                        fun=self.feature_extractor._spearman_correlation)
 
+    def test_spearman_correlation__rank_kernel_equal_to_pandas(self):
+        # GIVEN
+        with DATA_DIR.joinpath('test_spearman_corr.json').open() as f:
+            test_data = json.load(f)['spearman_corr']
+
+        frames = np.array([params['input'] for params in test_data])
+        expected = np.array([params['expected_output'] for params in test_data])
+
+        # WHEN
+        actual = spearman_correlation(frames)
+
+        # THEN
+        self.assertTupleEqual(expected.shape, actual.shape)
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12)
+
+    def test_spearman_correlation__rank_kernel_equal_to_pandas_with_ties(self):
+        # GIVEN
+        frames = np.random.randint(low=-3, high=3, size=(6, 4, 50)).astype(float)
+        expected = np.array([self.feature_extractor._spearman_correlation(frame)
+                             for frame in frames])
+
+        # WHEN
+        actual = spearman_correlation(frames)
+
+        # THEN
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12)
+
+    def test_spearman_correlation_batch__methods_equal(self):
+        # GIVEN
+        array = np.random.uniform(low=-1.5, high=2.3, size=(2, 3, 4, 20))
+        rank_extractor = FeatureExtractor(array=array, sfreq=10, correlation_method='rank')
+        pandas_extractor = FeatureExtractor(array=array, sfreq=10, correlation_method='pandas')
+
+        # WHEN
+        actual = rank_extractor._spearman_correlation_batch(array)
+        expected = pandas_extractor._spearman_correlation_batch(array)
+
+        # THEN
+        self.assertTupleEqual((2, 3, 4, 4), actual.shape)
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12)
+
+    def test_init__unsupported_correlation_method(self):
+        # WHEN & THEN
+        self.assertRaises(ValueError, FeatureExtractor, array=MagicMock(), sfreq=MagicMock(),
+                          correlation_method='kendall')
+
     def test_mean(self):
         self._run_array_equal_subtests(test_name='mean', fun=self.feature_extractor._mean)
 
@@ -62,6 +109,102 @@ class TestFeatureExtractor(UnitTestCase):
                 # THEN
                 np.testing.assert_array_equal(actual, expected_array)
 
+    def test_extract__batched_equal_to_per_frame(self):
+        # GIVEN
+        array = np.random.uniform(low=-1.5, high=1.7, size=(3, 8, 4, 128))
+        array[0, 0, 0, :16] = 0.5  # introduce ties for ranking
+
+        batched_extractor = FeatureExtractor(array=array, sfreq=64, batched=True)
+        per_frame_extractor = FeatureExtractor(array=array, sfreq=64, batched=False)
+
+        # WHEN
+        actual = batched_extractor.extract()
+        expected = per_frame_extractor.extract()
+
+        # THEN
+        self.assertTupleEqual(expected.shape, actual.shape)
+        np.testing.assert_allclose(actual, expected, rtol=1e-7, atol=1e-10)
+
+    def test_extract__parallel_equal_to_batched(self):
+        # GIVEN
+        # non-contiguous view of the input as processed EDF blocks are
+        array = np.random.uniform(low=-1.5, high=1.7, size=(8, 4, 5, 128)).transpose(0, 1, 3, 2)
+        array = array.swapaxes(-1, -2)
+
+        batched_extractor = FeatureExtractor(array=array, sfreq=64, workers=1)
+        parallel_extractor = FeatureExtractor(array=array, sfreq=64, workers=3)
+
+        # WHEN
+        actual = parallel_extractor.extract()
+        expected = batched_extractor.extract()
+
+        # THEN
+        self.assertTupleEqual(expected.shape, actual.shape)
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12)
+
+    def test_extract__float32_input_close_to_float64(self):
+        # GIVEN
+        array = np.random.uniform(low=-1., high=1., size=(4, 4, 5, 128))
+        expected = FeatureExtractor(array=array, sfreq=64, workers=1).extract()
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                # WHEN
+                actual = FeatureExtractor(array=array.astype(np.float32), sfreq=64,
+                                          workers=workers).extract()
+
+                # THEN
+                self.assertTupleEqual(expected.shape, actual.shape)
+                np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-5)
+
+    def test_extract__parallel_more_workers_than_segments(self):
+        # GIVEN
+        array = np.random.uniform(low=-1.5, high=1.7, size=(2, 4, 3, 64))
+        expected = FeatureExtractor(array=array, sfreq=64, workers=1).extract()
+
+        # WHEN
+        actual = FeatureExtractor(array=array, sfreq=64, workers=4).extract()
+
+        # THEN
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12)
+
+    @patch('eeg_web_assistant.ml.data_processing.eeg_features.multiprocessing.current_process')
+    @patch('eeg_web_assistant.ml.data_processing.eeg_features._get_pool')
+    def test_extract__single_process_in_daemonic_process(self, get_pool, current_process):
+        # GIVEN
+        current_process.return_value.daemon = True
+        array = np.random.uniform(low=-1.5, high=1.7, size=(4, 4, 3, 64))
+
+        # WHEN
+        actual = FeatureExtractor(array=array, sfreq=64, workers=4).extract()
+
+        # THEN
+        get_pool.assert_not_called()
+        self.assertTupleEqual((4, 4, 3, 14), actual.shape)
+
+    def test_bandpower_batch__equal_to_per_frame(self):
+        # GIVEN
+        array = np.random.uniform(low=-1.5, high=3.1, size=(2, 4, 3, 128))
+        extractor = FeatureExtractor(array=array, sfreq=64,
+                                     bands=('Delta', 'Theta', 'Alpha', 'Beta'))
+        expected = np.array([[extractor._bandpower(frame) for frame in segment]
+                             for segment in array])
+
+        # WHEN
+        actual = extractor._bandpower_batch(array)
+
+        # THEN
+        self.assertTupleEqual((2, 4, 3, 4), actual.shape)
+        np.testing.assert_allclose(actual, expected, rtol=1e-10, atol=1e-12)
+
+    def test_bandpower_batch__unsupported_band(self):
+        # GIVEN
+        array = np.random.uniform(low=-1.5, high=3.1, size=(2, 4, 3, 128))
+        extractor = FeatureExtractor(array=array, sfreq=64, bands=('Delta', 'Kappa'))
+
+        # WHEN & THEN
+        self.assertRaises(ValueError, extractor._bandpower_batch, array)
+
     def _run_array_equal_subtests(self, test_name: str, fun: callable):
         # GIVEN
         with DATA_DIR.joinpath(f'test_{test_name}.json').open() as f:
@@ -0,0 +1,86 @@
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from eeg_web_assistant.ml.experiments.export_model import export_tflite
+from eeg_web_assistant.ml.experiments.quantization import (compare_quantizations, evaluate_model,
+                                                           sample_calibration_data)
+from eeg_web_assistant.ml.models.insta_gat import InstaGAT
+from tests.unit import UnitTestCase
+
+
+class QuantizationTestConfig:
+    CALIBRATION_SAMPLES = 8
+    TFLITE_BATCH_SIZE = 4
+    TFLITE_THREADS = None
+
+
+class TestQuantization(UnitTestCase):
+
+    def setUp(self) -> None:
+        self.dims = (2, 4, 7)
+        self.x_test = np.random.uniform(size=(12, *self.dims)).astype(np.float32)
+        self.y_test = np.random.randint(0, 2, size=12)
+
+        self.model = InstaGAT(dims=self.dims, class_num=2, output_channels=4, hidden_units=8)
+        self.model(self.x_test)
+
+    def test_sample_calibration_data(self):
+        # WHEN
+        calibration_data = sample_calibration_data(self.x_test, config=QuantizationTestConfig())
+
+        # THEN
+        self.assertTupleEqual((8, *self.dims), calibration_data.shape)
+        self.assertEqual(np.float32, calibration_data.dtype)
+
+    @patch('eeg_web_assistant.ml.experiments.quantization.predict_monte_carlo',
+           MagicMock(side_effect=RuntimeError('prediction failed')))
+    def test_evaluate_model__monte_carlo_restored_when_prediction_fails(self):
+        # GIVEN
+        model = MagicMock(monte_carlo=True)
+
+        # WHEN
+        with self.assertRaises(RuntimeError):
+            evaluate_model(model, x_test=self.x_test, y_test=self.y_test, class_amount=2)
+
+        # THEN
+        self.assertTrue(model.monte_carlo)
+
+    def test_compare_quantizations__report(self):
+        # GIVEN
+        calibration_data = sample_calibration_data(self.x_test, config=QuantizationTestConfig())
+
+        with tempfile.TemporaryDirectory() as directory:
+            # WHEN
+            report = compare_quantizations(self.model, export_path=Path(directory),
+                                           calibration_data=calibration_data,
+                                           x_test=self.x_test, y_test=self.y_test,
+                                           class_amount=2,
+                                           quantizations=(None, 'float16', 'dynamic_int8'),
+                                           config=QuantizationTestConfig())
+
+        # THEN
+        self.assertListEqual(['checkpoint', 'tflite_float32', 'tflite_float16',
+                              'tflite_dynamic_int8'], [row['model'] for row in report])
+        for row in report[1:]:
+            self.assertGreater(row['size_bytes'], 0)
+            self.assertGreater(row['speedup'], 0.)
+            self.assertLessEqual(abs(row['accuracy_delta']), 1.)
+            self.assertIn('f1score_1_delta', row)
+        self.assertAlmostEqual(0., report[1]['accuracy_delta'], places=5)
+
+    def test_export_tflite__int8_without_calibration_data(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # WHEN & THEN
+            with self.assertRaises(ValueError):
+                export_tflite(self.model, path=Path(directory), quantization='int8',
+                              config=QuantizationTestConfig())
+
+    def test_export_tflite__unsupported_quantization(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # WHEN & THEN
+            with self.assertRaises(ValueError):
+                export_tflite(self.model, path=Path(directory), quantization='int4',
+                              config=QuantizationTestConfig())
@@ -0,0 +1,89 @@
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from eeg_web_assistant.ml.experiments.export_model import export_saved_model, export_tflite
+from eeg_web_assistant.ml.models.exported import SavedModelInstaGAT, TFLiteInstaGAT
+from eeg_web_assistant.ml.models.insta_gat import InstaGAT
+from eeg_web_assistant.ml.predictors.monte_carlo import predict_monte_carlo
+from tests.unit import UnitTestCase
+
+
+class ExportTestConfig:
+    TFLITE_BATCH_SIZE = 4
+    TFLITE_THREADS = None
+    TFLITE_QUANTIZATION = None
+
+
+class TestExportedInstaGAT(UnitTestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.frames, cls.channels, cls.features = 2, 4, 3
+        cls.input_data = np.random.uniform(
+            size=(5, cls.frames, cls.channels, cls.channels + cls.features)
+        ).astype(np.float32)
+
+        cls.model = InstaGAT(dims=(cls.frames, cls.channels, cls.channels + cls.features),
+                             class_num=2, output_channels=4, hidden_units=8)
+        cls.model(cls.input_data)
+
+        cls.export_dir = tempfile.TemporaryDirectory()
+        cls.export_path = Path(cls.export_dir.name)
+        export_saved_model(cls.model, path=cls.export_path)
+        export_tflite(cls.model, path=cls.export_path, config=ExportTestConfig())
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.export_dir.cleanup()
+
+    def load_models(self, monte_carlo: bool):
+        return [
+            ('saved_model', SavedModelInstaGAT.load(self.export_path, monte_carlo=monte_carlo)),
+            ('tflite', TFLiteInstaGAT.load(self.export_path, monte_carlo=monte_carlo,
+                                           config=ExportTestConfig())),
+        ]
+
+    def test_load__dims(self):
+        for name, model in self.load_models(monte_carlo=True):
+            with self.subTest(backend=name):
+                # THEN
+                self.assertTupleEqual(self.model.dims, model.dims)
+
+    def test_encode__equal_to_keras_model(self):
+        # GIVEN
+        expected = self.model.encode(self.input_data).numpy()
+
+        for name, model in self.load_models(monte_carlo=True):
+            with self.subTest(backend=name):
+                # WHEN
+                actual = model.encode(self.input_data).numpy()
+
+                # THEN
+                np.testing.assert_allclose(expected, actual, rtol=1e-4, atol=1e-5)
+
+    def test_sample_head__equal_to_call_without_monte_carlo(self):
+        # GIVEN
+        expected = self.model(self.input_data).numpy()
+
+        for name, model in self.load_models(monte_carlo=False):
+            with self.subTest(backend=name):
+                # WHEN
+                actual = model.sample_head(model.encode(self.input_data), n=3).numpy()
+
+                # THEN
+                self.assertTupleEqual((3, 5, 2), actual.shape)
+                for sample in actual:
+                    np.testing.assert_allclose(expected, sample, rtol=1e-4, atol=1e-5)
+
+    def test_predict_monte_carlo__dropout_samples(self):
+        for name, model in self.load_models(monte_carlo=True):
+            with self.subTest(backend=name):
+                # WHEN
+                actual = predict_monte_carlo(model, input_data=self.input_data, iterations=20)
+
+                # THEN
+                self.assertTupleEqual((20, 5, 2), actual.shape)
+                np.testing.assert_allclose(1., actual.sum(axis=-1), rtol=1e-5)
+                self.assertGreater(actual.std(axis=0).max(), 0.)
@@ -0,0 +1,48 @@
+import numpy as np
+import tensorflow as tf
+
+from eeg_web_assistant.ml.models.insta_gat import InstaGAT
+from tests.unit import UnitTestCase
+
+
+class TestInstaGAT(UnitTestCase):
+
+    def setUp(self) -> None:
+        self.frames, self.channels, self.features = 2, 4, 3
+        self.input_data = np.random.uniform(
+            size=(5, self.frames, self.channels, self.channels + self.features)
+        ).astype(np.float32)
+
+        self.model = InstaGAT(dims=(self.frames, self.channels, self.channels + self.features),
+                              class_num=2, output_channels=4, hidden_units=8)
+        self.model(self.input_data)
+
+    def test_encode__embedding_shape(self):
+        # WHEN
+        embedding = self.model.encode(self.input_data)
+
+        # THEN
+        self.assertListEqual([5, 8], embedding.shape.as_list())
+
+    def test_sample_head__equal_to_call_without_monte_carlo(self):
+        # GIVEN
+        expected = self.model(self.input_data).numpy()
+
+        # WHEN
+        actual = self.model.sample_head(self.model.encode(self.input_data), n=3).numpy()
+
+        # THEN
+        self.assertTupleEqual((3, 5, 2), actual.shape)
+        for sample in actual:
+            np.testing.assert_allclose(expected, sample, rtol=1e-5)
+
+    def test_sample_head__dropout_samples_with_monte_carlo(self):
+        # GIVEN
+        self.model.monte_carlo = True
+        embedding = self.model.encode(self.input_data)
+
+        # WHEN
+        actual = self.model.sample_head(embedding, n=20).numpy()
+
+        # THEN
+        self.assertGreater(tf.math.reduce_std(actual, axis=0).numpy().max(), 0.)
@@ -0,0 +1,155 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import tensorflow as tf
+
+from eeg_web_assistant.ml.predictors.monte_carlo import predict_monte_carlo, predict_proba_adaptive
+from tests.unit import UnitTestCase
+
+
+class MonteCarloTestConfig:
+    MONTE_CARLO_MEMORY_BUDGET_MB = 1
+    MONTE_CARLO_ACTIVATION_FACTOR = 1
+    MONTE_CARLO_ITERATIONS = 20
+    MONTE_CARLO_BLOCK_ITERATIONS = 5
+    MONTE_CARLO_TOLERANCE = 0.005
+
+
+def build_model(dropout: float) -> tf.keras.Model:
+    inputs = tf.keras.Input((8, 4))
+    x = tf.keras.layers.Flatten()(inputs)
+    x = tf.keras.layers.Dense(16, activation='relu')(x)
+    x = tf.keras.layers.Dropout(dropout)(x)
+    outputs = tf.keras.layers.Dense(2, activation='softmax')(x)
+
+    return tf.keras.Model(inputs=[inputs], outputs=outputs)
+
+
+class SplitTestModel(tf.keras.Model):
+    def __init__(self, **kwargs):
+        super(SplitTestModel, self).__init__(**kwargs)
+        self.monte_carlo = True
+        self.flatten = tf.keras.layers.Flatten()
+        self.encoder = tf.keras.layers.Dense(16, activation='relu')
+        self.dropout_layer = tf.keras.layers.Dropout(0.5)
+        self.classifier = tf.keras.layers.Dense(2, activation='softmax')
+
+    def call(self, inputs, training=None, **kwargs):
+        x = self.dropout_layer(self.encode(inputs), training=self.monte_carlo or training)
+        return self.classifier(x)
+
+    def encode(self, inputs, training=None):
+        return self.encoder(self.flatten(inputs))
+
+    def sample_head(self, embedding, n, training=None):
+        x = tf.tile(tf.expand_dims(embedding, axis=0), [n, 1, 1])
+        return self.classifier(self.dropout_layer(x, training=self.monte_carlo or training))
+
+
+class TestMonteCarlo(UnitTestCase):
+
+    def setUp(self) -> None:
+        self.input_data = np.random.uniform(size=(10, 8, 4)).astype(np.float32)
+
+    def test_predict_monte_carlo__equal_to_predict_without_dropout(self):
+        # GIVEN
+        model = build_model(dropout=0.)
+        expected = model.predict(self.input_data)
+
+        # WHEN
+        actual = predict_monte_carlo(model, input_data=self.input_data, iterations=5,
+                                     config=MonteCarloTestConfig())
+
+        # THEN
+        self.assertTupleEqual((5, 10, 2), actual.shape)
+        for iteration in actual:
+            np.testing.assert_allclose(expected, iteration, rtol=1e-5)
+
+    def test_predict_monte_carlo__many_passes(self):
+        # GIVEN
+        model = build_model(dropout=0.)
+        config = MonteCarloTestConfig()
+        config.MONTE_CARLO_MEMORY_BUDGET_MB = 3 * self.input_data[0].nbytes / 2 ** 20
+
+        # WHEN
+        actual = predict_monte_carlo(model, input_data=self.input_data, iterations=5,
+                                     config=config)
+
+        # THEN
+        np.testing.assert_allclose(
+            predict_monte_carlo(model, input_data=self.input_data, iterations=5,
+                                config=MonteCarloTestConfig()),
+            actual, rtol=1e-5)
+
+    def test_predict_monte_carlo__dropout_samples_differ(self):
+        # GIVEN
+        model = build_model(dropout=0.5)
+
+        # WHEN
+        actual = predict_monte_carlo(model, input_data=self.input_data, iterations=5,
+                                     config=MonteCarloTestConfig())
+
+        # THEN
+        self.assertGreater(actual.std(axis=0).max(), 0.)
+
+    def test_predict_monte_carlo__split_model_samples_head(self):
+        # GIVEN
+        model = SplitTestModel()
+        model.encode = MagicMock(wraps=model.encode)
+
+        # WHEN
+        actual = predict_monte_carlo(model, input_data=self.input_data, iterations=5,
+                                     config=MonteCarloTestConfig())
+
+        # THEN
+        model.encode.assert_called_once()
+        self.assertTupleEqual((5, 10, 2), actual.shape)
+        self.assertGreater(actual.std(axis=0).max(), 0.)
+
+        model.monte_carlo = False
+        deterministic = predict_monte_carlo(model, input_data=self.input_data, iterations=5,
+                                            config=MonteCarloTestConfig())
+        for iteration in deterministic:
+            np.testing.assert_allclose(model.predict(self.input_data), iteration, rtol=1e-5)
+
+    def test_predict_proba_adaptive__stop_after_two_blocks_without_dropout(self):
+        # GIVEN
+        model = build_model(dropout=0.)
+
+        # WHEN
+        mean, std, samples_used = predict_proba_adaptive(model, input_data=self.input_data,
+                                                         config=MonteCarloTestConfig())
+
+        # THEN
+        np.testing.assert_allclose(model.predict(self.input_data)[:, 1], mean, rtol=1e-5)
+        np.testing.assert_allclose(np.zeros(10), std, atol=1e-6)
+        np.testing.assert_array_equal(np.full(10, fill_value=10), samples_used)
+
+    def test_predict_proba_adaptive__iterations_cap(self):
+        # GIVEN
+        model = build_model(dropout=0.5)
+        config = MonteCarloTestConfig()
+        config.MONTE_CARLO_TOLERANCE = 0.
+
+        # WHEN
+        mean, std, samples_used = predict_proba_adaptive(model, input_data=self.input_data,
+                                                         config=config)
+
+        # THEN
+        np.testing.assert_array_equal(np.full(10, fill_value=20), samples_used)
+        self.assertTrue(np.all(std >= 0.))
+
+    def test_predict_proba_adaptive__split_model(self):
+        # GIVEN
+        model = SplitTestModel()
+        model.monte_carlo = False
+        model.encode = MagicMock(wraps=model.encode)
+
+        # WHEN
+        mean, _, samples_used = predict_proba_adaptive(model, input_data=self.input_data,
+                                                       config=MonteCarloTestConfig())
+
+        # THEN
+        model.encode.assert_called_once()
+        np.testing.assert_allclose(model.predict(self.input_data)[:, 1], mean, rtol=1e-5)
+        np.testing.assert_array_equal(np.full(10, fill_value=10), samples_used)
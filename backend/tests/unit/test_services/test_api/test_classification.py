@@ -0,0 +1,175 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from eeg_web_assistant import settings
+from eeg_web_assistant.models.user import UserInDB
+from eeg_web_assistant.services.api import API
+from eeg_web_assistant.services.database import Database
+from eeg_web_assistant.services.worker import Worker
+from eeg_web_assistant.utils.security import get_current_user
+
+
+class TestClassificationRouter(unittest.TestCase):
+    @staticmethod
+    def _get_current_valid_user_mock():
+        return UserInDB(first_name='Jan', last_name='Kowalski', email='jkowalski@gmail.com',
+                        username='jankowalski', password='securepassword')
+
+    @staticmethod
+    def _get_segments(prob: float):
+        return [{'nr': nr, 'prob': prob, 'std': 0.1, 'start_time': nr * 16,
+                 'stop_time': (nr + 1) * 16, 'samples': 100} for nr in range(2)]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        try:
+            api = API.create(config=settings.APIConfig())
+        except RuntimeError:
+            # the API service is created once, by the first router tests run
+            api = API()
+
+        cls.client = TestClient(api.app)
+
+    def setUp(self) -> None:
+        self.recording = {'_id': ObjectId(), 'name': 'recording', 'username': 'jankowalski',
+                          'raw_id': ObjectId(), 'created': datetime(2020, 11, 1),
+                          'recording_info': {'n_times': 256 * 64, 'sfreq': 256.,
+                                             'ch_names': ['EEG FP1-REF', 'EEG CZ-REF']}}
+
+        self.db = MagicMock()
+        self.db.recordings_data.find_one_by_id = MagicMock(return_value=self.recording)
+        self.db.recordings_data.find_one_by_id_and_username = MagicMock(
+            return_value=self.recording)
+
+        self.worker = MagicMock()
+        self.classify_types_task = self.worker.classification.classify_recording_types
+        self.classify_types_task.delay = MagicMock(return_value=MagicMock(id='task-id'))
+
+        self.client.app.dependency_overrides[Database] = lambda: self.db
+        self.client.app.dependency_overrides[Worker] = lambda: self.worker
+        self.client.app.dependency_overrides[get_current_user] = self._get_current_valid_user_mock
+
+    def tearDown(self) -> None:
+        self.client.app.dependency_overrides = {}
+
+    def test_enqueue_classifications__return_202_single_task_for_all_types(self):
+        # WHEN
+        response = self.client.patch(
+            f'/classification/{self.recording["_id"]}/types',
+            params=[('classification_types', 'seizure'), ('classification_types', 'artifact'),
+                    ('classification_types', 'seizure')]
+        )
+
+        # THEN
+        self.assertEqual(202, response.status_code)
+        self.assertEqual('task-id', response.json())
+        self.classify_types_task.delay.assert_called_once_with(
+            recording_id=str(self.recording['_id']),
+            raw_data_id=str(self.recording['raw_id']),
+            classification_types=['seizure', 'artifact'],
+            ch_names=['EEG FP1-REF', 'EEG CZ-REF'],
+            sfreq=256.
+        )
+
+    def test_enqueue_classifications__return_202_only_missing_types(self):
+        # GIVEN
+        self.recording['classification'] = {
+            'seizure': {'type': 'seizure', 'segments': self._get_segments(prob=0.9)}
+        }
+
+        # WHEN
+        response = self.client.patch(
+            f'/classification/{self.recording["_id"]}/types',
+            params=[('classification_types', 'seizure'), ('classification_types', 'abnormal')]
+        )
+
+        # THEN
+        self.assertEqual(202, response.status_code)
+        delay_kwargs = self.classify_types_task.delay.call_args.kwargs
+        self.assertListEqual(['abnormal'], delay_kwargs['classification_types'])
+
+    def test_enqueue_classifications__return_200_all_types_classified(self):
+        # GIVEN
+        self.recording['classification'] = {
+            'seizure': {'type': 'seizure', 'segments': self._get_segments(prob=0.9)},
+            'artifact': {'type': 'artifact', 'segments': self._get_segments(prob=0.2)}
+        }
+
+        # WHEN
+        response = self.client.patch(
+            f'/classification/{self.recording["_id"]}/types',
+            params=[('classification_types', 'artifact'), ('classification_types', 'seizure')]
+        )
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+        self.assertDictEqual({'artifact': self._get_segments(prob=0.2),
+                              'seizure': self._get_segments(prob=0.9)}, response.json())
+        self.classify_types_task.delay.assert_not_called()
+
+    def test_enqueue_classifications__return_422_unknown_type(self):
+        # WHEN
+        response = self.client.patch(f'/classification/{self.recording["_id"]}/types',
+                                     params={'classification_types': 'sleep'})
+
+        # THEN
+        self.assertEqual(422, response.status_code)
+        self.assertIn("['query', 'classification_types', 0]", str(response.json()))
+
+    def test_enqueue_classifications__return_403(self):
+        # GIVEN
+        self.db.recordings_data.find_one_by_id_and_username = MagicMock(return_value=None)
+
+        # WHEN
+        response = self.client.patch(f'/classification/{self.recording["_id"]}/types',
+                                     params={'classification_types': 'seizure'})
+
+        # THEN
+        self.assertEqual(403, response.status_code)
+        self.classify_types_task.delay.assert_not_called()
+
+    def test_get_classification_status__return_200_results_keyed_by_type(self):
+        # GIVEN
+        self.worker.get_task = MagicMock(return_value=MagicMock(status='SUCCESS', result={
+            'seizure': {'type': 'seizure', 'segments': self._get_segments(prob=0.9)},
+            'abnormal': {'type': 'abnormal', 'segments': self._get_segments(prob=0.4)}
+        }))
+
+        # WHEN
+        response = self.client.get('/classification/task-id')
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+        self.assertDictEqual({'task_id': 'task-id', 'status': 'SUCCESS',
+                              'result': {'seizure': self._get_segments(prob=0.9),
+                                         'abnormal': self._get_segments(prob=0.4)}},
+                             response.json())
+
+    def test_get_classification_status__return_200_single_type_result(self):
+        # GIVEN
+        self.worker.get_task = MagicMock(return_value=MagicMock(
+            status='SUCCESS', result={'type': 'seizure', 'segments': self._get_segments(prob=0.9)}
+        ))
+
+        # WHEN
+        response = self.client.get('/classification/task-id')
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+        self.assertListEqual(self._get_segments(prob=0.9), response.json()['result'])
+
+    def test_get_classification_status__return_200_pending(self):
+        # GIVEN
+        self.worker.get_task = MagicMock(return_value=MagicMock(status='PENDING', result=None))
+
+        # WHEN
+        response = self.client.get('/classification/task-id')
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+        self.assertDictEqual({'task_id': 'task-id', 'status': 'PENDING', 'result': None},
+                             response.json())
@@ -0,0 +1,428 @@
+import io
+import unittest
+import zlib
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from eeg_web_assistant import settings
+from eeg_web_assistant.core.edf_reader import EdfReader
+from eeg_web_assistant.core.features_key import get_raw_hash
+from eeg_web_assistant.core.plot_pyramid import PlotPyramid
+from eeg_web_assistant.core.signal_blocks import SignalBlockReader, write_signal_blocks
+from eeg_web_assistant.models.user import UserInDB
+from eeg_web_assistant.services.api import API
+from eeg_web_assistant.services.api.routers.recording import _store_decoded_signal
+from eeg_web_assistant.services.cache import Cache
+from eeg_web_assistant.services.cache.array_cache import ArrayCache
+from eeg_web_assistant.services.database import Database
+from eeg_web_assistant.utils.plot_payload import PLOT_BINARY_MEDIA_TYPE, decode_plot_payload
+from eeg_web_assistant.utils.security import get_current_user
+from tests.unit.test_core.test_edf_reader import create_edf_bytes
+
+
+class TestRecordingRouter(unittest.TestCase):
+    @staticmethod
+    def _get_current_valid_user_mock():
+        return UserInDB(first_name='Jan', last_name='Kowalski', email='jkowalski@gmail.com',
+                        username='jankowalski', password='securepassword')
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        try:
+            api = API.create(config=settings.APIConfig())
+        except RuntimeError:
+            # the API service is created once, by the first router tests run
+            api = API()
+
+        cls.client = TestClient(api.app)
+
+    def setUp(self) -> None:
+        # 10 minutes of two EEG channels, a single pyramid level of 600 buckets
+        self.sfreq = 16
+        self.ch_names = ['EEG FP1-REF', 'EEG CZ-REF']
+        digital = np.random.randint(low=-32768, high=32767, dtype=np.int16,
+                                    size=(2, self.sfreq * 600))
+        self.edf_bytes = create_edf_bytes(digital=digital, labels=self.ch_names,
+                                          samples_per_record=[self.sfreq] * 2)
+        self.expected = EdfReader(io.BytesIO(self.edf_bytes)).read(dtype=np.float32)
+
+        self.recording = {'_id': ObjectId(), 'name': 'recording', 'username': 'jankowalski',
+                          'raw_id': ObjectId(), 'created': datetime(2020, 11, 1),
+                          'recording_info': {'n_times': self.sfreq * 600, 'sfreq': self.sfreq,
+                                             'ch_names': self.ch_names}}
+
+        self.db = MagicMock()
+        self.db.recordings_data.find_one_by_id = MagicMock(return_value=self.recording)
+        self.db.recordings_data.find_one_by_id_and_username = MagicMock(
+            return_value=self.recording)
+        self.db.recordings_raw.get = MagicMock(return_value=self.edf_bytes)
+
+        self.cache = MagicMock()
+        self.cache.plot_fragments = ArrayCache(max_memory_bytes=2 ** 20)
+
+        self.client.app.dependency_overrides[Database] = lambda: self.db
+        self.client.app.dependency_overrides[Cache] = lambda: self.cache
+        self.client.app.dependency_overrides[get_current_user] = self._get_current_valid_user_mock
+
+    def tearDown(self) -> None:
+        self.client.app.dependency_overrides = {}
+
+    def _store_pyramid(self):
+        pyramid = PlotPyramid.build(windows=[self.expected], n_times=self.expected.shape[1])
+        self.recording['plot_pyramid_id'] = ObjectId()
+        self.db.recordings_pyramid.get = MagicMock(return_value=pyramid.to_bytes())
+
+    def _store_signal_blocks(self):
+        blocks_file = io.BytesIO()
+        info = write_signal_blocks(EdfReader(io.BytesIO(self.edf_bytes)), file=blocks_file,
+                                   compress=zlib.compress, block_seconds=16)
+        self.recording['signal_blocks_id'] = ObjectId()
+        self.db.signal_blocks.open = MagicMock(return_value=SignalBlockReader(
+            io.BytesIO(blocks_file.getvalue()), info=info, decompress=zlib.decompress))
+
+    def test_get_plot_range__return_422_out_of_bounds_query(self):
+        queries = [{'width': 0}, {'width': settings.PlotConfig.MAX_PLOT_WIDTH + 1},
+                   {'width': 100, 'start': -1}, {'width': 100, 'stop': 0}, {'start': 0}]
+        for query in queries:
+            with self.subTest(query=query):
+                # WHEN
+                response = self.client.get(f'/recording/{self.recording["_id"]}/plot',
+                                           params=query)
+
+                # THEN
+                self.assertEqual(422, response.status_code)
+
+    def test_get_plot_range__return_400_empty_range(self):
+        # GIVEN
+        self._store_pyramid()
+
+        queries = [{'start': 100, 'stop': 50}, {'start': 30, 'stop': 30}, {'start': 600}]
+        for query in queries:
+            with self.subTest(query=query):
+                # WHEN
+                response = self.client.get(f'/recording/{self.recording["_id"]}/plot',
+                                           params={'width': 100, **query})
+
+                # THEN
+                self.assertEqual(400, response.status_code)
+                self.assertEqual(
+                    {'detail': 'Requested plot time range is empty or out of the recording'},
+                    response.json()
+                )
+
+    def test_get_plot_range__return_404(self):
+        # GIVEN
+        self.db.recordings_data.find_one_by_id = MagicMock(return_value=None)
+
+        # WHEN
+        response = self.client.get(f'/recording/{self.recording["_id"]}/plot',
+                                   params={'width': 100})
+
+        # THEN
+        self.assertEqual(404, response.status_code)
+
+    def test_get_plot_range__return_200_stored_pyramid_level(self):
+        # GIVEN
+        self._store_pyramid()
+
+        # WHEN
+        response = self.client.get(f'/recording/{self.recording["_id"]}/plot',
+                                   params={'start': 64, 'stop': 640, 'width': 100})
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+        plot_range = response.json()
+        self.assertEqual(16, plot_range['bucket_size'])
+        self.assertEqual(1., plot_range['sfreq'])
+        self.assertEqual(64., plot_range['start'])
+        self.assertEqual((2, 536), np.array(plot_range['data_min']).shape)
+
+        buckets = self.expected[:, 64 * self.sfreq:].reshape(2, 536, 16)
+        np.testing.assert_allclose(buckets.min(axis=-1), plot_range['data_min'], rtol=1e-6)
+        np.testing.assert_allclose(buckets.max(axis=-1), plot_range['data_max'], rtol=1e-6)
+        self.db.recordings_raw.get.assert_not_called()
+        self.db.signal_blocks.open.assert_not_called()
+
+    def test_get_plot_range__return_200_missing_pyramid_built_and_stored(self):
+        # GIVEN
+        self.db.recordings_pyramid.put = MagicMock(return_value=ObjectId())
+
+        # WHEN
+        response = self.client.get(f'/recording/{self.recording["_id"]}/plot',
+                                   params={'width': 100})
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(16, response.json()['bucket_size'])
+        self.db.recordings_raw.get.assert_called_once_with(self.recording['raw_id'])
+        self.db.recordings_pyramid.put.assert_called_once()
+        self.db.recordings_data.find_one_by_id_and_update_unset.assert_called_once_with(
+            id_=self.recording['_id'],
+            update_data={'plot_pyramid_id': self.db.recordings_pyramid.put.return_value}
+        )
+
+    def test_get_plot_range__return_200_pyramid_stored_by_concurrent_request(self):
+        # GIVEN
+        self.db.recordings_pyramid.put = MagicMock(return_value=ObjectId())
+        self.db.recordings_data.find_one_by_id_and_update_unset = MagicMock(return_value=None)
+
+        # WHEN
+        response = self.client.get(f'/recording/{self.recording["_id"]}/plot',
+                                   params={'width': 100})
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+        self.db.recordings_pyramid.delete.assert_called_once_with(
+            self.db.recordings_pyramid.put.return_value)
+
+    @patch('eeg_web_assistant.services.api.routers.recording._build_plot_pyramid',
+           MagicMock(side_effect=MemoryError))
+    def test_store_decoded_signal__pyramid_failure_logged(self):
+        # GIVEN
+        self.db.signal_blocks.put = MagicMock(return_value=ObjectId())
+
+        # WHEN
+        _store_decoded_signal(recording_id=self.recording['_id'],
+                              raw_id=self.recording['raw_id'], db=self.db)
+
+        # THEN
+        self.db.recordings_data.find_one_by_id_and_update.assert_called_once_with(
+            id_=self.recording['_id'],
+            update_data={'signal_blocks_id': self.db.signal_blocks.put.return_value}
+        )
+        self.db.recordings_pyramid.put.assert_not_called()
+
+    def test_get_plot_range__return_200_zoomed_in_samples_from_signal_blocks(self):
+        # GIVEN
+        self._store_pyramid()
+        self._store_signal_blocks()
+
+        # WHEN
+        response = self.client.get(f'/recording/{self.recording["_id"]}/plot',
+                                   params={'start': 100, 'stop': 110, 'width': 1000})
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+        plot_range = response.json()
+        self.assertEqual(1, plot_range['bucket_size'])
+        self.assertEqual(self.sfreq, plot_range['sfreq'])
+        self.assertEqual(plot_range['data_min'], plot_range['data_max'])
+        np.testing.assert_allclose(self.expected[:, 100 * self.sfreq:110 * self.sfreq],
+                                   plot_range['data_min'], rtol=1e-6)
+        self.db.signal_blocks.open.assert_called_once_with(self.recording['signal_blocks_id'])
+        self.db.recordings_raw.get.assert_not_called()
+
+    def test_get_plot_range__return_200_zoomed_in_samples_from_raw_edf(self):
+        # GIVEN
+        self._store_pyramid()
+
+        # WHEN
+        response = self.client.get(f'/recording/{self.recording["_id"]}/plot',
+                                   params={'start': 590, 'width': 1000})
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+        plot_range = response.json()
+        self.assertEqual(1, plot_range['bucket_size'])
+        np.testing.assert_allclose(self.expected[:, 590 * self.sfreq:], plot_range['data_min'],
+                                   rtol=1e-6)
+        self.db.recordings_raw.get.assert_called_once_with(self.recording['raw_id'])
+
+    def test_get_plot_data__return_200_json_by_default(self):
+        for accept in (None, 'application/json', '*/*'):
+            with self.subTest(accept=accept):
+                # WHEN
+                response = self.client.get(f'/recording/{self.recording["_id"]}/plot/1',
+                                           headers={'Accept': accept} if accept else {})
+
+                # THEN
+                self.assertEqual(200, response.status_code)
+                self.assertEqual('application/json', response.headers['content-type'])
+                plot = response.json()
+                self.assertListEqual(self.ch_names, plot['ch_names'])
+                self.assertEqual(self.sfreq, plot['sfreq'])
+                np.testing.assert_array_equal(
+                    self.expected[:, 1024:2048].astype(np.float16), plot['data_array'])
+
+    def test_get_plot_data__return_200_binary_payload(self):
+        accepts = [(f'{PLOT_BINARY_MEDIA_TYPE}', np.float16),
+                   (f'application/json;q=0.5, {PLOT_BINARY_MEDIA_TYPE}; dtype=float32',
+                    np.float32)]
+        for accept, dtype in accepts:
+            with self.subTest(accept=accept):
+                # WHEN
+                response = self.client.get(f'/recording/{self.recording["_id"]}/plot/1',
+                                           headers={'Accept': accept})
+
+                # THEN
+                self.assertEqual(200, response.status_code)
+                self.assertEqual(PLOT_BINARY_MEDIA_TYPE, response.headers['content-type'])
+                header, array = decode_plot_payload(response.content)
+                self.assertListEqual(self.ch_names, header['ch_names'])
+                self.assertEqual(self.sfreq, header['sfreq'])
+                self.assertEqual(dtype, array.dtype)
+                np.testing.assert_array_equal(self.expected[:, 1024:2048].astype(dtype), array)
+
+    def test_get_plot_data__decoded_once_and_cached(self):
+        # WHEN
+        responses = [self.client.get(f'/recording/{self.recording["_id"]}/plot/{nr}')
+                     for nr in (0, 1, 0)]
+
+        # THEN
+        self.assertListEqual([200] * 3, [response.status_code for response in responses])
+        self.db.recordings_raw.get.assert_called_once_with(self.recording['raw_id'])
+
+    def test_get_plot_data__return_200_fragment_from_signal_blocks(self):
+        # GIVEN
+        self._store_signal_blocks()
+
+        # WHEN
+        response = self.client.get(f'/recording/{self.recording["_id"]}/plot/2',
+                                   headers={'Accept': f'{PLOT_BINARY_MEDIA_TYPE}; dtype=float32'})
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+        _, array = decode_plot_payload(response.content)
+        np.testing.assert_allclose(self.expected[:, 2048:3072], array, rtol=1e-6)
+        self.db.recordings_raw.get.assert_not_called()
+
+    def test_get_plot_data__return_400_fragment_nr_exceeded(self):
+        # WHEN
+        response = self.client.get(f'/recording/{self.recording["_id"]}/plot/10')
+
+        # THEN
+        self.assertEqual(400, response.status_code)
+        self.assertEqual({'detail': 'Requested plot nr exceeds available fragments amount'},
+                         response.json())
+
+    def _put_stream(self, chunks):
+        for chunk in chunks:
+            self.stored_chunks.append(chunk)
+
+        return self.recording['raw_id']
+
+    def _upload(self, data: bytes, filename: str = 'recording.edf'):
+        self.stored_chunks = []
+        self.db.recordings_raw.put_stream = MagicMock(side_effect=self._put_stream)
+        self.db.recordings_data.insert_one = MagicMock(return_value=str(self.recording['_id']))
+
+        return self.client.post('/recording', params={'name': 'recording'},
+                                files={'new_file': (filename, data, 'application/octet-stream')})
+
+    @patch('eeg_web_assistant.services.api.routers.recording._store_decoded_signal')
+    @patch('eeg_web_assistant.settings.EdfFileConfig.UPLOAD_CHUNK_BYTES', 4096)
+    def test_create_recording__return_200_streamed_in_chunks(self, store_decoded_signal):
+        # WHEN
+        response = self._upload(self.edf_bytes)
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(str(self.recording['_id']), response.json())
+        self.assertGreater(len(self.stored_chunks), 1)
+        self.assertEqual(self.edf_bytes, b''.join(self.stored_chunks))
+
+        new_recording = self.db.recordings_data.insert_one.call_args.args[0]
+        self.assertEqual(get_raw_hash(self.edf_bytes), new_recording['raw_hash'])
+        self.assertEqual(self.recording['raw_id'], new_recording['raw_id'])
+        self.assertDictEqual({'n_times': self.sfreq * 600, 'sfreq': self.sfreq,
+                              'ch_names': self.ch_names},
+                             {key: new_recording['recording_info'][key]
+                              for key in ('n_times', 'sfreq', 'ch_names')})
+        store_decoded_signal.assert_called_once_with(recording_id=self.recording['_id'],
+                                                     raw_id=self.recording['raw_id'], db=self.db)
+
+    @patch('eeg_web_assistant.services.api.routers.recording._store_decoded_signal', MagicMock())
+    def test_create_recording__duplicate_upload_same_raw_hash(self):
+        raw_hashes = []
+        for chunk_bytes in (1000, 2 ** 20):
+            with patch('eeg_web_assistant.settings.EdfFileConfig.UPLOAD_CHUNK_BYTES', chunk_bytes):
+                # WHEN
+                response = self._upload(self.edf_bytes)
+
+                # THEN
+                self.assertEqual(200, response.status_code)
+                raw_hashes.append(self.db.recordings_data.insert_one.call_args.args[0]['raw_hash'])
+
+        self.assertListEqual([get_raw_hash(self.edf_bytes)] * 2, raw_hashes)
+
+    @patch('eeg_web_assistant.services.api.routers.recording._store_decoded_signal', MagicMock())
+    def test_create_recording__return_200_data_records_truncated(self):
+        # GIVEN
+        header_bytes = 256 * 3
+        record_bytes = 2 * self.sfreq * 2
+        truncated = self.edf_bytes[:header_bytes + 100 * record_bytes + record_bytes // 2]
+
+        # WHEN
+        response = self._upload(truncated)
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+        new_recording = self.db.recordings_data.insert_one.call_args.args[0]
+        self.assertEqual(100 * self.sfreq, new_recording['recording_info']['n_times'])
+        self.assertEqual(get_raw_hash(truncated), new_recording['raw_hash'])
+
+    @patch('eeg_web_assistant.settings.EdfFileConfig.UPLOAD_CHUNK_BYTES', 1000)
+    def test_create_recording__return_400_bad_header_aborted(self):
+        # GIVEN
+        data = b'not an edf file header'.ljust(5000, b'x')
+
+        # WHEN
+        response = self._upload(data)
+
+        # THEN
+        self.assertEqual(400, response.status_code)
+        self.assertEqual({'detail': 'Could not read the file content'}, response.json())
+        self.assertListEqual([], self.stored_chunks)
+        self.db.recordings_data.insert_one.assert_not_called()
+
+    def test_create_recording__return_400_truncated_headers(self):
+        # WHEN
+        response = self._upload(self.edf_bytes[:300])
+
+        # THEN
+        self.assertEqual(400, response.status_code)
+        self.assertEqual({'detail': 'Could not read the file content'}, response.json())
+        self.db.recordings_raw.delete.assert_called_once_with(self.recording['raw_id'])
+        self.db.recordings_data.insert_one.assert_not_called()
+
+    def test_create_recording__return_400_not_edf_extension(self):
+        # WHEN
+        response = self._upload(self.edf_bytes, filename='recording.txt')
+
+        # THEN
+        self.assertEqual(400, response.status_code)
+        self.assertEqual({'detail': 'Not an .edf file'}, response.json())
+        self.db.recordings_raw.put_stream.assert_not_called()
+
+    def test_delete_recording__return_200_features_shared_by_other_recording_kept(self):
+        # GIVEN
+        self.recording['raw_hash'] = get_raw_hash(self.edf_bytes)
+        self.db.recordings_data.find_one_and_delete = MagicMock(return_value=self.recording)
+        self.db.recordings_data.count_by_raw_hash = MagicMock(return_value=1)
+
+        # WHEN
+        response = self.client.delete(f'/recording/{self.recording["_id"]}')
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+        self.db.recordings_data.count_by_raw_hash.assert_called_once_with(
+            raw_hash=self.recording['raw_hash'])
+        self.db.features.delete_by_raw_hash.assert_not_called()
+
+    def test_delete_recording__return_200_features_of_last_recording_deleted(self):
+        # GIVEN
+        self.recording['raw_hash'] = get_raw_hash(self.edf_bytes)
+        self.db.recordings_data.find_one_and_delete = MagicMock(return_value=self.recording)
+        self.db.recordings_data.count_by_raw_hash = MagicMock(return_value=0)
+
+        # WHEN
+        response = self.client.delete(f'/recording/{self.recording["_id"]}')
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+        self.db.features.delete_by_raw_hash.assert_called_once_with(
+            raw_hash=self.recording['raw_hash'])
@@ -8,6 +8,7 @@ from fastapi.testclient import TestClient
 from eeg_web_assistant import settings
 from eeg_web_assistant.models.user import UserInDB
 from eeg_web_assistant.services.api import API
+from eeg_web_assistant.services.cache import Cache
 from eeg_web_assistant.services.database import Database
 from eeg_web_assistant.utils.exceptions import CredentialsError
 from eeg_web_assistant.utils.security import get_current_user
@@ -25,7 +26,12 @@ class TestUserRouter(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls) -> None:
-        api = API.create(config=settings.APIConfig())
+        try:
+            api = API.create(config=settings.APIConfig())
+        except RuntimeError:
+            # the API service is created once, by the first router tests run
+            api = API()
+
         cls.client = TestClient(api.app)
 
     def test_create_user__return_201(self):
@@ -201,6 +207,29 @@ class TestUserRouter(unittest.TestCase):
         db = MagicMock()
         db.users.find_one_and_delete = MagicMock(return_value={'username': 'jankowalski'})
         self.client.app.dependency_overrides[Database] = lambda: db
+        self.client.app.dependency_overrides[Cache] = lambda: MagicMock()
+        self.client.app.dependency_overrides[get_current_user] = self._get_current_valid_user_mock
+
+        # WHEN
+        response = self.client.delete('/user')
+
+        # THEN
+        self.assertEqual(200, response.status_code)
+
+    def test_delete_user__return_200_features_shared_by_other_user_kept(self):
+        # GIVEN
+        shared_hash, own_hash = 'a' * 64, 'b' * 64
+        db = MagicMock()
+        db.users.find_one_and_delete = MagicMock(return_value={'username': 'jankowalski'})
+        db.recordings_data.find_many_by_username_return_raw_ids = MagicMock(return_value=[
+            {'_id': 1, 'raw_id': 11, 'raw_hash': shared_hash},
+            {'_id': 2, 'raw_id': 12, 'raw_hash': own_hash}
+        ])
+        # the recording of shared_hash uploaded by another user is left after the delete
+        db.recordings_data.count_by_raw_hash = MagicMock(
+            side_effect=lambda raw_hash: int(raw_hash == shared_hash))
+        self.client.app.dependency_overrides[Database] = lambda: db
+        self.client.app.dependency_overrides[Cache] = lambda: MagicMock()
         self.client.app.dependency_overrides[get_current_user] = self._get_current_valid_user_mock
 
         # WHEN
@@ -208,11 +237,14 @@ class TestUserRouter(unittest.TestCase):
 
         # THEN
         self.assertEqual(200, response.status_code)
+        db.recordings_data.find_many_and_delete.assert_called_once_with(username='jankowalski')
+        db.features.delete_by_raw_hash.assert_called_once_with(raw_hash=own_hash)
 
     def test_delete_user__return_401(self):
         # GIVEN
         db = MagicMock()
         self.client.app.dependency_overrides[Database] = lambda: db
+        self.client.app.dependency_overrides[Cache] = lambda: MagicMock()
         self.client.app.dependency_overrides[get_current_user] = self._get_current_invalid_user_mock
 
         # WHEN
@@ -226,6 +258,7 @@ class TestUserRouter(unittest.TestCase):
         db = MagicMock()
         db.users.find_one_and_delete = MagicMock(return_value=None)
         self.client.app.dependency_overrides[Database] = lambda: db
+        self.client.app.dependency_overrides[Cache] = lambda: MagicMock()
         self.client.app.dependency_overrides[get_current_user] = self._get_current_valid_user_mock
 
         # WHEN
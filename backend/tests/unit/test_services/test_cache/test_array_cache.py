@@ -0,0 +1,134 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from eeg_web_assistant.services.cache.array_cache import ArrayCache
+from tests.unit import UnitTestCase
+
+
+class TestArrayCache(UnitTestCase):
+
+    def setUp(self) -> None:
+        # every array takes 800 bytes, memory holds two of them
+        self.arrays = [np.full(100, fill_value=idx, dtype=np.float64) for idx in range(4)]
+        self.cache = ArrayCache(max_memory_bytes=1600)
+
+    def test_get__missing_key(self):
+        # WHEN & THEN
+        self.assertIsNone(self.cache.get(('rec', 0)))
+
+    def test_put__evict_least_recently_used(self):
+        # GIVEN
+        self.cache.put(('rec', 0), self.arrays[0])
+        self.cache.put(('rec', 1), self.arrays[1])
+        self.cache.get(('rec', 0))
+
+        # WHEN
+        self.cache.put(('rec', 2), self.arrays[2])
+
+        # THEN
+        self.assertIn(('rec', 0), self.cache)
+        self.assertNotIn(('rec', 1), self.cache)
+        self.assertIn(('rec', 2), self.cache)
+        self.assertEqual(1600, self.cache.memory_bytes)
+
+    def test_put__array_bigger_than_memory_limit(self):
+        # WHEN
+        self.cache.put(('rec', 0), np.zeros(1000))
+
+        # THEN
+        self.assertNotIn(('rec', 0), self.cache)
+        self.assertEqual(0, self.cache.memory_bytes)
+
+    def test_put__replace_existing_key(self):
+        # GIVEN
+        self.cache.put(('rec', 0), self.arrays[0])
+
+        # WHEN
+        self.cache.put(('rec', 0), self.arrays[1])
+
+        # THEN
+        np.testing.assert_array_equal(self.arrays[1], self.cache.get(('rec', 0)))
+        self.assertEqual(800, self.cache.memory_bytes)
+
+    def test_delete__group(self):
+        # GIVEN
+        self.cache.put(('rec', 0), self.arrays[0])
+        self.cache.put(('other', 0), self.arrays[1])
+
+        # WHEN
+        self.cache.delete('rec')
+
+        # THEN
+        self.assertNotIn(('rec', 0), self.cache)
+        self.assertIn(('other', 0), self.cache)
+        self.assertEqual(800, self.cache.memory_bytes)
+
+    def test_spill__evicted_to_disk_and_loaded_back(self):
+        with TemporaryDirectory() as spill_dir:
+            # GIVEN
+            cache = ArrayCache(max_memory_bytes=1600, spill_dir=Path(spill_dir),
+                               max_disk_bytes=800)
+            for idx, array in enumerate(self.arrays):
+                cache.put(('rec', idx), array)
+
+            # WHEN
+            loaded = cache.get(('rec', 1))
+
+            # THEN
+            self.assertNotIn(('rec', 0), cache)
+            np.testing.assert_array_equal(self.arrays[1], loaded)
+            self.assertIn(('rec', 2), cache)
+            self.assertEqual(800, cache.disk_bytes)
+            self.assertEqual(1, len(list(Path(spill_dir).iterdir())))
+
+    def test_delete__group_spilled_to_disk(self):
+        with TemporaryDirectory() as spill_dir:
+            # GIVEN
+            cache = ArrayCache(max_memory_bytes=800, spill_dir=Path(spill_dir),
+                               max_disk_bytes=1600)
+            cache.put(('rec', 0), self.arrays[0])
+            cache.put(('rec', 1), self.arrays[1])
+
+            # WHEN
+            cache.delete('rec')
+
+            # THEN
+            self.assertEqual(0, cache.memory_bytes)
+            self.assertEqual(0, cache.disk_bytes)
+            self.assertListEqual([], list(Path(spill_dir).iterdir()))
+
+    def test_spill__same_key_in_two_caches_sharing_directory(self):
+        with TemporaryDirectory() as spill_dir:
+            # GIVEN
+            caches = [ArrayCache(max_memory_bytes=800, spill_dir=Path(spill_dir),
+                                 max_disk_bytes=1600) for _ in range(2)]
+            for cache, array in zip(caches, self.arrays[:2]):
+                cache.put(('rec', 0), array)
+                cache.put(('rec', 1), self.arrays[3])
+
+            # WHEN
+            loaded = [cache.get(('rec', 0)) for cache in caches]
+
+            # THEN
+            np.testing.assert_array_equal(self.arrays[0], loaded[0])
+            np.testing.assert_array_equal(self.arrays[1], loaded[1])
+
+    def test_get__spilled_file_missing(self):
+        with TemporaryDirectory() as spill_dir:
+            # GIVEN
+            cache = ArrayCache(max_memory_bytes=800, spill_dir=Path(spill_dir),
+                               max_disk_bytes=1600)
+            cache.put(('rec', 0), self.arrays[0])
+            cache.put(('rec', 1), self.arrays[1])
+            for path in Path(spill_dir).iterdir():
+                path.unlink()
+
+            # WHEN
+            loaded = cache.get(('rec', 0))
+
+            # THEN
+            self.assertIsNone(loaded)
+            self.assertNotIn(('rec', 0), cache)
+            self.assertEqual(0, cache.disk_bytes)
@@ -0,0 +1,56 @@
+import gzip
+from unittest.mock import patch
+
+import numpy as np
+
+from eeg_web_assistant.services.database.codecs import (CODECS, GzipCodec, get_available_codecs,
+                                                        get_codec)
+from tests.unit import UnitTestCase
+
+
+class TestCodecs(UnitTestCase):
+
+    def setUp(self) -> None:
+        self.data = np.random.randint(low=-100, high=100, dtype=np.int16, size=10000).tobytes()
+
+    def test_compressor__chunks_decompressed_to_joined_data(self):
+        for name in get_available_codecs():
+            with self.subTest(codec=name):
+                # GIVEN
+                codec = get_codec(name)
+                compressor = codec.compressor()
+
+                # WHEN
+                compressed = b''.join([compressor.compress(self.data[idx:idx + 3000])
+                                       for idx in range(0, len(self.data), 3000)]
+                                      + [compressor.flush()])
+
+                # THEN
+                self.assertEqual(self.data, codec.decompress(compressed))
+
+    def test_get_codec__level_from_spec(self):
+        # WHEN
+        codec = get_codec('zlib:9')
+
+        # THEN
+        self.assertEqual(9, codec.level)
+        self.assertEqual('zlib:9', codec.spec)
+        self.assertEqual(1, get_codec('zlib').level)
+
+    def test_get_codec__raise_error(self):
+        for spec in ('brotli', 'zlib:fast'):
+            with self.subTest(spec=spec):
+                # WHEN & THEN
+                self.assertRaises(ValueError, get_codec, spec)
+
+    def test_get_codec__raise_error_when_not_installed(self):
+        # GIVEN
+        with patch.object(CODECS['zstd'], 'is_available', return_value=False):
+            # WHEN & THEN
+            self.assertRaises(ValueError, get_codec, 'zstd')
+            self.assertNotIn('zstd', get_available_codecs())
+
+    def test_gzip_codec__gzip_module_format(self):
+        # WHEN & THEN
+        self.assertEqual(self.data, GzipCodec().decompress(gzip.compress(self.data)))
+        self.assertEqual(self.data, gzip.decompress(GzipCodec().compress(self.data)))
@@ -0,0 +1,105 @@
+import gzip
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from bson import ObjectId
+
+from eeg_web_assistant.services.database.codecs import ZlibCodec
+from eeg_web_assistant.services.database.collections import (_RecordingDataCollection,
+                                                             _RecordingRawCollection)
+from tests.unit import UnitTestCase
+
+
+class TestRecordingRawCollection(UnitTestCase):
+
+    @patch('eeg_web_assistant.services.database.collections.gridfs.GridFS')
+    def setUp(self, grid_fs) -> None:
+        self.fs = grid_fs.return_value
+        self.collection = _RecordingRawCollection(database=MagicMock(), collection='edf_raw',
+                                                  codec='gzip')
+
+        self.raw_data = np.random.randint(low=-32768, high=32767, dtype=np.int16,
+                                          size=10000).tobytes()
+        self.chunks = [self.raw_data[start:start + 4096]
+                       for start in range(0, len(self.raw_data), 4096)]
+
+    def stored_data(self) -> bytes:
+        return b''.join(call.args[0] for call in self.fs.new_file.return_value.write.call_args_list)
+
+    def test_put_stream__gzip_of_all_chunks(self):
+        # WHEN
+        self.collection.put_stream(iter(self.chunks))
+
+        # THEN
+        self.assertEqual(self.raw_data, gzip.decompress(self.stored_data()))
+        self.fs.new_file.assert_called_once_with(metadata={'codec': 'gzip'})
+        self.fs.new_file.return_value.close.assert_called_once()
+
+    def test_put_stream__abort_when_chunks_fail(self):
+        # GIVEN
+        def failing_chunks():
+            yield self.chunks[0]
+            raise ValueError("Bad EDF file header")
+
+        # WHEN & THEN
+        self.assertRaises(ValueError, self.collection.put_stream, failing_chunks())
+        self.fs.new_file.return_value.abort.assert_called_once()
+        self.fs.new_file.return_value.close.assert_not_called()
+
+    def test_get__read_file_without_codec_as_gzip(self):
+        # GIVEN
+        self.fs.get.return_value.metadata = None
+        self.fs.get.return_value.read.return_value = gzip.compress(self.raw_data)
+
+        # WHEN
+        raw_data = self.collection.get(file_id=MagicMock())
+
+        # THEN
+        self.assertEqual(self.raw_data, raw_data)
+
+    def test_get__read_with_codec_from_metadata(self):
+        # GIVEN
+        self.fs.get.return_value.metadata = {'codec': 'zlib'}
+        self.fs.get.return_value.read.return_value = ZlibCodec(level=9).compress(self.raw_data)
+
+        # WHEN
+        raw_data = self.collection.get(file_id=MagicMock())
+
+        # THEN
+        self.assertEqual(self.raw_data, raw_data)
+
+
+class TestRecordingDataCollection(UnitTestCase):
+
+    def setUp(self) -> None:
+        self.database = MagicMock()
+        self.collection = _RecordingDataCollection(database=self.database,
+                                                   collection='recordings_data')
+
+    def test_find_one_by_id_and_update_unset__filter_on_unset_fields(self):
+        # GIVEN
+        id_, pyramid_id = ObjectId(), ObjectId()
+
+        # WHEN
+        self.collection.find_one_by_id_and_update_unset(id_=id_,
+                                                        update_data={'plot_pyramid_id': pyramid_id})
+
+        # THEN
+        find_one_and_update = self.database['recordings_data'].find_one_and_update
+        find_one_and_update.assert_called_once()
+        self.assertDictEqual({'_id': id_, 'plot_pyramid_id': None},
+                             find_one_and_update.call_args.kwargs['filter'])
+        self.assertDictEqual({'$set': {'plot_pyramid_id': pyramid_id}},
+                             find_one_and_update.call_args.kwargs['update'])
+
+    def test_count_by_raw_hash__count_recordings_of_raw_hash(self):
+        # GIVEN
+        self.database['recordings_data'].count_documents = MagicMock(return_value=2)
+
+        # WHEN
+        actual = self.collection.count_by_raw_hash(raw_hash='0' * 64)
+
+        # THEN
+        self.assertEqual(2, actual)
+        self.database['recordings_data'].count_documents.assert_called_once_with(
+            filter={'raw_hash': '0' * 64})
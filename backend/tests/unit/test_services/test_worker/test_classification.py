@@ -0,0 +1,134 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from eeg_web_assistant.core.classification_types import ClassificationType
+from eeg_web_assistant.core.features_key import get_raw_hash
+from eeg_web_assistant.services.worker.tasks.classification import (_classify_edf,
+                                                                    _open_recording_signal,
+                                                                    classify_recording_types)
+from tests.unit import UnitTestCase
+
+MODULE = 'eeg_web_assistant.services.worker.tasks.classification'
+
+
+class TestClassification(UnitTestCase):
+
+    def setUp(self) -> None:
+        self.segment_cuts = [(0, 4000), (4000, 8000)]
+        self.features = np.zeros((2, 8, 21, 32))
+
+    def set_up_processing(self, edf_processor, extract_features, predict_proba):
+        edf_processor.group_by_channels.return_value = [
+            [ClassificationType.ABNORMAL, ClassificationType.SEIZURE],
+            [ClassificationType.ARTIFACT]
+        ]
+        edf_processor.return_value.segment_cuts = self.segment_cuts
+        edf_processor.return_value.get_processing_params.side_effect = [
+            {'channels': ['EEG FP1-REF']}, {'channels': ['EEG FP1-REF', 'EEG T1-REF']}
+        ]
+        extract_features.return_value = self.features
+        predict_proba.return_value = (np.zeros(2), np.zeros(2), np.full(2, 10))
+
+    @patch(f'{MODULE}.Database')
+    @patch(f'{MODULE}.predict_features_proba_per_segment')
+    @patch(f'{MODULE}.extract_eeg_blocks_features')
+    @patch(f'{MODULE}.EdfProcessor')
+    def test_classify_edf__features_extracted_once_per_channels_group(self, edf_processor,
+                                                                      extract_features,
+                                                                      predict_proba, database):
+        # GIVEN
+        self.set_up_processing(edf_processor, extract_features, predict_proba)
+        database.return_value.features.get.return_value = None
+
+        # WHEN
+        results = _classify_edf(edf_file=MagicMock(), raw_hash='0' * 64,
+                                class_types=list(ClassificationType), sfreq=250.)
+
+        # THEN
+        self.assertEqual(2, extract_features.call_count)
+        self.assertEqual(3, predict_proba.call_count)
+        self.assertSetEqual(set(ClassificationType), set(results))
+        for proba_mean, proba_std, samples_used, segment_cuts in results.values():
+            self.assertListEqual(self.segment_cuts, segment_cuts)
+        self.assertEqual(2, database.return_value.features.put.call_count)
+
+    @patch(f'{MODULE}.Database')
+    @patch(f'{MODULE}.predict_features_proba_per_segment')
+    @patch(f'{MODULE}.extract_eeg_blocks_features')
+    @patch(f'{MODULE}.EdfProcessor')
+    def test_classify_edf__stored_features_used(self, edf_processor, extract_features,
+                                                predict_proba, database):
+        # GIVEN
+        self.set_up_processing(edf_processor, extract_features, predict_proba)
+        database.return_value.features.get.return_value = self.features
+
+        # WHEN
+        results = _classify_edf(edf_file=MagicMock(), raw_hash='0' * 64,
+                                class_types=list(ClassificationType), sfreq=250.)
+
+        # THEN
+        extract_features.assert_not_called()
+        database.return_value.features.put.assert_not_called()
+        self.assertEqual(3, predict_proba.call_count)
+        self.assertSetEqual(set(ClassificationType), set(results))
+
+    @patch(f'{MODULE}.Database')
+    @patch(f'{MODULE}._classify_edf')
+    @patch(f'{MODULE}._open_recording_signal', MagicMock(return_value=(MagicMock(), '0' * 64)))
+    def test_classify_recording_types__single_database_update(self, classify_edf, database):
+        # GIVEN
+        classify_edf.return_value = {
+            class_type: (np.array([0.2, 0.9]), np.array([0.1, 0.05]), np.array([20, 10]),
+                         self.segment_cuts)
+            for class_type in (ClassificationType.ABNORMAL, ClassificationType.SEIZURE)
+        }
+
+        # WHEN
+        results = classify_recording_types(recording_id='5f9b3b3b3b3b3b3b3b3b3b3b',
+                                           raw_data_id='5f9b3b3b3b3b3b3b3b3b3b3c',
+                                           classification_types=['abnormal', 'seizure'],
+                                           ch_names=['EEG FP1-REF'], sfreq=250.)
+
+        # THEN
+        update = database.return_value.recordings_data.find_one_by_id_and_update
+        update.assert_called_once()
+        update_data = update.call_args[1]['update_data']
+
+        self.assertSetEqual({'abnormal', 'seizure'}, set(results))
+        self.assertIn('classification.abnormal.segments', update_data)
+        self.assertIn('classification.seizure.segments', update_data)
+        self.assertEqual('seizure', update_data['classification.seizure.type'])
+
+    @patch(f'{MODULE}.EdfFile')
+    @patch(f'{MODULE}.Database')
+    def test_open_recording_signal__stored_signal_blocks_used(self, database, edf_file):
+        # GIVEN
+        database.return_value.recordings_data.find_one_by_id.return_value = {
+            'signal_blocks_id': '5f9b3b3b3b3b3b3b3b3b3b3d', 'raw_hash': '0' * 64
+        }
+
+        # WHEN
+        _, raw_hash = _open_recording_signal(recording_id='5f9b3b3b3b3b3b3b3b3b3b3b',
+                                             raw_data_id='5f9b3b3b3b3b3b3b3b3b3b3c')
+
+        # THEN
+        self.assertEqual('0' * 64, raw_hash)
+        database.return_value.recordings_raw.get.assert_not_called()
+        edf_file.assert_called_once_with(
+            blocks=database.return_value.signal_blocks.open.return_value, dtype=np.float32)
+
+    @patch(f'{MODULE}.EdfFile')
+    @patch(f'{MODULE}.Database')
+    def test_open_recording_signal__raw_data_without_signal_blocks(self, database, edf_file):
+        # GIVEN
+        database.return_value.recordings_data.find_one_by_id.return_value = {'raw_hash': '0' * 64}
+        database.return_value.recordings_raw.get.return_value = b'raw edf data'
+
+        # WHEN
+        _, raw_hash = _open_recording_signal(recording_id='5f9b3b3b3b3b3b3b3b3b3b3b',
+                                             raw_data_id='5f9b3b3b3b3b3b3b3b3b3b3c')
+
+        # THEN
+        self.assertEqual(get_raw_hash(b'raw edf data'), raw_hash)
+        edf_file.assert_called_once_with(buffer=b'raw edf data', dtype=np.float32)
@@ -0,0 +1,48 @@
+from unittest.mock import MagicMock, call, patch
+
+from eeg_web_assistant.core.classification_types import ClassificationType
+from eeg_web_assistant.services.worker.startup import preload_models, warm_up_model
+from tests.unit import UnitTestCase
+
+
+class WorkerTestConfig:
+    warm_up_models = True
+
+
+class TestStartup(UnitTestCase):
+
+    @patch('eeg_web_assistant.services.worker.startup.warm_up_model')
+    @patch('eeg_web_assistant.services.worker.startup.Model')
+    def test_preload_models__load_and_warm_up_all_types(self, model, warm_up):
+        # WHEN
+        preload_models(config=WorkerTestConfig(), sender=None)
+
+        # THEN
+        model.load.assert_has_calls([call(class_type) for class_type in ClassificationType])
+        self.assertEqual(len(ClassificationType), warm_up.call_count)
+
+    @patch('eeg_web_assistant.services.worker.startup.warm_up_model')
+    @patch('eeg_web_assistant.services.worker.startup.Model')
+    def test_preload_models__without_warm_up(self, model, warm_up):
+        # GIVEN
+        config = WorkerTestConfig()
+        config.warm_up_models = False
+
+        # WHEN
+        preload_models(config=config)
+
+        # THEN
+        self.assertEqual(len(ClassificationType), model.load.call_count)
+        warm_up.assert_not_called()
+
+    @patch('eeg_web_assistant.services.worker.startup.predict_monte_carlo')
+    def test_warm_up_model__dummy_input_shape(self, predict_monte_carlo):
+        # GIVEN
+        model = MagicMock(dims=(8, 21, 32))
+
+        # WHEN
+        warm_up_model(model)
+
+        # THEN
+        dummy_input = predict_monte_carlo.call_args[1]['input_data']
+        self.assertTupleEqual((1, 8, 21, 32), dummy_input.shape)
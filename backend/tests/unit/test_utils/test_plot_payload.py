@@ -0,0 +1,42 @@
+import numpy as np
+
+from eeg_web_assistant.utils.plot_payload import (decode_plot_payload, encode_plot_payload,
+                                                  negotiate_binary_dtype)
+from tests.unit import UnitTestCase
+
+
+class TestPlotPayload(UnitTestCase):
+
+    def test_negotiate_binary_dtype(self):
+        params = [
+            # accept header, expected dtype
+            (None, None),
+            ('application/json', None),
+            ('*/*', None),
+            ('application/octet-stream', 'float16'),
+            ('application/octet-stream; dtype=float32', 'float32'),
+            ('application/octet-stream;dtype=float64', None),
+            ('application/json, application/octet-stream; dtype=float32;q=0.9', 'float32'),
+        ]
+
+        for accept, expected in params:
+            with self.subTest(accept=accept):
+                # WHEN & THEN
+                self.assertEqual(expected, negotiate_binary_dtype(accept))
+
+    def test_encode_decode_plot_payload(self):
+        # GIVEN
+        array = np.random.uniform(low=-1e-4, high=1e-4, size=(3, 100))
+        ch_names = ['EEG FP1-REF', 'EEG FP2-REF', 'EEG CZ-REF']
+
+        for dtype in ['float16', 'float32']:
+            with self.subTest(dtype=dtype):
+                # WHEN
+                payload = encode_plot_payload(ch_names=ch_names, array=array, sfreq=200.,
+                                              dtype=dtype)
+                header, decoded = decode_plot_payload(payload)
+
+                # THEN
+                self.assertDictEqual({'ch_names': ch_names, 'shape': [3, 100], 'sfreq': 200.,
+                                      'dtype': dtype}, header)
+                np.testing.assert_array_equal(array.astype(dtype), decoded)